@@ -2,6 +2,10 @@
 
 Запуск:
     python main.py
+    python main.py models [rollback <version>]
+    python main.py export-train [csv|json]
+    python main.py snapshot
+    API_WORKERS=4 python main.py serve
     uvicorn src.api.routes:app --reload --port 8000
 """
 import sys
@@ -45,7 +49,11 @@ def run_analysis():
     analyzer.initialize()
 
     logger.info("\n[3/4] Анализ лотов...")
-    results = analyzer.analyze_all()
+    analyzer.analyze_all()
+    analyzer.explain_pending()
+    # Объяснения ставятся в копии результатов — берем снимок после explain_pending()
+    results = analyzer.get_cached_results()
+    analyzer.save_analysis_cache()
 
     logger.info("\n[4/4] Сохранение результатов...")
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
@@ -88,15 +96,85 @@ def run_analysis():
     print("=" * 60)
 
 
+def run_models(args: list[str]):
+    """Список версий моделей в реестре или откат на выбранную версию."""
+    from src.model.registry import ModelRegistry
+
+    registry = ModelRegistry()
+    if args and args[0] == "rollback":
+        if len(args) < 2:
+            print("Использование: python main.py models rollback <version>")
+            sys.exit(1)
+        try:
+            entry = registry.activate(args[1], pin=True)
+        except KeyError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Активная версия: {entry['version']} (закреплена до следующего обучения)")
+        return
+
+    active = registry.active()
+    versions = registry.list_versions()
+    if not versions:
+        print("Реестр моделей пуст")
+        return
+    for entry in versions:
+        mark = "*" if active and entry["version"] == active["version"] else " "
+        meta = entry.get("meta", {})
+        print(
+            f" {mark} {entry['version']}  {entry['created_at']}  "
+            f"source={meta.get('training_source', '?')} samples={meta.get('samples', '?')}"
+        )
+
+
+def run_export_train(args: list[str]):
+    """Строит CSV/JSON из колоночной выгрузки обучающих данных (EXPORT_TRAIN_DATA=1)."""
+    from src.model.train_data import TrainData, export_train_data
+    from src.utils.config import TRAIN_DATA_PATH
+
+    fmt = args[0] if args else "csv"
+    if fmt not in ("csv", "json"):
+        print("Использование: python main.py export-train [csv|json]")
+        sys.exit(1)
+    if not TrainData.exists(TRAIN_DATA_PATH):
+        print(f"❌ Нет выгрузки {TRAIN_DATA_PATH}.npy — запустите анализ с EXPORT_TRAIN_DATA=1")
+        sys.exit(1)
+    path = export_train_data(TRAIN_DATA_PATH, fmt)
+    print(f"✅ {path}")
+
+
+def run_snapshot():
+    """Строит состояние анализатора и сохраняет снимок для быстрого рестарта.
+
+    Состояние строится заново (старый снимок не читается), модели не обучаются и не загружаются.
+    """
+    from src.model.analyzer import GoszakupAnalyzer
+
+    analyzer = GoszakupAnalyzer(use_transformers=False)
+    analyzer.initialize(warm_start=False, models=False)
+    path = analyzer.save_snapshot()
+    print(f"✅ {path}")
+
+
 def run_server():
-    """Запускает сервер FastAPI."""
+    """Запускает сервер FastAPI (API_WORKERS > 1 — несколько процессов с общим состоянием)."""
     import uvicorn
-    from src.utils.config import API_HOST, API_PORT
+    from src.utils.config import API_HOST, API_PORT, API_WORKERS
+    if API_WORKERS > 1:
+        from src.api.server import serve
+        serve(API_WORKERS, API_HOST, API_PORT)
+        return
     uvicorn.run("src.api.routes:app", host=API_HOST, port=API_PORT, reload=True)
 
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "serve":
         run_server()
+    elif len(sys.argv) > 1 and sys.argv[1] == "models":
+        run_models(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "export-train":
+        run_export_train(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "snapshot":
+        run_snapshot()
     else:
         run_analysis()
\ No newline at end of file
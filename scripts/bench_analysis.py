@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк полного анализа корпуса (analyze_all): время vs число процессов.
+
+Запуск:
+    python scripts/bench_analysis.py --lots 20000
+    python scripts/bench_analysis.py --input data/raw/real_lots.json --workers 1 2 4 8
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.config import RAW_DIR
+from src.model.analyzer import GoszakupAnalyzer
+from src.model.registry import ModelRegistry
+from src.model.result_store import ResultStore
+from scripts.bench_feature_extraction import load_lots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=RAW_DIR / "real_lots.json")
+    parser.add_argument("--lots", type=int, default=0, help="размер корпуса (0 — как в файле)")
+    parser.add_argument("--workers", type=int, nargs="*", help="список значений числа процессов")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    lots = load_lots(args.input, args.lots)
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    analyzer = GoszakupAnalyzer()
+    # Результаты, модели, снимок и выгрузка обучающих данных пишутся во временный каталог:
+    # рабочие хранилище, реестр (активная версия и ротация), снимок и выгрузку не трогаем
+    tmp_path = Path(tmp_dir.name)
+    analyzer.result_store = ResultStore(tmp_path / "results.db")
+    analyzer.registry = ModelRegistry(tmp_path / "models")
+    analyzer.snapshot_path = tmp_path / "analyzer_snapshot.bin"
+    analyzer.train_data_path = tmp_path / "catboost_train"
+    analyzer._legacy_cache_path = tmp_path / "analysis_cache.json"
+    started = time.perf_counter()
+    analyzer.initialize(lots=lots)
+    print(f"Lots: {len(lots)}, cores: {cores}, initialize: {time.perf_counter() - started:.1f}s")
+    print(f"{'workers':>8} {'seconds':>9} {'lots/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        analyzer.result_store.clear()
+        analyzer._reset_results()
+        started = time.perf_counter()
+        analyzer.analyze_all(workers=workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.1f} {len(lots) / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+
+    analyzer.result_store.close()
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк извлечения признаков: время vs число процессов.
+
+Запуск:
+    python scripts/bench_feature_extraction.py --lots 100000
+    python scripts/bench_feature_extraction.py --input data/raw/real_lots.json --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.config import RAW_DIR
+from src.ingestion.goszakup_client import read_lots_file
+from src.preprocessing.feature_engineer import FeatureEngineer
+
+
+def load_lots(path: Path, target: int) -> list[dict]:
+    """Загружает лоты и при необходимости размножает их до target штук."""
+    base = read_lots_file(path)
+    if not base:
+        raise SystemExit(f"No lots in {path}")
+
+    if target <= len(base):
+        return base[:target] if target else base
+
+    lots = []
+    i = 0
+    while len(lots) < target:
+        lot = dict(base[i % len(base)])
+        lot["lot_id"] = f"{lot.get('lot_id', '')}-{i // len(base)}"
+        lots.append(lot)
+        i += 1
+    return lots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=RAW_DIR / "real_lots.json")
+    parser.add_argument("--lots", type=int, default=0, help="размер корпуса (0 — как в файле)")
+    parser.add_argument("--workers", type=int, nargs="*", help="список значений числа процессов")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument(
+        "--min-lots", type=int, default=0,
+        help="порог параллельного режима (по умолчанию 0 — пул даже на малом корпусе; "
+             "FEATURE_PARALLEL_MIN_LOTS — как в приложении)",
+    )
+    args = parser.parse_args()
+
+    lots = load_lots(args.input, args.lots)
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    engineer = FeatureEngineer()
+    started = time.perf_counter()
+    engineer.fit_history(lots)
+    fit_seconds = time.perf_counter() - started
+
+    print(f"Lots: {len(lots)}, cores: {cores}, fit_history: {fit_seconds:.1f}s")
+    print(f"{'workers':>8} {'seconds':>9} {'lots/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        if workers > 1 and len(lots) < args.min_lots:
+            print(f"{workers:>8}   serial: {len(lots)} lots < --min-lots {args.min_lots}")
+        started = time.perf_counter()
+        engineer.extract_batch(lots, workers=workers, chunk_size=args.chunk_size, min_lots=args.min_lots)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.1f} {len(lots) / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного старта: сводка `python -X importtime` для CLI (main.py) и ASGI-приложения.
+
+Для каждой цели импорт повторяется в новом процессе, берется медиана суммарного времени
+и самые тяжелые пакеты верхнего уровня. С --compare REV те же замеры делаются
+для ревизии REV (через git archive во временный каталог) для сравнения.
+
+Запуск:
+    python scripts/bench_import_time.py
+    python scripts/bench_import_time.py --compare HEAD~1 --repeats 7
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent
+
+TARGETS = {
+    "main.py": "import main",
+    "analyzer": "import src.model.analyzer",
+    "ASGI app": "import src.api.routes",
+}
+
+HEAVY = ("reportlab", "networkx", "catboost", "sklearn", "sentence_transformers", "httpx")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(code: str, cwd: Path) -> tuple[float, dict[str, float]]:
+    """Суммарное время импорта (мс) и собственное время модулей по пакетам верхнего уровня."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed in {cwd}:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    packages: dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, _cumulative_us, _indent, name = match.groups()
+        total_us += int(self_us)
+        packages[name.split(".")[0]] += int(self_us) / 1000
+    return total_us / 1000, dict(packages)
+
+
+def run(cwd: Path, repeats: int) -> dict[str, dict]:
+    results = {}
+    for label, code in TARGETS.items():
+        totals, per_package = [], defaultdict(list)
+        for _ in range(repeats):
+            total, packages = measure(code, cwd)
+            totals.append(total)
+            for name, ms in packages.items():
+                per_package[name].append(ms)
+        results[label] = {
+            "total_ms": statistics.median(totals),
+            "packages": {name: statistics.median(v) for name, v in per_package.items()},
+            "heavy": sorted(_loaded_heavy(code, cwd)),
+        }
+    return results
+
+
+def _loaded_heavy(code: str, cwd: Path) -> set[str]:
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", probe], cwd=cwd, capture_output=True, text=True
+    )
+    return {m for m in proc.stdout.strip().split(",") if m}
+
+
+def export_revision(rev: str, target: Path) -> None:
+    archive = target / "rev.tar"
+    with open(archive, "wb") as f:
+        subprocess.run(["git", "archive", rev], cwd=PROJECT_DIR, stdout=f, check=True)
+    with tarfile.open(archive) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(target / "src_tree", filter="data")
+        else:
+            tar.extractall(target / "src_tree")
+    env_file = PROJECT_DIR / ".env"
+    if env_file.exists():
+        (target / "src_tree" / ".env").write_bytes(env_file.read_bytes())
+
+
+def print_report(title: str, results: dict[str, dict], top: int) -> None:
+    print(f"\n== {title}")
+    for label, data in results.items():
+        heavy = ", ".join(data["heavy"]) or "-"
+        print(f"  {label:<10} {data['total_ms']:>8.1f} ms   heavy modules loaded: {heavy}")
+        ranked = sorted(data["packages"].items(), key=lambda kv: -kv[1])[:top]
+        for name, ms in ranked:
+            print(f"      {name:<28} {ms:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=6, help="сколько тяжелых пакетов показать")
+    parser.add_argument("--compare", metavar="REV", help="git-ревизия для сравнения")
+    args = parser.parse_args()
+
+    current = run(PROJECT_DIR, args.repeats)
+    print_report("working tree", current, args.top)
+
+    if args.compare:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_revision(args.compare, Path(tmp_dir))
+            baseline = run(Path(tmp_dir) / "src_tree", args.repeats)
+        print_report(args.compare, baseline, args.top)
+
+        print(f"\n== speedup vs {args.compare}")
+        for label in TARGETS:
+            before, after = baseline[label]["total_ms"], current[label]["total_ms"]
+            print(f"  {label:<10} {before:>8.1f} -> {after:>8.1f} ms  ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Кросс-валидация и перебор гиперпараметров RiskScorer в параллельных процессах.
+
+Для каждой конфигурации CatBoost / IsolationForest считаются ROC AUC (среднее и разброс по фолдам),
+время обучения, размер модели и задержка инференса (1 лот и 1000 лотов). Звездочкой отмечены
+конфигурации на фронтире качество/стоимость: ни одна другая не лучше по AUC и не дешевле одновременно.
+
+Признаки берутся из колоночной выгрузки (EXPORT_TRAIN_DATA=1); если ее нет, она строится из real_lots.json.
+Метки — LABELS_CSV, для неразмеченных лотов — псевдо-метки по правилам (как в GoszakupAnalyzer).
+Рабочие процессы открывают матрицу через memmap один раз при старте; в задачи уходят только индексы фолдов.
+
+Запуск:
+    python scripts/bench_model_grid.py
+    python scripts/bench_model_grid.py --folds 5 --depth 4 6 8 --lr 0.05 0.1 --iterations 200 500
+    python scripts/bench_model_grid.py --if-estimators 50 100 200 --json data/processed/model_grid.json
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.config import LABELS_CSV, RAW_DIR, TRAIN_DATA_PATH, resolve_workers
+from src.model.train_data import TrainData, TrainDataWriter
+from src.preprocessing.feature_engineer import LotFeatures
+
+
+def build_train_data(raw_path: Path) -> None:
+    """Строит колоночную выгрузку из сырых лотов (признаки + rule-скоры)."""
+    from src.model.rules import RuleEngine
+    from src.preprocessing.feature_engineer import FeatureEngineer
+
+    with open(raw_path, "r", encoding="utf-8") as f:
+        lots = json.load(f)
+    engineer = FeatureEngineer()
+    engineer.fit_history(lots)
+    features = engineer.extract_batch(lots)
+    rules = RuleEngine()
+
+    with TrainDataWriter(TRAIN_DATA_PATH, LotFeatures.feature_names(), len(lots)) as writer:
+        for lot, f in zip(lots, features):
+            score = rules.analyze(lot, f, history=engineer.get_history_for_lot(lot)).risk_score
+            writer.write(lot.get("lot_id", ""), 1 if score >= 50.0 else 0, score, f.to_feature_vector())
+
+
+def load_dataset() -> tuple[np.ndarray, np.ndarray]:
+    data = TrainData(TRAIN_DATA_PATH)
+    labels_csv = {}
+    path = Path(LABELS_CSV) if LABELS_CSV else None
+    if path and path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                label = str(row.get("label", "")).strip()
+                if label in {"0", "1"}:
+                    labels_csv[str(row.get("lot_id", "")).strip()] = int(label)
+
+    y = np.array([labels_csv.get(lot_id, label) for lot_id, label, _, _ in data.iter_rows()])
+    return np.asarray(data.matrix), y
+
+
+def grid(args) -> list[dict]:
+    configs = [
+        {"model": "catboost", "params": {"depth": d, "learning_rate": lr, "iterations": it}}
+        for d, lr, it in itertools.product(args.depth, args.lr, args.iterations)
+    ]
+    configs += [
+        {"model": "isolation_forest", "params": {"n_estimators": n, "contamination": c}}
+        for n, c in itertools.product(args.if_estimators, args.if_contamination)
+    ]
+    return configs
+
+
+def _latency_ms(predict, X: np.ndarray, repeats: int = 20) -> float:
+    predict(X)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+# Данные рабочего процесса: матрица открывается через memmap один раз в _init_worker,
+# задачам передаются только конфигурация и индексы фолда
+_X: np.ndarray = None
+_y: np.ndarray = None
+
+
+def _init_worker(base: Path, y: np.ndarray) -> None:
+    global _X, _y
+    _X = TrainData(base).matrix
+    _y = y
+
+
+def run_fold(config: dict, train_idx: np.ndarray, test_idx: np.ndarray) -> dict:
+    """Обучение и оценка одной конфигурации на одном фолде (в рабочем процессе)."""
+    from sklearn.metrics import roc_auc_score
+
+    X, y = _X, _y
+    params = config["params"]
+    X_train, X_test = X[train_idx], X[test_idx]
+    started = time.perf_counter()
+
+    if config["model"] == "catboost":
+        from catboost import CatBoostClassifier
+
+        model = CatBoostClassifier(
+            **params, loss_function="Logloss", random_seed=42, thread_count=1, verbose=False
+        )
+        model.fit(X_train, y[train_idx])
+        train_seconds = time.perf_counter() - started
+        predict = lambda data: model.predict_proba(data)[:, 1]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = Path(tmp_dir) / "model.cbm"
+            model.save_model(str(model_path))
+            size_bytes = model_path.stat().st_size
+    else:
+        from sklearn.ensemble import IsolationForest
+
+        model = IsolationForest(**params, random_state=42, n_jobs=1)
+        model.fit(X_train)
+        train_seconds = time.perf_counter() - started
+        predict = lambda data: -model.score_samples(data)  # выше — аномальнее
+        size_bytes = len(pickle.dumps(model))
+
+    scores = predict(X_test)
+    auc = roc_auc_score(y[test_idx], scores) if len(set(y[test_idx].tolist())) > 1 else float("nan")
+    batch = X_test[np.arange(1000) % len(X_test)]
+    return {
+        "auc": float(auc),
+        "train_seconds": train_seconds,
+        "size_bytes": size_bytes,
+        "latency_1_ms": _latency_ms(predict, X_test[:1]),
+        "latency_1k_ms": _latency_ms(predict, batch, repeats=5),
+    }
+
+
+def summarize(config: dict, folds: list[dict]) -> dict:
+    aucs = np.array([f["auc"] for f in folds])
+    return {
+        **config,
+        "auc_mean": float(np.nanmean(aucs)) if not np.isnan(aucs).all() else float("nan"),
+        "auc_std": float(np.nanstd(aucs)) if not np.isnan(aucs).all() else float("nan"),
+        "train_seconds": float(np.mean([f["train_seconds"] for f in folds])),
+        "size_kb": float(np.mean([f["size_bytes"] for f in folds])) / 1024,
+        "latency_1_ms": float(np.median([f["latency_1_ms"] for f in folds])),
+        "latency_1k_ms": float(np.median([f["latency_1k_ms"] for f in folds])),
+    }
+
+
+def mark_frontier(rows: list[dict]) -> None:
+    """Фронтир Парето: выше AUC при не большем времени обучения и задержке."""
+    for row in rows:
+        row["frontier"] = not np.isnan(row["auc_mean"]) and not any(
+            other is not row
+            and other["auc_mean"] >= row["auc_mean"]
+            and other["train_seconds"] <= row["train_seconds"]
+            and other["latency_1_ms"] <= row["latency_1_ms"]
+            and (
+                other["auc_mean"] > row["auc_mean"]
+                or other["train_seconds"] < row["train_seconds"]
+                or other["latency_1_ms"] < row["latency_1_ms"]
+            )
+            for other in rows
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=0, help="число процессов (0 — по числу ядер)")
+    parser.add_argument("--depth", type=int, nargs="*", default=[4, 6, 8])
+    parser.add_argument("--lr", type=float, nargs="*", default=[0.05, 0.1])
+    parser.add_argument("--iterations", type=int, nargs="*", default=[200, 500])
+    parser.add_argument("--if-estimators", type=int, nargs="*", default=[50, 100, 200])
+    parser.add_argument("--if-contamination", type=float, nargs="*", default=[0.15])
+    parser.add_argument("--raw", type=Path, default=RAW_DIR / "real_lots.json")
+    parser.add_argument("--json", type=Path, default=None, help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    from sklearn.model_selection import StratifiedKFold
+
+    if not TrainData.exists(TRAIN_DATA_PATH):
+        print(f"No training export at {TRAIN_DATA_PATH}.npy — building from {args.raw}")
+        build_train_data(args.raw)
+    X, y = load_dataset()
+    if len(set(y.tolist())) < 2:
+        raise SystemExit("Labels have a single class — nothing to cross-validate")
+
+    configs = grid(args)
+    splits = list(StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42).split(X, y))
+    workers = resolve_workers(args.workers)
+    print(
+        f"Samples: {len(X)} ({int(y.sum())} positive), configs: {len(configs)}, "
+        f"folds: {args.folds}, workers: {workers}"
+    )
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(TRAIN_DATA_PATH, y)) as pool:
+        futures = {
+            (i, k): pool.submit(run_fold, config, train_idx, test_idx)
+            for i, config in enumerate(configs)
+            for k, (train_idx, test_idx) in enumerate(splits)
+        }
+        rows = [
+            summarize(config, [futures[(i, k)].result() for k in range(len(splits))])
+            for i, config in enumerate(configs)
+        ]
+    mark_frontier(rows)
+    print(f"Done in {time.perf_counter() - started:.1f}s\n")
+
+    print(
+        f"  {'model':<17} {'params':<42} {'AUC':>13} {'train s':>8} "
+        f"{'size KB':>8} {'1 lot ms':>9} {'1k ms':>8}"
+    )
+    for row in sorted(rows, key=lambda r: -np.nan_to_num(r["auc_mean"], nan=-1)):
+        params = ", ".join(f"{k}={v}" for k, v in row["params"].items())
+        print(
+            f"{'*' if row['frontier'] else ' '} {row['model']:<17} {params:<42} "
+            f"{row['auc_mean']:>6.3f}±{row['auc_std']:<6.3f} {row['train_seconds']:>8.2f} "
+            f"{row['size_kb']:>8.1f} {row['latency_1_ms']:>9.3f} {row['latency_1k_ms']:>8.2f}"
+        )
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nSaved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк инференса CatBoost: нативный predict_proba vs numpy-вычисление деревьев.
+
+Запуск:
+    python scripts/bench_oblivious.py
+    python scripts/bench_oblivious.py --model data/models/risk_scorer.cbm --batches 1 100 10000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.config import MODELS_DIR
+from src.model.oblivious import ObliviousTrees
+from src.model.registry import ModelRegistry
+from src.preprocessing.feature_engineer import LotFeatures
+
+
+def default_model_path() -> Path:
+    """Активная версия реестра, иначе модель в MODELS_DIR."""
+    registry = ModelRegistry()
+    active = registry.active()
+    if active:
+        path = registry.path_for(active["version"]) / "risk_scorer.cbm"
+        if path.exists():
+            return path
+    return MODELS_DIR / "risk_scorer.cbm"
+
+
+def measure(fn, X: np.ndarray, repeats: int) -> float:
+    """Медианная задержка вызова в миллисекундах."""
+    fn(X)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=None)
+    parser.add_argument("--batches", type=int, nargs="*", default=[1, 100, 10_000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    from catboost import CatBoostClassifier
+
+    model_path = args.model or default_model_path()
+    if not model_path.exists():
+        raise SystemExit(f"Model not found: {model_path}")
+
+    model = CatBoostClassifier()
+    model.load_model(str(model_path))
+    trees = ObliviousTrees.from_catboost(model)
+
+    rng = np.random.default_rng(42)
+    n_features = len(LotFeatures.feature_names())
+    X_all = rng.normal(scale=3.0, size=(max(args.batches), n_features))
+
+    diff = np.abs(trees.predict_proba(X_all) - model.predict_proba(X_all)).max()
+    print(f"Model: {model_path} ({trees.n_trees} trees, depth {trees.depth})")
+    print(f"Max |proba diff|: {diff:.2e}")
+    print(f"{'batch':>8} {'native ms':>10} {'numpy ms':>10} {'speedup':>8}")
+
+    for batch in args.batches:
+        X = X_all[:batch]
+        repeats = max(3, args.repeats if batch <= 1000 else args.repeats // 10)
+        native = measure(model.predict_proba, X, repeats)
+        numpy_ms = measure(trees.predict_proba, X, repeats)
+        print(f"{batch:>8} {native:>10.3f} {numpy_ms:>10.3f} {native / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетического корпуса закупок для нагрузочных тестов (схема real_lots.json).
+
+Детерминирован: одинаковые --seed и параметры дают побайтно одинаковый файл.
+Лоты пишутся потоком (JSONL, одна строка на лот), память не зависит от размера корпуса.
+Распределения:
+- категории, заказчики и поставщики — степенной закон (Zipf): немногие дают большую часть лотов;
+- цена за единицу — логнормальная по категории, с редкими завышениями в разы;
+- даты — будни, пики в конце месяца и в декабре;
+- у части заказчиков «свой» поставщик, который выигрывает большинство их лотов (часто при 1 участнике);
+- упоминания брендов (с «или эквивалент» и без), дублированные и почти дублированные ТЗ,
+  серии лотов одного заказчика по одному КТРУ за несколько дней (дробление).
+Все лоты помечены is_synthetic=true.
+
+Запуск:
+    python scripts/generate_corpus.py --lots 100k
+    python scripts/generate_corpus.py --lots 10M --seed 7 --output data/raw/lots_10m.jsonl.gz
+    python scripts/generate_corpus.py --lots 10k --format json --output data/raw/real_lots.json
+    LOTS_FILE=data/raw/synthetic_lots.jsonl python main.py serve
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import sys
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.config import RAW_DIR
+
+# Категории: КТРУ, название, медиана цены за единицу (₸), разброс (sigma логнормали),
+# диапазон количества, бренды, характеристики. Порядок — по убыванию популярности.
+CATEGORIES = [
+    ("192021.300.000001", "Бензин", 250, 0.15, (1000, 60000), [],
+     ["марка АИ-92", "октановое число не ниже 92", "соответствие ГОСТ 32513-2013", "поставка талонами", "экологический класс К5"]),
+    ("101112.100.000000", "Продукты питания", 1800, 0.6, (50, 5000), [],
+     ["мясо говядина охлажденное", "молоко пастеризованное 3,2%", "хлеб пшеничный", "остаточный срок годности не менее 80%"]),
+    ("171912.500.000000", "Бумага офисная", 2600, 0.25, (50, 3000), ["Svetocopy", "Ballet"],
+     ["формат A4", "плотность 80 г/м²", "белизна не менее 146% CIE", "500 листов в пачке"]),
+    ("812912.000.000000", "Услуги по уборке", 450000, 0.5, (1, 12), [],
+     ["ежедневная влажная уборка", "площадь 1200 кв. м", "моющие средства поставщика", "график согласовывается с заказчиком"]),
+    ("262014.000.000003", "Ноутбуки", 420000, 0.35, (1, 40), ["Lenovo ThinkPad", "HP ProBook", "Dell Latitude", "Asus ZenBook"],
+     ["процессор Intel Core i5", "ОЗУ 16 ГБ", "SSD 512 ГБ", "диагональ 15,6 дюйма", "гарантия 36 месяцев"]),
+    ("262111.000.000001", "Принтеры", 180000, 0.45, (1, 20), ["HP LaserJet", "Canon imageRUNNER", "Xerox VersaLink", "Epson"],
+     ["лазерная печать", "формат A4", "скорость печати 30 стр/мин", "двусторонняя печать", "сетевой интерфейс Ethernet"]),
+    ("310112.000.000002", "Офисная мебель", 85000, 0.55, (1, 60), [],
+     ["ЛДСП 22 мм", "кромка ПВХ 2 мм", "цвет по согласованию", "сборка силами поставщика"]),
+    ("582912.000.000001", "Программное обеспечение", 95000, 0.7, (1, 300), ["Microsoft Office", "Kaspersky", "1C:Предприятие", "ESET NOD32"],
+     ["бессрочная лицензия", "техническая поддержка 12 месяцев", "русскоязычный интерфейс", "установка на рабочие места"]),
+    ("271032.000.000000", "Электрооборудование", 32000, 0.8, (1, 500), ["Siemens", "Schneider", "IEK"],
+     ["кабель ВВГнг 3x2,5", "автоматический выключатель 25 А", "степень защиты IP54", "сертификат соответствия"]),
+    ("235112.000.000000", "Строительные материалы", 45000, 0.7, (10, 2000), [],
+     ["цемент М500", "кирпич облицовочный", "доставка на объект", "сертификаты качества"]),
+    ("291021.000.000001", "Автомобили", 16500000, 0.4, (1, 3), ["Toyota Camry", "Hyundai Sonata", "Kia K5", "Toyota Land Cruiser", "Lexus LX"],
+     ["объем двигателя 2,5 л", "автоматическая коробка передач", "полный привод", "гарантия 3 года"]),
+    ("266012.000.000000", "Медицинское оборудование", 2400000, 0.9, (1, 10), ["Mindray", "Philips IntelliVue", "GE Healthcare", "Dräger"],
+     ["регистрационное удостоверение РК", "обучение персонала", "сервисное обслуживание 24 месяца", "монитор пациента 12 дюймов"]),
+    ("265181.000.000000", "Лабораторное оборудование", 1900000, 0.8, (1, 8), ["Mettler Toledo", "Shimadzu", "Agilent", "Thermo Fisher"],
+     ["точность 0,0001 г", "встроенная калибровка", "первичная поверка", "программное обеспечение на русском языке"]),
+    ("263023.000.000000", "Сетевое оборудование", 650000, 0.7, (1, 30), ["Cisco Catalyst", "Huawei", "Juniper", "MikroTik"],
+     ["24 порта 1 Гбит/с", "4 порта SFP+", "поддержка VLAN", "управляемый коммутатор уровня L3"]),
+    ("281930.000.000000", "Кондиционеры", 380000, 0.5, (1, 25), ["Daikin", "Mitsubishi Electric", "LG", "Samsung"],
+     ["инверторный компрессор", "мощность охлаждения 3,5 кВт", "режим обогрева", "монтаж включен в стоимость"]),
+    ("282922.000.000000", "Спецтехника", 58000000, 0.5, (1, 2), ["Caterpillar", "Komatsu", "JCB", "XCMG"],
+     ["экскаватор-погрузчик", "мощность двигателя не менее 100 л.с.", "ковш 1 куб. м", "обучение операторов"]),
+]
+
+CITIES = ["Астана", "Алматы", "Шымкент", "Караганда", "Актобе", "Тараз", "Павлодар", "Усть-Каменогорск",
+          "Семей", "Атырау", "Костанай", "Кызылорда", "Уральск", "Петропавловск", "Актау", "Туркестан"]
+CUSTOMER_TEMPLATES = ['КГУ "Школа-гимназия №{n}" акимата г. {city}', 'ГКП на ПХВ "Городская поликлиника №{n}" г. {city}',
+                      'ГУ "Отдел образования" района №{n} г. {city}', 'КГУ "Управление ЖКХ" №{n} г. {city}',
+                      'РГУ "Департамент госдоходов" №{n} по г. {city}', 'ГККП "Детский сад №{n}" г. {city}']
+SUPPLIER_TEMPLATES = ['ТОО "{name}Снаб-{n}"', 'ТОО "{name}Трейд {n}"', 'АО "{name}Сервис-{n}"', 'ИП "{name} {n}"']
+SUPPLIER_ROOTS = ["Альфа", "Бета", "Гамма", "Дельта", "Астана", "Степь", "Алатау", "Каспий", "Тенгри", "Номад", "Сарыарка", "Жетысу"]
+
+# Способы закупки и их доли
+TRADE_METHODS = [("Запрос ценовых предложений", 0.58), ("Открытый конкурс", 0.24),
+                 ("Электронный магазин", 0.12), ("Из одного источника", 0.06)]
+DEADLINES = [(3, 0.03), (5, 0.07), (7, 0.15), (10, 0.25), (15, 0.3), (20, 0.12), (30, 0.08)]
+EQUIV_CLAUSES = ["или эквивалент", "или аналог", "допускается предложение аналога"]
+NO_ANALOG_CLAUSES = ["Аналоги не допускаются.", "Только оригинальные комплектующие.", "Замена не допускается."]
+
+
+def parse_count(value: str) -> int:
+    """10k / 100k / 1M / 10M / 2500 -> число лотов."""
+    value = value.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value[:-1] if scale > 1 else value) * scale)
+
+
+class Zipf:
+    """Выбор ранга 0..n-1 с вероятностью ~ 1 / (rank + 1) ** s (одно число из rng и бинарный поиск)."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cum = list(accumulate(1.0 / (rank + 1) ** s for rank in range(n)))
+        self.total = self.cum[-1]
+
+    def draw(self) -> int:
+        return min(bisect_right(self.cum, self.rng.random() * self.total), len(self.cum) - 1)
+
+
+def weighted(rng: random.Random, pairs: list):
+    """Значение из [(значение, вес), ...]."""
+    x = rng.random() * sum(w for _, w in pairs)
+    for value, w in pairs:
+        x -= w
+        if x < 0:
+            return value
+    return pairs[-1][0]
+
+
+class CorpusGenerator:
+    """Потоковый генератор лотов; состояние — справочники, пулы ТЗ и текущая серия дробления."""
+
+    def __init__(self, seed: int, lots: int, start: datetime, days: int,
+                 duplicate_rate: float, brand_rate: float, split_rate: float):
+        self.rng = rng = random.Random(seed)
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.brand_rate = brand_rate
+        self.split_rate = split_rate
+        self.start = start
+
+        self.categories = Zipf(len(CATEGORIES), 0.7, rng)
+        self.customers = self._make_parties(max(50, lots // 25), CUSTOMER_TEMPLATES, "4")
+        self.suppliers = self._make_parties(max(30, lots // 40), SUPPLIER_TEMPLATES, "1")
+        self.customer_rank = Zipf(len(self.customers), 0.85, rng)
+        self.supplier_rank = Zipf(len(self.suppliers), 0.95, rng)
+        # «Свой» поставщик у ~8% заказчиков
+        self.captive = {
+            i: rng.randrange(len(self.suppliers)) for i in range(len(self.customers)) if rng.random() < 0.08
+        }
+
+        # Веса дней: будни, пики в последние 5 дней месяца и в декабре
+        weights = []
+        for d in range(days):
+            day = start + timedelta(days=d)
+            w = (1.0, 1.0, 1.0, 1.0, 0.9, 0.15, 0.05)[day.weekday()]
+            if (day + timedelta(days=5)).month != day.month:
+                w *= 1.6
+            if day.month == 12:
+                w *= 1.8
+            weights.append(w)
+        self.day_cum = list(accumulate(weights))
+
+        self.spec_pool: list[list[str]] = [[] for _ in CATEGORIES]  # недавние ТЗ по категории
+        self.burst = None  # [осталось, заказчик, категория, дата]
+        self.trd_buy = 0
+
+    def _make_parties(self, n: int, templates: list[str], kind: str) -> list[tuple[str, str, str]]:
+        rng, parties = self.rng, []
+        for i in range(n):
+            city = CITIES[min(int(rng.expovariate(0.35)), len(CITIES) - 1)]
+            name = templates[i % len(templates)].format(
+                n=i + 1, city=city, name=SUPPLIER_ROOTS[i % len(SUPPLIER_ROOTS)]
+            )
+            bin_ = f"{rng.randint(0, 25):02d}{rng.randint(1, 12):02d}{kind}{i % 10_000_000:07d}"
+            parties.append((bin_, name, city))
+        return parties
+
+    def _date(self) -> datetime:
+        x = self.rng.random() * self.day_cum[-1]
+        day = min(bisect_right(self.day_cum, x), len(self.day_cum) - 1)
+        return self.start + timedelta(days=day, hours=self.rng.randint(9, 17), minutes=self.rng.choice((0, 15, 30, 45)))
+
+    def _description(self, cat_index: int, quantity: int, city: str) -> str:
+        rng = self.rng
+        code, name, _, _, _, brands, specs = CATEGORIES[cat_index]
+        pool = self.spec_pool[cat_index]
+        if pool and rng.random() < self.duplicate_rate:
+            desc = rng.choice(pool)
+            if rng.random() < 0.4:
+                desc = f"{desc} Партия {rng.randint(1, 99)}."  # почти дубликат
+            return desc
+
+        parts = [name]
+        if brands and rng.random() < self.brand_rate:
+            brand = rng.choice(brands)
+            model = f"{rng.choice('ABCDEKMTX')}{rng.randint(100, 9999)}{rng.choice(('', 'i', 'X', 'Pro'))}"
+            parts.append(f"{brand} {model}")
+            roll = rng.random()
+            if roll < 0.45:
+                parts.append(rng.choice(EQUIV_CLAUSES))
+            elif roll < 0.7:
+                parts.append(rng.choice(NO_ANALOG_CLAUSES))
+        chosen = rng.sample(specs, rng.randint(2, len(specs)))
+        parts.append(", ".join(chosen))
+        if name == "Автомобили" and rng.random() < 0.2:
+            parts.append("комплектация премиум-класс, перфорированная кожа салона")
+        if rng.random() < 0.005:
+            parts.append("пoставка в тeчение 10 дней")  # латиница в кириллических словах
+        desc = " ".join(parts) + f"; количество {quantity} ед., доставка в г. {city}."
+
+        if len(pool) < 500:
+            pool.append(desc)
+        else:
+            pool[rng.randrange(500)] = desc
+        return desc
+
+    def lot(self, i: int) -> dict:
+        rng = self.rng
+        if self.burst is not None:
+            self.burst[0] -= 1
+            _, cust, cat_index, base_date = self.burst
+            if self.burst[0] <= 0:
+                self.burst = None
+            date = base_date + timedelta(days=rng.randint(0, 10), hours=rng.randint(0, 6))
+        else:
+            cust, cat_index, date = self.customer_rank.draw(), self.categories.draw(), self._date()
+            if rng.random() < self.split_rate:
+                self.burst = [rng.randint(1, 4), cust, cat_index, date]
+
+        code, name, median, sigma, (qty_lo, qty_hi), _, _ = CATEGORIES[cat_index]
+        unit_price = median * math.exp(rng.gauss(0.0, sigma))
+        if rng.random() < 0.02:
+            unit_price *= rng.uniform(3.0, 8.0)  # завышение цены
+        quantity = int(math.exp(rng.uniform(math.log(qty_lo), math.log(qty_hi + 1))))
+        budget = round(unit_price * quantity, -2) or 100.0
+        unit_price = round(budget / quantity, 2)
+
+        captive = self.captive.get(cust)
+        if captive is not None and rng.random() < 0.7:
+            winner = captive
+            participants = 1 if rng.random() < 0.6 else rng.randint(2, 3)
+        else:
+            winner = self.supplier_rank.draw()
+            participants = 1 if rng.random() < 0.1 else 2 + min(int(rng.expovariate(0.45)), 20)
+        discount = rng.uniform(0.0, 0.02) if participants == 1 else rng.uniform(0.02, 0.25)
+
+        if i == 0 or rng.random() < 0.75:
+            self.trd_buy += 1  # иначе лот входит в то же объявление, что и предыдущий
+        customer_bin, customer_name, city = self.customers[cust]
+        winner_bin, winner_name, _ = self.suppliers[winner]
+        return {
+            "lot_id": f"S{self.seed}-{i:08d}",
+            "trd_buy_id": f"ST{self.seed}-{self.trd_buy:08d}",
+            "name_ru": name,
+            "desc_ru": self._description(cat_index, quantity, city),
+            "extra_desc_ru": f"Срок поставки {rng.choice((10, 15, 20, 30, 45))} календарных дней. Гарантия {rng.choice((6, 12, 24, 36))} месяцев",
+            "category_code": code,
+            "category_name": name,
+            "budget": budget,
+            "unit_price": unit_price,
+            "quantity": quantity,
+            "participants_count": participants,
+            "deadline_days": weighted(rng, DEADLINES),
+            "trade_method": weighted(rng, TRADE_METHODS),
+            "customer_bin": customer_bin,
+            "customer_name": customer_name,
+            "city": city,
+            "winner_bin": winner_bin,
+            "winner_name": winner_name,
+            "contract_sum": round(budget * (1.0 - discount), 2),
+            "publish_date": date.strftime("%Y-%m-%d %H:%M:%S"),
+            "is_synthetic": True,
+        }
+
+
+def open_output(path: str):
+    if path == "-":
+        return sys.stdout
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=3)
+    return open(path, "w", encoding="utf-8", buffering=1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=parse_count, default=parse_count("10k"), help="число лотов: 10k, 100k, 1M, 10M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=str(RAW_DIR / "synthetic_lots.jsonl"), help="файл (.gz — сжатый) или - для stdout")
+    parser.add_argument("--format", choices=("jsonl", "json"), default="jsonl", help="json — массив, как real_lots.json")
+    parser.add_argument("--start-date", default="2025-01-01")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--duplicate-rate", type=float, default=0.06, help="доля лотов с повтором ТЗ")
+    parser.add_argument("--brand-rate", type=float, default=0.3, help="доля ТЗ с упоминанием бренда")
+    parser.add_argument("--split-rate", type=float, default=0.02, help="доля лотов, начинающих серию дробления")
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(
+        seed=args.seed,
+        lots=args.lots,
+        start=datetime.strptime(args.start_date, "%Y-%m-%d"),
+        days=args.days,
+        duplicate_rate=args.duplicate_rate,
+        brand_rate=args.brand_rate,
+        split_rate=args.split_rate,
+    )
+    started = time.perf_counter()
+    out = open_output(args.output)
+    as_array = args.format == "json"
+    try:
+        if as_array:
+            out.write("[\n")
+        for i in range(args.lots):
+            if as_array and i:
+                out.write(",\n")
+            out.write(json.dumps(generator.lot(i), ensure_ascii=False))
+            if not as_array:
+                out.write("\n")
+            if (i + 1) % 100_000 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  {i + 1:,} lots, {(i + 1) / elapsed:,.0f} lots/s", file=sys.stderr)
+        if as_array:
+            out.write("\n]\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {args.lots:,} lots -> {args.output} in {elapsed:.1f}s "
+        f"({args.lots / max(elapsed, 1e-9):,.0f} lots/s; {len(generator.customers):,} customers, "
+        f"{len(generator.suppliers):,} suppliers)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
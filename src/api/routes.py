@@ -3,38 +3,54 @@ GoszakupAI — FastAPI Backend
 REST API for the analysis platform.
 """
 
+import asyncio
 import logging
+import os
 import csv
 import io
 import hashlib
+import hmac
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 
-from src.model.analyzer import GoszakupAnalyzer
-from src.utils.config import CORS_ALLOWED_ORIGINS, LABELS_CSV
+from src.model.analyzer import GoszakupAnalyzer, AnalysisQueueFull, INIT_PHASES
+from src.model.final_score import normalize_thresholds, normalize_weights
+from src.utils.config import (
+    CORS_ALLOWED_ORIGINS,
+    LABELS_CSV,
+    BACKGROUND_TRAINING,
+    FEEDBACK_RETRAIN,
+    ON_DEMAND_TIMEOUT_SECONDS,
+    METRICS_ENABLED,
+    ADMIN_TOKEN,
+)
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 analyzer: Optional[GoszakupAnalyzer] = None
+_fonts_registered = False
 
 
 # Register fonts for PDF generation with Cyrillic support
 def register_fonts():
-    """Register DejaVu Sans fonts for PDF generation"""
+    """Register DejaVu Sans fonts for PDF generation (once, on first PDF export)"""
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    _fonts_registered = True
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
     try:
         font_base = (
             "/usr/local/lib/python3.11/site-packages/matplotlib/mpl-data/fonts/ttf"
@@ -52,13 +68,24 @@ def register_fonts():
 async def lifespan(app: FastAPI):
     global analyzer
     logger.info("[API] Starting GoszakupAI...")
-    register_fonts()  # Register fonts for PDF
-    analyzer = GoszakupAnalyzer(use_transformers=False)
-    analyzer.initialize()
+    if analyzer is None:
+        analyzer = GoszakupAnalyzer(use_transformers=False)
+        # Indexes and models are built in background; endpoints respond once their phases are ready
+        analyzer.start_initialization(background_training=BACKGROUND_TRAINING)
+        logger.info("[API] Accepting requests, analyzer is initializing in background")
+    else:
+        # State was built before fork (src/api/server.py): catch up with writes made since then
+        analyzer.sync_from_store(results=True)
+        analyzer.start_store_sync()
+        logger.info(f"[API] Worker {os.getpid()} ready ({'reader' if analyzer.read_only else 'owner'})")
+    # In a reader process the scheduler only runs on-demand requests
     analyzer.start_background_analysis(batch_size=50, sleep_seconds=0.05)
-    logger.info("[API] Analyzer ready")
+    if not analyzer.read_only:
+        analyzer.start_background_explanations()
+        if FEEDBACK_RETRAIN:
+            analyzer.start_feedback_retraining()
     yield
-    if analyzer:
+    if analyzer and not analyzer.read_only:
         analyzer.save_analysis_cache()
     logger.info("[API] Shutting down")
 
@@ -108,10 +135,18 @@ class FeedbackRequest(BaseModel):
     comment: str | None = None
 
 
+class ScoreConfigRequest(BaseModel):
+    weights: dict[str, float] | None = None
+    thresholds: dict[str, tuple[float, float]] | None = None
+
+
 class HealthResponse(BaseModel):
     status: str
     total_lots: int
     analyzer_ready: bool
+    phases: dict[str, dict] = {}
+    analysis: dict[str, int] = {}
+    worker: dict = {}
 
 
 @app.get("/health")
@@ -126,9 +161,144 @@ async def health():
         status="ok",
         total_lots=len(analyzer._lots) if analyzer else 0,
         analyzer_ready=analyzer is not None and analyzer._initialized,
+        phases=analyzer.get_phase_status() if analyzer else {},
+        analysis=analyzer.get_analysis_progress() if analyzer else {},
+        worker={"pid": os.getpid(), "role": "reader" if analyzer.read_only else "owner"} if analyzer else {},
     )
 
 
+@app.get("/api/model/status")
+async def model_status():
+    """Состояние фонового обучения и активная версия модели."""
+    if not analyzer:
+        raise HTTPException(503, "Analyzer not initialized")
+    return analyzer.get_training_status()
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage analysis timings, backlog size and throughput in Prometheus text format."""
+    if not METRICS_ENABLED:
+        raise HTTPException(404, "Metrics are disabled (METRICS_ENABLED=0)")
+    gauges = analyzer.get_metrics_gauges() if analyzer else {}
+    return PlainTextResponse(
+        metrics.render_prometheus(gauges), media_type="text/plain; version=0.0.4"
+    )
+
+
+def require_phases(*phases: str) -> None:
+    """Responds 503 until the analyzer has finished the given initialization phases."""
+    if not analyzer:
+        raise HTTPException(503, "Analyzer not ready")
+    missing = analyzer.missing_phases(phases)
+    if missing:
+        raise HTTPException(
+            503,
+            f"Analyzer is initializing, waiting for: {', '.join(missing)}",
+            headers={"Retry-After": "5"},
+        )
+
+
+async def run_on_demand(fn, *args):
+    """Runs analysis work in the analyzer's scheduler thread via the bounded priority queue."""
+    try:
+        future = analyzer.submit_priority(fn, *args)
+    except AnalysisQueueFull:
+        raise HTTPException(503, "Analysis queue is full, retry later")
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), ON_DEMAND_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        future.cancel()
+        raise HTTPException(504, "Lot analysis timed out")
+
+
+async def get_lot_analysis(lot_id: str):
+    """Cached analysis when it is up to date, otherwise live analysis via the priority queue."""
+    cached = analyzer.get_cached_analysis(lot_id)
+    if cached is not None:
+        return cached
+    # The lot a user is looking at also jumps ahead in background analysis
+    analyzer.prioritize([lot_id])
+    return await run_on_demand(analyzer.analyze_lot, lot_id)
+
+
+def require_admin(token: Optional[str]) -> None:
+    """Checks X-Admin-Token; the admin API is disabled unless ADMIN_TOKEN is configured."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(404, "Admin API is disabled (ADMIN_TOKEN is not set)")
+    if not (token and hmac.compare_digest(token, ADMIN_TOKEN)):
+        raise HTTPException(403, "Invalid admin token")
+
+
+# Last PUT /api/admin/scoring accepted by this process; the apply may outlive the request
+score_apply_status: dict = {"state": "idle"}
+
+
+@app.get("/api/admin/scoring")
+async def get_scoring_config(x_admin_token: Optional[str] = Header(None)):
+    """Active final-score component weights and risk level thresholds.
+
+    "apply" is the state of the last PUT handled by this process (idle / running / done / failed).
+    """
+    require_admin(x_admin_token)
+    require_phases("lots")
+    return {**analyzer.get_score_config(), "apply": dict(score_apply_status)}
+
+
+@app.post("/api/admin/scoring/preview")
+async def preview_scoring_config(request: ScoreConfigRequest, x_admin_token: Optional[str] = Header(None)):
+    """What-if: level distribution and largest score changes under other weights/thresholds.
+
+    Stored results are not modified.
+    """
+    require_admin(x_admin_token)
+    require_phases("lots")
+    try:
+        return analyzer.preview_score_config(request.weights, request.thresholds)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+@app.put("/api/admin/scoring")
+async def apply_scoring_config(request: ScoreConfigRequest, x_admin_token: Optional[str] = Header(None)):
+    """Applies new weights/thresholds to all results without re-running the pipeline.
+
+    The config is validated up front (400 on bad values). The apply runs in the scheduler thread
+    and is never cancelled: 200 with the result if it finishes within ON_DEMAND_TIMEOUT_SECONDS,
+    otherwise 202 — poll GET /api/admin/scoring until "apply" is done and the weights match.
+    """
+    global score_apply_status
+    require_admin(x_admin_token)
+    require_phases("lots")
+    try:
+        weights = normalize_weights(request.weights, analyzer.score_weights)
+        thresholds = normalize_thresholds(request.thresholds, analyzer.risk_thresholds)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    try:
+        future = analyzer.submit_priority(analyzer.apply_score_config, weights, thresholds)
+    except AnalysisQueueFull:
+        raise HTTPException(503, "Analysis queue is full, retry later")
+
+    requested = {"weights": weights, "thresholds": {level: list(b) for level, b in thresholds.items()}}
+    status = {"state": "running", "requested": requested, "started_at": time.time(), "finished_at": None}
+    score_apply_status = status
+
+    def _finished(done) -> None:
+        status["finished_at"] = time.time()
+        if done.exception() is not None:
+            status.update(state="failed", error=str(done.exception()))
+        else:
+            status.update(state="done", changed=done.result()["changed"])
+
+    future.add_done_callback(_finished)
+    try:
+        # shield: on timeout stop waiting, but keep the apply running
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), ON_DEMAND_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=202, content={"status": "accepted", "apply": dict(status)})
+
+
 def get_effective_unit_price(lot_data: dict) -> float:
     """Calculate effective unit price from lot data with fallback logic."""
     unit_price = lot_data.get("unit_price", 0) or 0
@@ -156,10 +326,8 @@ async def list_lots(
     sort_by: str = Query("risk_score"),
     sort_desc: bool = Query(True),
 ):
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
-    analyzer.analyze_incremental(max_new=50)
     results = analyzer.get_cached_results()
 
     if risk_level:
@@ -253,10 +421,9 @@ async def list_lots(
 
 @app.get("/api/lots/{lot_id}/analysis")
 async def analyze_lot(lot_id: str):
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases(*INIT_PHASES)
 
-    result = analyzer.analyze_lot(lot_id)
+    result = await get_lot_analysis(lot_id)
     if not result.lot_data:
         raise HTTPException(404, f"Lot {lot_id} not found")
 
@@ -272,8 +439,7 @@ class CompareLotsRequest(BaseModel):
 @app.post("/api/lots/compare")
 async def compare_lots(request: CompareLotsRequest):
     """Compare multiple lots side by side."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases(*INIT_PHASES)
 
     lot_ids = request.lot_ids
     if not lot_ids or len(lot_ids) < 2:
@@ -282,14 +448,18 @@ async def compare_lots(request: CompareLotsRequest):
     if len(lot_ids) > 10:
         raise HTTPException(400, "Maximum 10 lots can be compared")
 
+    results = await asyncio.gather(
+        *(get_lot_analysis(lot_id) for lot_id in lot_ids),
+        return_exceptions=True,
+    )
     lots_data = []
-    for lot_id in lot_ids:
-        try:
-            result = analyzer.analyze_lot(lot_id)
-            if result.lot_data:
-                lots_data.append(result.to_dict())
-        except:
-            pass  # Skip missing lots
+    for result in results:
+        if isinstance(result, HTTPException) and result.status_code in (503, 504):
+            raise result
+        if isinstance(result, Exception):
+            continue  # Skip missing lots
+        if result.lot_data:
+            lots_data.append(result.to_dict())
 
     if not lots_data:
         raise HTTPException(404, "No lots found for comparison")
@@ -314,13 +484,21 @@ async def compare_lots(request: CompareLotsRequest):
 @app.get("/api/lots/{lot_id}/export/pdf")
 async def export_lot_pdf(lot_id: str):
     """Экспорт анализа лота в PDF формате."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases(*INIT_PHASES)
 
-    result = analyzer.analyze_lot(lot_id)
+    result = await get_lot_analysis(lot_id)
     if not result.lot_data:
         raise HTTPException(404, f"Lot {lot_id} not found")
 
+    # PDF stack is imported on first export to keep API startup fast
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+    register_fonts()
+
     # Create PDF in memory
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(
@@ -485,8 +663,7 @@ async def export_lot_pdf(lot_id: str):
 
 @app.post("/api/analyze")
 async def analyze_text(request: AnalyzeTextRequest):
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases(*INIT_PHASES)
 
     if not request.text.strip():
         raise HTTPException(400, "Text cannot be empty")
@@ -498,14 +675,13 @@ async def analyze_text(request: AnalyzeTextRequest):
         "category_code": request.category_code,
     }
 
-    result = analyzer.analyze_text(request.text, metadata=metadata)
+    result = await run_on_demand(analyzer.analyze_text, request.text, metadata)
     return result.to_dict()
 
 
 @app.post("/api/feedback")
 async def submit_feedback(request: FeedbackRequest):
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
     if request.label not in (0, 1):
         raise HTTPException(400, "label must be 0 or 1")
@@ -513,7 +689,7 @@ async def submit_feedback(request: FeedbackRequest):
     labels_path = Path(LABELS_CSV)
     labels_path.parent.mkdir(parents=True, exist_ok=True)
 
-    is_new = not labels_path.exists()
+    is_new = not labels_path.exists() or labels_path.stat().st_size == 0
     with open(labels_path, "a", encoding="utf-8", newline="") as f:
         writer = csv.writer(f)
         if is_new:
@@ -532,34 +708,8 @@ async def submit_feedback(request: FeedbackRequest):
 
 @app.get("/api/stats/dashboard")
 async def dashboard_stats():
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
-    analyzer.analyze_incremental(max_new=50)
-    stats = analyzer.get_dashboard_stats()
-
-    # Add synthetic vs real data statistics
-    results = analyzer.get_cached_results()
-    synthetic_count = sum(1 for r in results if r.lot_data.get("is_synthetic", False))
-    real_count = len(results) - synthetic_count
-
-    # Risk distribution by type
-    synthetic_risk_dist = {"LOW": 0, "MEDIUM": 0, "HIGH": 0, "CRITICAL": 0}
-    real_risk_dist = {"LOW": 0, "MEDIUM": 0, "HIGH": 0, "CRITICAL": 0}
-
-    for r in results:
-        if r.lot_data.get("is_synthetic", False):
-            synthetic_risk_dist[r.final_level] += 1
-        else:
-            real_risk_dist[r.final_level] += 1
-
-    stats["data_type_stats"] = {
-        "total_synthetic": synthetic_count,
-        "total_real": real_count,
-        "synthetic_risk_dist": synthetic_risk_dist,
-        "real_risk_dist": real_risk_dist,
-    }
-
-    return stats
+    require_phases("lots")
+    return analyzer.get_dashboard_stats()
 
 
 @app.get("/api/export/csv")
@@ -571,10 +721,8 @@ async def export_csv(
     max_budget: Optional[float] = None,
 ):
     """Экспорт данных лотов в CSV формате с фильтрами."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
-    analyzer.analyze_incremental(max_new=50)
     results = analyzer.get_cached_results()
 
     # Apply filters
@@ -670,8 +818,7 @@ async def network_graph(
     max_nodes: int = Query(100, ge=10, le=500),
 ):
     """Получить данные графа связей заказчик-поставщик."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
     results = analyzer.get_cached_results()
 
@@ -786,8 +933,7 @@ async def network_graph(
 
 @app.get("/api/network/{bin_id}")
 async def network_analysis(bin_id: str):
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("graph")
     result = analyzer.network.analyze_bin(bin_id)
     return result.to_dict()
 
@@ -798,10 +944,8 @@ async def timeline_stats(
     limit: int = Query(12, ge=1, le=100),
 ):
     """Временная динамика рисков по периодам."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
-    analyzer.analyze_incremental(max_new=50)
     results = analyzer.get_cached_results()
 
     from collections import defaultdict
@@ -874,10 +1018,8 @@ async def category_pricing_stats(
     min_count: int = Query(1, ge=1),
 ):
     """Возвращает статистику цен по всем категориям."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
-    analyzer.analyze_incremental(max_new=50)
     results = analyzer.get_cached_results()
 
     # Collect data per category
@@ -948,8 +1090,7 @@ async def category_pricing_stats(
 @app.get("/api/categories/{category_code}/pricing")
 async def category_pricing_detail(category_code: str):
     """Возвращает детальную статистику цен для конкретной категории."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("features")
 
     price_stats = analyzer.feature_engineer.get_category_price_stats(category_code)
     if not price_stats:
@@ -1012,8 +1153,7 @@ async def list_customers(
     sort_desc: bool = Query(True),
 ):
     """Get list of customers with their statistics."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
     results = analyzer.get_cached_results()
 
@@ -1102,8 +1242,7 @@ async def list_customers(
 @app.get("/api/customers/{customer_bin}")
 async def get_customer(customer_bin: str):
     """Get detailed information about a specific customer."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
     results = analyzer.get_cached_results()
     customer_lots = [
@@ -1185,8 +1324,7 @@ async def list_categories(
     sort_desc: bool = Query(True),
 ):
     """Get list of all categories with statistics."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
     results = analyzer.get_cached_results()
 
@@ -1272,8 +1410,7 @@ async def list_categories(
 @app.get("/api/categories/{category_code}")
 async def get_category_detail(category_code: str):
     """Get detailed information about a specific category."""
-    if not analyzer:
-        raise HTTPException(503, "Analyzer not ready")
+    require_phases("lots")
 
     results = analyzer.get_cached_results()
     category_lots = [
@@ -0,0 +1,125 @@
+"""Запуск API в нескольких процессах с общим состоянием анализатора.
+
+Лоты, признаки, индекс похожих лотов, граф, модели и результаты строятся один раз в родительском
+процессе, после чего процессы API создаются через fork и делят эти страницы памяти (copy-on-write).
+Процесс 0 — владелец: фоновый анализ, объяснения, дообучение и запись в хранилище результатов.
+Остальные — читатели: отвечают на запросы и догоняют результаты владельца через хранилище (SQLite WAL).
+Упавший процесс перезапускается с той же ролью.
+
+Запуск:
+    API_WORKERS=4 python main.py serve
+    python -m src.api.server --workers 4 --port 8008
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from src.utils.config import API_HOST, API_PORT, API_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    """Общий слушающий сокет: соединения между процессами распределяет ядро."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(index: int, sock: socket.socket, host: str, port: int) -> None:
+    from src.api import routes
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    routes.analyzer.read_only = index > 0
+    # CatBoost после fork: только numpy-деревья, объяснения (ShapValues) — в процессе через spawn
+    routes.analyzer.disable_native_catboost()
+    config = uvicorn.Config(routes.app, host=host, port=port, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(workers: int = API_WORKERS, host: str = API_HOST, port: int = API_PORT) -> None:
+    """Запускает API; при workers > 1 — с общим состоянием (нужен os.fork, т.е. Linux/macOS)."""
+    if workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.run("src.api.routes:app", host=host, port=port)
+        return
+
+    from src.api import routes
+    from src.model.analyzer import GoszakupAnalyzer
+
+    logger.info(f"[Server] Building shared analyzer state for {workers} workers...")
+    analyzer = GoszakupAnalyzer(use_transformers=False)
+    analyzer.train_in_process = False  # обучение — в процессе через spawn: родитель не запускает CatBoost
+    analyzer.initialize(background_training=False)  # до fork в процессе не должно быть потоков
+    analyzer.prepare_fork()
+    routes.analyzer = analyzer
+    sock = _bind(host, port)
+
+    children: dict[int, int] = {}  # pid -> номер процесса
+
+    def _spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(index, sock, host, port)
+            except BaseException:
+                logger.exception(f"[Server] Worker {index} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+        logger.info(f"[Server] Worker {index} started (pid {pid}, {'owner' if index == 0 else 'reader'})")
+
+    for index in range(workers):
+        _spawn(index)
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning(f"[Server] Worker {index} (pid {pid}) exited with status {status} — restarting")
+        time.sleep(1.0)
+        _spawn(index)
+    sock.close()
+    logger.info("[Server] Stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    serve(args.workers, args.host, args.port)
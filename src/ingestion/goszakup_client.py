@@ -1,26 +1,37 @@
 """Клиент API goszakup.gov.kz (REST + GraphQL) с режимом мок-данных."""
+import gzip
+import importlib.util
 import json
 import time
 import logging
 from pathlib import Path
 from typing import Any
 
-try:
-    import httpx
-    HAS_HTTPX = True
-except ImportError:
-    HAS_HTTPX = False
+# httpx нужен только для удаленного API; импортируется при создании клиента
+HAS_HTTPX = importlib.util.find_spec("httpx") is not None
 
+from src.ingestion.lot_store import LotStore
 from src.utils.config import (
     GOSZAKUP_TOKEN,
     GOSZAKUP_BASE_URL,
     GOSZAKUP_GRAPHQL_URL,
+    LOTS_FILE,
     RAW_DIR,
 )
 
 logger = logging.getLogger(__name__)
 
 
+def read_lots_file(path: Path) -> list[dict]:
+    """Читает лоты из JSON-массива или JSONL (по лоту в строке); .gz распаковывается на лету."""
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if ".jsonl" in path.suffixes:
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
 class GoszakupClient:
     """Клиент для API goszakup.gov.kz (v3)."""
 
@@ -31,11 +42,13 @@ class GoszakupClient:
         # В этом проекте источник данных — готовый файл lot_details.json (или real_lots.json после конвертации).
         # Даже без токена работаем только с локальными данными, без моков/генерации.
         self.use_local_data = True
-        self._local_data = self._load_local_data()
+        self.lot_store = LotStore(self._load_local_data())
 
         # Поддерживаем реальный API только если явно задан токен и установлен httpx
         self.use_remote_api = bool(self.token) and HAS_HTTPX
         if self.use_remote_api:
+            import httpx
+
             self._client = httpx.Client(
                 base_url=self.base_url,
                 headers={
@@ -56,11 +69,11 @@ class GoszakupClient:
         lot_details_path = RAW_DIR / "lot_details.json"
         real_path = RAW_DIR / "real_lots.json"  # результат конвертера из lot_details.jsonl
 
-        for path in (lot_details_path, real_path):
+        paths = (Path(LOTS_FILE),) if LOTS_FILE else (lot_details_path, real_path)
+        for path in paths:
             if path.exists():
                 try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
+                    data = read_lots_file(path)
                     logger.info(f"[GoszakupClient] ✅ Loaded {len(data)} lots from {path}")
                     return data
                 except json.JSONDecodeError as e:
@@ -95,7 +108,7 @@ class GoszakupClient:
         """Возвращает список лотов закупок."""
         if self.use_local_data:
             start = page * size
-            return self._local_data[start:start + size]
+            return self.lot_store.lots[start:start + size]
         try:
             data = self._get("/v3/lots", {"limit": size, "offset": page * size})
             return data.get("items", data.get("data", []))
@@ -106,27 +119,25 @@ class GoszakupClient:
     def get_lot_by_id(self, lot_id: str) -> dict | None:
         """Возвращает лот по идентификатору."""
         if self.use_local_data:
-            for lot in self._local_data:
-                if str(lot.get("lot_id")) == str(lot_id):
-                    return lot
-            return None
+            return self.lot_store.get(lot_id)
 
         return self._get(f"/v3/lots/{lot_id}")
 
     def get_trd_buy(self, trd_buy_id: str) -> dict:
         """Возвращает объявление о закупке."""
         if self.use_local_data:
-            for lot in self._local_data:
-                if lot.get("trd_buy_id") == trd_buy_id:
-                    return lot
-            return {}
+            return self.lot_store.get_by_trd_buy_id(trd_buy_id) or {}
         return self._get(f"/v3/trd-buy/{trd_buy_id}")
 
     def get_contracts(self, lot_id: str | None = None, page: int = 0, size: int = 20) -> list[dict]:
         """Возвращает контракты, при необходимости по лоту."""
         if self.use_local_data:
             contracts = []
-            for lot in self._local_data:
+            lots = self.lot_store.lots
+            if lot_id:
+                lot = self.lot_store.get(lot_id)
+                lots = [lot] if lot else []
+            for lot in lots:
                 contracts.append({
                     "contract_id": f"CNT-{lot['lot_id']}",
                     "lot_id": lot["lot_id"],
@@ -135,8 +146,6 @@ class GoszakupClient:
                     "contract_sum": lot["contract_sum"],
                     "sign_date": lot["publish_date"],
                 })
-            if lot_id:
-                contracts = [c for c in contracts if c["lot_id"] == lot_id]
             return contracts[page * size:(page + 1) * size]
 
         params = {"limit": size, "offset": page * size}
@@ -166,7 +175,7 @@ class GoszakupClient:
         """Выполняет GraphQL-запрос."""
         if self.use_local_data:
             logger.info("[GraphQL] Local mode — returning preloaded data")
-            return {"data": {"lots": self._local_data[:20]}}
+            return {"data": {"lots": self.lot_store.lots[:20]}}
 
         resp = self._client.post(
             "/v3/graphql",
@@ -215,7 +224,7 @@ class GoszakupClient:
     def get_total_lots(self) -> int:
         """Возвращает количество лотов."""
         if self.use_local_data:
-            return len(self._local_data)
+            return len(self.lot_store)
         return 0
 
     def close(self):
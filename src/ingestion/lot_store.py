@@ -0,0 +1,51 @@
+"""Единое хранилище лотов с индексами по lot_id и trd_buy_id."""
+import logging
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LotStore:
+    """Канонический список лотов, общий для клиента, анализатора и кэша результатов.
+
+    Словари лотов не копируются: все компоненты держат ссылки на одни и те же объекты.
+    При повторяющемся lot_id / trd_buy_id поиск возвращает первый лот, как линейный проход.
+    """
+
+    def __init__(self, lots: Optional[list[dict]] = None):
+        self.lots: list[dict] = lots if lots is not None else []
+        self._by_lot_id: dict[str, int] = {}
+        self._by_trd_buy_id: dict[str, int] = {}
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        by_lot_id: dict[str, int] = {}
+        by_trd_buy_id: dict[str, int] = {}
+        for i, lot in enumerate(self.lots):
+            by_lot_id.setdefault(str(lot.get("lot_id")), i)
+            trd_buy_id = lot.get("trd_buy_id")
+            if trd_buy_id is not None:
+                by_trd_buy_id.setdefault(str(trd_buy_id), i)
+        self._by_lot_id = by_lot_id
+        self._by_trd_buy_id = by_trd_buy_id
+
+    def get(self, lot_id) -> Optional[dict]:
+        i = self._by_lot_id.get(str(lot_id))
+        return self.lots[i] if i is not None else None
+
+    def get_by_trd_buy_id(self, trd_buy_id) -> Optional[dict]:
+        i = self._by_trd_buy_id.get(str(trd_buy_id))
+        return self.lots[i] if i is not None else None
+
+    def index_of(self, lot_id) -> Optional[int]:
+        """Позиция лота в self.lots."""
+        return self._by_lot_id.get(str(lot_id))
+
+    def __contains__(self, lot_id) -> bool:
+        return str(lot_id) in self._by_lot_id
+
+    def __len__(self) -> int:
+        return len(self.lots)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.lots)
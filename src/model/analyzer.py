@@ -1,31 +1,115 @@
 """Основной анализатор GoszakupAI."""
+import hashlib
 import logging
 import json
+import multiprocessing
+import pickle
+import queue
+import struct
 import threading
 import time
-import json
 import csv
+import gc
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass, field, asdict
-from typing import Optional
+from dataclasses import dataclass, field, asdict, replace
+from typing import Callable, Iterable, Optional
+
+import numpy as np
 
 from src.ingestion.goszakup_client import GoszakupClient
+from src.ingestion.lot_store import LotStore
 from src.preprocessing.feature_engineer import FeatureEngineer, LotFeatures
+from src.preprocessing.text_cleaner import clean_text
+from src.preprocessing.ner_extractor import NERResult
 from src.model.rules import RuleEngine, AnalysisResult, RuleMatch
-from src.model.vectorizer import Vectorizer, VectorizerResult
-from src.model.scorer import RiskScorer
+from src.model.vectorizer import Vectorizer, VectorizerResult, SimilarLot
+from src.model.scorer import RiskScorer, fit_and_register, continue_and_register
+from src.model.registry import ModelRegistry, compute_fingerprint
+from src.model.train_data import TrainDataWriter
+from src.model.result_store import ResultStore
+from src.model.final_score import (
+    COMPONENTS,
+    combine_score,
+    combine_scores,
+    normalize_thresholds,
+    normalize_weights,
+    risk_levels,
+)
+from src.model.lot_queue import LotQueue, PRIORITY_REQUESTED, PRIORITY_NEW, PRIORITY_DEFAULT
+from src.model.dashboard import DashboardAggregates, TOP_RISKS
 from src.model.network import NetworkAnalyzer, NetworkAnalysisResult
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
 from src.utils.config import (
     get_risk_level,
     FORCE_TRAIN,
     EXPORT_TRAIN_DATA,
+    FEEDBACK_POLL_SECONDS,
+    FEEDBACK_RETRAIN_MIN_LABELS,
     LABELS_CSV,
     PROCESSED_DIR,
     RAW_DIR,
+    TRAIN_DATA_PATH,
+    ANALYSIS_WORKERS,
+    ANALYSIS_SHARD_SIZE,
+    ANALYSIS_PARALLEL_MIN_LOTS,
+    PRIORITY_QUEUE_SIZE,
+    RESULTS_DB_PATH,
+    ANALYSIS_PIPELINE_VERSION,
+    SNAPSHOT_PATH,
+    WARM_START_SNAPSHOT,
+    TEXT_ANALYSIS_CACHE_SIZE,
+    TEXT_ANALYSIS_CACHE_TTL_SECONDS,
+    WORKER_SYNC_SECONDS,
+    resolve_workers,
 )
 
 logger = logging.getLogger(__name__)
 
+# Поля лота, от которых зависит результат анализа (признаки, правила, семантика, сеть)
+ANALYSIS_FIELDS = (
+    "lot_id", "trd_buy_id", "name_ru", "desc_ru", "extra_desc_ru",
+    "budget", "contract_sum", "unit_price", "quantity",
+    "participants_count", "deadline_days", "publish_date", "trade_method",
+    "category_code", "category_name", "customer_bin", "customer_name", "winner_bin",
+)
+
+
+# Заголовок файла снимка: сигнатура и версия формата (uint32 LE)
+_SNAPSHOT_MAGIC = b"GZAISNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+# Состояние лота в фоновом анализе (GoszakupAnalyzer._lot_state)
+LOT_QUEUED = 0  # ждет анализа в очереди
+LOT_STORED = 1  # актуальный результат в хранилище, еще не подгружен
+LOT_ANALYZED = 2  # результат в кэше
+_LOT_STATE_NAMES = {LOT_QUEUED: "queued", LOT_STORED: "stored", LOT_ANALYZED: "analyzed"}
+
+# Размер куска снимка результатов для API: публикация пересобирает только измененные куски
+_SNAPSHOT_CHUNK_SIZE = 4096
+
+# Этапы initialize() в порядке выполнения; обработчики API объявляют, какие из них им нужны
+INIT_PHASES = ("lots", "features", "similarity", "graph", "models")
+
+
+def lot_content_hash(lot: dict) -> str:
+    """Хэш анализируемых полей лота: изменился хэш — результат анализа устарел."""
+    values = [lot.get(name) for name in ANALYSIS_FIELDS]
+    payload = json.dumps(values, ensure_ascii=True, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AnalysisQueueFull(Exception):
+    """Приоритетная очередь анализа переполнена."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        super().__init__(f"Priority analysis queue is full ({maxsize})")
+
 
 @dataclass
 class FullAnalysis:
@@ -47,6 +131,11 @@ class FullAnalysis:
     final_level: str = "LOW"
     explanation: list[str] = field(default_factory=list)
 
+    model_version: Optional[str] = None  # версия модели, посчитавшей ml_prediction
+    ml_contributions: dict = field(default_factory=dict)  # вклады признаков (SHAP), считаются в фоне
+    content_hash: Optional[str] = None  # lot_content_hash входных данных
+    component_scores: Optional[tuple] = None  # баллы компонент в порядке final_score.COMPONENTS
+
     def to_dict(self) -> dict:
         """Преобразует результат анализа в словарь."""
         ml_pred = {}
@@ -75,6 +164,12 @@ class FullAnalysis:
                 self.network_result.flags if self.network_result else []
             ),
             "explanation": self.explanation,
+            "model_version": self.model_version,
+            "ml_contributions": self.ml_contributions,
+            "component_scores": (
+                {name: float(v) for name, v in zip(COMPONENTS, self.component_scores)}
+                if self.component_scores else {}
+            ),
         }
 
 
@@ -87,166 +182,624 @@ class GoszakupAnalyzer:
         self.rule_engine = RuleEngine()
         self.vectorizer = Vectorizer(use_transformers=use_transformers)
         self.scorer = RiskScorer()
+        self.registry = ModelRegistry()
+        # False — обучать в отдельном процессе (spawn) и ждать его: процесс, который затем делает fork
+        # (src/api/server.py), сам CatBoost не обучает
+        self.train_in_process = True
+        self.native_catboost = True  # см. disable_native_catboost
         self.network = NetworkAnalyzer()
 
-        self._lots: list[dict] = []
+        self.lot_store = LotStore()
+        self._lots: list[dict] = self.lot_store.lots  # тот же список, что в lot_store
         self._features_cache: dict[str, LotFeatures] = {}
         self._analysis_cache: list[FullAnalysis] = []
-        self._analysis_progress = 0
+        self._results_by_id: dict[str, FullAnalysis] = {}  # lot_id -> результат из _analysis_cache
+        self._cache_pos: dict[str, int] = {}  # lot_id -> позиция в _analysis_cache
+        self._ml_stale: set[int] = set()  # позиции _analysis_cache с ML-оценкой не от активной модели
+        self._unexplained: set[int] = set()  # позиции _analysis_cache без объяснений активной модели
+        self._dashboard = DashboardAggregates()  # агрегаты по _analysis_cache для get_dashboard_stats
+        self._queue = LotQueue()  # индексы self._lots, ожидающие анализа, по приоритету
+        self._to_restore: deque[int] = deque()  # индексы лотов с результатом в хранилище (читаются лениво)
+        self._lot_state = bytearray()  # LOT_* для каждого лота self._lots
+        self._category_budget: dict[str, float] = {}  # суммарный бюджет категории — для приоритета
+        # Компоненты итогового балла по лотам (строка — индекс self._lots, NaN — результата нет)
+        self._components = np.empty((0, len(COMPONENTS)))
+        self.score_weights = normalize_weights(None)
+        self.risk_thresholds = normalize_thresholds(None)
+        self._lot_hashes: list[str] = []  # lot_content_hash для self._lots
         self._analysis_lock = threading.Lock()
+        self._persist_lock = threading.Lock()  # порядок записи в хранилище совпадает с порядком замен в кэше
         self._analysis_thread: Optional[threading.Thread] = None
-        self._analysis_cache_path = PROCESSED_DIR / "analysis_cache.json"
+        self._snapshot: tuple[tuple[FullAnalysis, ...], ...] = ()  # неизменяемый снимок для API, кусками
+        self._snapshot_len = 0
+        self._priority_queue: queue.Queue = queue.Queue(maxsize=PRIORITY_QUEUE_SIZE)
+        self._wakeup = threading.Event()
+        self.result_store = ResultStore(RESULTS_DB_PATH)
+        self.snapshot_path = SNAPSHOT_PATH
+        self.train_data_path = TRAIN_DATA_PATH  # выгрузка обучающих данных (EXPORT_TRAIN_DATA)
+        self._legacy_cache_path = PROCESSED_DIR / "analysis_cache.json"
+        # analyze_text: текстовые стадии по хэшу очищенного текста, итог — по тексту, метаданным и модели
+        self._text_stages = TTLCache(TEXT_ANALYSIS_CACHE_SIZE, TEXT_ANALYSIS_CACHE_TTL_SECONDS)
+        self._text_results = TTLCache(TEXT_ANALYSIS_CACHE_SIZE, TEXT_ANALYSIS_CACHE_TTL_SECONDS)
         self._initialized = False
+        # Процесс-читатель при нескольких процессах API: хранилище, очередь и модели меняет только владелец
+        self.read_only = False
+        self._synced_at = (0.0, "")  # (updated_at, lot_id) хранилища, до которого результаты уже в памяти
+        self._sync_thread: Optional[threading.Thread] = None
+        self._phases: dict[str, dict] = {name: {"state": "pending"} for name in INIT_PHASES}
+        self._init_thread: Optional[threading.Thread] = None
         self._ml_training_source: str | None = None
         self._ml_label_counts: dict[str, int] = {}
+        self._training_thread: Optional[threading.Thread] = None
+        self._feedback_thread: Optional[threading.Thread] = None
+        self._explain_thread: Optional[threading.Thread] = None
+        self._contributions: dict[str, dict] = {}  # lot_id -> ml_contributions
+        self._feature_matrix: Optional[np.ndarray] = None  # признаки self._lots для дообучения
+        self._rule_scores: Optional[list[float]] = None
+        self._trained_labels: dict[str, int] = {}  # метки, на которых обучена активная модель
+        self._labels_signature: Optional[tuple[int, int]] = None
+        self._training_status: dict = {
+            "state": "idle",
+            "mode": None,
+            "started_at": None,
+            "finished_at": None,
+            "duration_seconds": None,
+            "error": None,
+        }
 
-    def initialize(self, lots: Optional[list[dict]] = None):
-        """Загружает данные и строит индексы."""
-        self._analysis_cache = []
-        self._analysis_progress = 0
+    def initialize(
+        self,
+        lots: Optional[list[dict]] = None,
+        background_training: bool = False,
+        warm_start: Optional[bool] = None,
+        models: bool = True,
+    ):
+        """Загружает данные и строит индексы.
+
+        background_training=True — модели обучаются в отдельном процессе,
+        initialize() не ждет окончания обучения.
+        warm_start — читать и сохранять снимок состояния (по умолчанию WARM_START_SNAPSHOT).
+        models=False — без этапа models (обучения или загрузки моделей): только лоты, признаки,
+        индекс похожих лотов и граф; анализ после этого недоступен.
+        Ход по этапам INIT_PHASES — в get_phase_status(); готовые этапы можно использовать
+        до окончания initialize() (см. start_initialization).
+        """
+        self._initialized = False
+        self._phases = {name: {"state": "pending"} for name in INIT_PHASES}
+        with self._analysis_lock:
+            self._clear_results()
+            self._queue = LotQueue()
+            self._to_restore = deque()
+            self._lot_state = bytearray()
+        self._rule_scores = None
+        self._contributions = {}
+        # Индекс похожих лотов и история категорий строятся заново — кэш ручного анализа устарел
+        self._text_stages.clear()
+        self._text_results.clear()
+
+        with self._phase("lots"):
+            if lots is not None:
+                lot_store = LotStore(lots)
+            elif self.client.use_remote_api:
+                # With page_size=50, max_pages=210 = 10,500 lots
+                lot_store = LotStore(self.client.collect_all_lots(max_pages=210, page_size=50))
+            else:
+                # Локальные данные: общий с клиентом LotStore, лоты не копируются
+                lot_store = self.client.lot_store
+            self._lot_hashes = [lot_content_hash(lot) for lot in lot_store.lots]
+            self.lot_store = lot_store
+            self._lots = lot_store.lots
+            logger.info(f"[Analyzer] 📊 Loaded {len(self._lots)} lots")
+            self._load_analysis_cache()
+        self._wakeup.set()  # планировщик может подгружать сохраненные результаты
+
+        if warm_start is None:
+            warm_start = WARM_START_SNAPSHOT
+        all_features = None
+        if warm_start:
+            started = time.perf_counter()
+            for name in ("features", "similarity", "graph"):
+                self._start_phase(name)
+            all_features = self.load_snapshot()
+            if all_features is not None:
+                for name in ("features", "similarity", "graph"):
+                    self._finish_phase(name)
+                logger.info(f"[Analyzer] ⚡ Warm start from snapshot in {time.perf_counter() - started:.1f}s")
+
+        if all_features is None:
+            with self._phase("features"):
+                self.feature_engineer.fit_history(self._lots)
+
+                started = time.perf_counter()
+                all_features = self.feature_engineer.extract_batch(self._lots)
+                for lot, f in zip(self._lots, all_features):
+                    self._features_cache[lot.get("lot_id", "")] = f
 
-        if lots is not None:
-            self._lots = lots
-        else:
-            # Load all available lots (increase max_pages for real data)
-            # With page_size=50, max_pages=210 = 10,500 lots
-            self._lots = self.client.collect_all_lots(max_pages=210, page_size=50)
+                logger.info(
+                    f"[Analyzer] 🔧 Extracted features for {len(all_features)} lots "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
 
-        logger.info(f"[Analyzer] 📊 Loaded {len(self._lots)} lots")
+            with self._phase("similarity"):
+                self.vectorizer.build_index(self._lots)
+            with self._phase("graph"):
+                self.network.build_graph(self._lots)
+            if warm_start and lots is None:
+                try:
+                    self.save_snapshot()
+                except Exception as exc:
+                    logger.warning(f"[Analyzer] Failed to save snapshot: {exc}")
 
-        self.feature_engineer.fit_history(self._lots)
+        if not models:
+            logger.info("[Analyzer] ✅ State built without models")
+            return
+        with self._phase("models"):
+            self._prepare_scorer(all_features, background=background_training)
 
-        all_features = []
-        for lot in self._lots:
-            f = self.feature_engineer.extract_features(lot)
+        self._initialized = True
+        self._wakeup.set()
+        logger.info(f"[Analyzer] ✅ Initialization complete (source: {self._ml_training_source})")
+
+    def start_initialization(self, background_training: bool = False) -> None:
+        """Запускает initialize() в отдельном потоке.
+
+        Готовность по этапам — phase_ready()/get_phase_status(); планировщик фонового анализа
+        можно запускать сразу: до окончания инициализации он только подгружает сохраненные результаты.
+        """
+        if self._init_thread and self._init_thread.is_alive():
+            return
+
+        def _worker():
+            try:
+                self.initialize(background_training=background_training)
+            except Exception as exc:
+                logger.error(f"[Analyzer] Initialization failed: {exc}", exc_info=True)
+
+        self._init_thread = threading.Thread(target=_worker, daemon=True, name="analyzer-init")
+        self._init_thread.start()
+
+    def _start_phase(self, name: str) -> None:
+        self._phases[name] = {"state": "running", "started_at": time.time()}
+
+    def _finish_phase(self, name: str, error: Optional[Exception] = None) -> None:
+        phase = self._phases[name]
+        finished_at = time.time()
+        self._phases[name] = {
+            **phase,
+            "state": "failed" if error is not None else "ready",
+            "finished_at": finished_at,
+            "duration_seconds": round(finished_at - phase.get("started_at", finished_at), 3),
+            **({"error": str(error)} if error is not None else {}),
+        }
+
+    @contextmanager
+    def _phase(self, name: str):
+        """Отмечает этап инициализации выполняющимся, а по выходе — готовым или упавшим."""
+        self._start_phase(name)
+        try:
+            yield
+        except Exception as exc:
+            self._finish_phase(name, error=exc)
+            raise
+        self._finish_phase(name)
+
+    def phase_ready(self, *names: str) -> bool:
+        return all(self._phases[name]["state"] == "ready" for name in names)
+
+    def missing_phases(self, names) -> list[str]:
+        """Этапы из names, которые еще не готовы."""
+        return [name for name in names if self._phases[name]["state"] != "ready"]
+
+    def get_phase_status(self) -> dict[str, dict]:
+        """Состояние каждого этапа: pending / running / ready / failed, время начала и длительность."""
+        return {name: dict(self._phases[name]) for name in INIT_PHASES}
+
+    def _data_signature(self) -> str:
+        """Отпечаток корпуса: хэши анализируемых полей всех лотов в порядке загрузки."""
+        digest = hashlib.blake2b(digest_size=16)
+        for content_hash in self._lot_hashes:
+            digest.update(content_hash.encode("ascii"))
+        return digest.hexdigest()
+
+    def save_snapshot(self, path: Optional[Path] = None) -> Path:
+        """Сохраняет состояние после initialize(): историю категорий, признаки лотов,
+        индекс похожих лотов (TF-IDF и матрица) и граф.
+
+        Модели в снимок не входят: они хранятся в реестре и находятся по отпечатку обучающих данных.
+        """
+        path = Path(path or self.snapshot_path)
+        state = {
+            "pipeline_version": ANALYSIS_PIPELINE_VERSION,
+            "data_signature": self._data_signature(),
+            "created_at": time.time(),
+            "history": self.feature_engineer.history_snapshot(),
+            "features": [self._features_cache.get(lot.get("lot_id", "")) for lot in self._lots],
+            "vectorizer": self.vectorizer.state(),
+            "network": self.network.state(),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_SNAPSHOT_MAGIC + struct.pack("<I", SNAPSHOT_FORMAT_VERSION))
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+        logger.info(f"[Analyzer] 💾 Saved snapshot of {len(self._lots)} lots to {path}")
+        return path
+
+    def load_snapshot(self, path: Optional[Path] = None) -> Optional[list[LotFeatures]]:
+        """Восстанавливает состояние из снимка, построенного по тем же лотам и версии конвейера.
+
+        Возвращает признаки лотов (в порядке self._lots) или None, если снимка нет или он устарел.
+        """
+        path = Path(path or self.snapshot_path)
+        if not path.exists():
+            return None
+        header_size = len(_SNAPSHOT_MAGIC) + 4
+        try:
+            with open(path, "rb") as f:
+                header = f.read(header_size)
+                if (
+                    len(header) != header_size
+                    or header[: len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC
+                    or struct.unpack("<I", header[len(_SNAPSHOT_MAGIC):])[0] != SNAPSHOT_FORMAT_VERSION
+                ):
+                    logger.info(f"[Analyzer] Snapshot {path} has another format version — ignoring")
+                    return None
+                state = pickle.load(f)
+        except Exception as exc:
+            logger.warning(f"[Analyzer] Failed to read snapshot {path}: {exc}")
+            return None
+
+        if (
+            state["pipeline_version"] != ANALYSIS_PIPELINE_VERSION
+            or state["data_signature"] != self._data_signature()
+        ):
+            logger.info("[Analyzer] Snapshot was built from other data — rebuilding state")
+            return None
+        if not self.vectorizer.load_state(state["vectorizer"]):
+            logger.info("[Analyzer] Snapshot was built with another vectorizer mode — rebuilding state")
+            return None
+
+        self.feature_engineer = FeatureEngineer.from_history_snapshot(state["history"])
+        self.network.load_state(state["network"])
+        features = state["features"]
+        for lot, f in zip(self._lots, features):
             self._features_cache[lot.get("lot_id", "")] = f
-            all_features.append(f)
+        return features
+
+    def _prepare_scorer(self, all_features: list[LotFeatures], background: bool = False) -> None:
+        """Загружает модели из реестра, если обучающие данные не изменились, иначе обучает.
+
+        background=True — обучение идет в отдельном процессе, а до его завершения
+        используется последняя сохраненная модель (или только правила).
+        """
+        X = np.array([f.to_feature_vector() for f in all_features])
+        self._feature_matrix = X
+        self._trained_labels = self._load_labels_csv()
+        fingerprint = compute_fingerprint(
+            X, LABELS_CSV, LotFeatures.feature_names(), RiskScorer.training_params(len(X))
+        )
 
-        logger.info(f"[Analyzer] 🔧 Extracted features for {len(all_features)} lots")
+        pinned = self.registry.pinned()
+        if pinned is not None and not FORCE_TRAIN:
+            logger.warning(f"[Analyzer] Model version {pinned['version']} is pinned — skipping fingerprint check")
+            if self._load_registry_version(pinned):
+                return
+
+        entry = None if FORCE_TRAIN else self.registry.find(fingerprint)
+        if entry is not None:
+            logger.info(f"[Analyzer] ⚡ Training data unchanged — loading model {entry['version']}")
+            if self._load_registry_version(entry):
+                return
+            logger.warning("[Analyzer] Registry model failed to load — retraining")
+
+        if not background:
+            logger.info(f"[Analyzer] 🤖 Training ML models... (force_train={FORCE_TRAIN})")
+            self._run_training(all_features, fingerprint, in_process=self.train_in_process)
+            return
 
-        self.vectorizer.build_index(self._lots)
-        self.network.build_graph(self._lots)
-        self._load_analysis_cache()
-        has_real_data = len(self._lots) > 100
-        
-        should_retrain = FORCE_TRAIN or has_real_data or not self.scorer.is_fitted
-        
-        if not should_retrain:
-            logger.info("[Analyzer] Loading saved scorer from disk")
-            self.scorer.load()
-        
-        if should_retrain:
-            logger.info(f"[Analyzer] 🤖 Training ML models... (real_data={has_real_data}, force_train={FORCE_TRAIN})")
-            rule_scores = []
-            for lot in self._lots:
-                features = self._features_cache.get(lot.get("lot_id", ""))
-                if features:
-                    history = self.feature_engineer.get_history_for_lot(lot)
-                    result = self.rule_engine.analyze(lot, features, history=history)
-                    rule_scores.append(result.risk_score)
-                else:
-                    rule_scores.append(0.0)
-
-            labels = self._load_labels_csv()
-            if labels:
-                label_values = list(labels.values())
-                positives = sum(1 for v in label_values if v == 1)
-                self._ml_label_counts = {
-                    "positive": positives,
-                    "negative": len(label_values) - positives,
-                    "total": len(label_values),
-                }
-                self._ml_training_source = "labels_csv"
-                logger.info(
-                    "[Analyzer] Training with CSV labels: "
-                    f"{self._ml_label_counts['positive']} positive, "
-                    f"{self._ml_label_counts['negative']} negative"
+        fallback = self.registry.active()
+        if fallback is not None and self._load_registry_version(fallback):
+            logger.info(f"[Analyzer] Serving with last saved model {fallback['version']} while training")
+        else:
+            legacy = RiskScorer()
+            legacy.load()
+            if legacy.is_fitted:
+                legacy.version = "legacy"
+                self._swap_scorer(legacy, training_source="loaded")
+                logger.info("[Analyzer] Serving with legacy saved model while training")
+            else:
+                logger.info("[Analyzer] No saved model — serving rule scores only while training")
+
+        self.start_background_training(all_features, fingerprint)
+
+    def start_background_training(self, all_features: list[LotFeatures], fingerprint: str) -> None:
+        """Запускает обучение в отдельном процессе с горячей заменой модели по завершении."""
+        if self._training_thread and self._training_thread.is_alive():
+            return
+
+        def _worker():
+            self._run_training(all_features, fingerprint, in_process=False)
+
+        self._training_thread = threading.Thread(target=_worker, daemon=True, name="model-training")
+        self._training_thread.start()
+
+    def _run_training(self, all_features: list[LotFeatures], fingerprint: str, in_process: bool) -> None:
+        def _train() -> Optional[dict]:
+            data = self._prepare_training_data(all_features)
+            meta = {
+                "training_source": data["training_source"],
+                "label_counts": data["label_counts"],
+            }
+            logger.info(f"[Analyzer] 📈 Fitting scorer with {len(all_features)} samples")
+            if in_process:
+                entry = fit_and_register(
+                    all_features, data["labels"], data["rule_scores"], fingerprint, meta,
+                    registry_root=self.registry.root,
                 )
             else:
-                self._ml_training_source = "rule_pseudo"
+                ctx = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    entry = pool.submit(
+                        fit_and_register,
+                        all_features, data["labels"], data["rule_scores"], fingerprint, meta,
+                        registry_root=self.registry.root,
+                    ).result()
+            if entry is not None:
+                self._trained_labels = data["labels_csv"]
+            return entry
+
+        self._track_training("full", _train)
+
+    def _track_training(self, mode: str, train) -> bool:
+        """Выполняет train() с учетом статуса обучения; train возвращает запись реестра."""
+        started_at = time.time()
+        started = time.perf_counter()
+        self._training_status = {
+            "state": "running",
+            "mode": mode,
+            "started_at": started_at,
+            "finished_at": None,
+            "duration_seconds": None,
+            "error": None,
+        }
+        try:
+            entry = train()
+            if entry is None:
+                raise RuntimeError("not enough samples to train")
+            if not self._load_registry_version(entry):
+                raise RuntimeError(f"failed to load trained model {entry['version']}")
+
+            self._training_status.update(state="done")
+            return True
+        except Exception as exc:
+            logger.error(f"[Analyzer] ❌ Model training failed: {exc}", exc_info=True)
+            self._training_status.update(state="failed", error=str(exc))
+            return False
+        finally:
+            self._training_status.update(
+                finished_at=time.time(),
+                duration_seconds=round(time.perf_counter() - started, 2),
+            )
+            logger.info(
+                f"[Analyzer] Model training ({mode}) {self._training_status['state']} "
+                f"in {self._training_status['duration_seconds']}s"
+            )
 
-            if EXPORT_TRAIN_DATA:
+    def start_feedback_retraining(
+        self,
+        poll_seconds: float = FEEDBACK_POLL_SECONDS,
+        min_new_labels: int = FEEDBACK_RETRAIN_MIN_LABELS,
+    ) -> None:
+        """Следит за LABELS_CSV и дообучает CatBoost, когда накопилось достаточно новых меток."""
+        if self._feedback_thread and self._feedback_thread.is_alive():
+            return
+
+        def _worker():
+            while True:
+                time.sleep(poll_seconds)
                 try:
-                    train_records = []
+                    self.check_feedback_labels(min_new_labels)
+                except Exception as exc:
+                    logger.error(f"[Analyzer] Feedback retraining check failed: {exc}", exc_info=True)
+
+        self._feedback_thread = threading.Thread(target=_worker, daemon=True, name="feedback-retraining")
+        self._feedback_thread.start()
+        logger.info(
+            f"[Analyzer] Watching {LABELS_CSV} for feedback "
+            f"(every {poll_seconds}s, min {min_new_labels} new labels)"
+        )
+
+    def check_feedback_labels(self, min_new_labels: int = FEEDBACK_RETRAIN_MIN_LABELS) -> bool:
+        """Запускает дообучение, если в LABELS_CSV появилось не меньше min_new_labels новых меток."""
+        path = Path(LABELS_CSV) if LABELS_CSV else None
+        if path is None or not path.exists() or self._feature_matrix is None:
+            return False
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._labels_signature:
+            return False
+        if self._training_status.get("state") == "running" or not self.scorer.is_fitted:
+            return False  # подпись не запоминаем: проверим снова после обучения
+
+        labels = self._load_labels_csv()
+        changed = sum(1 for lot_id, label in labels.items() if self._trained_labels.get(lot_id) != label)
+        self._labels_signature = signature
+        if changed < min_new_labels:
+            return False
+
+        logger.info(f"[Analyzer] 🔁 {changed} new feedback labels — continuing training")
+        return self._run_incremental_training(labels)
+
+    def _run_incremental_training(self, labels: dict[str, int]) -> bool:
+        base_version = self.scorer.version
+        if not base_version or base_version == "legacy":
+            logger.warning("[Analyzer] No registry model to continue from — skipping feedback retraining")
+            return False
+
+        def _train() -> Optional[dict]:
+            X = self._feature_matrix
+            label_list = self._label_list(labels, self._get_rule_scores())
+            # Продолжение обучения — не то же самое, что полное обучение на этих данных:
+            # отпечаток другой, иначе registry.find() отдал бы его вместо полного переобучения
+            hyperparams = {
+                **RiskScorer.training_params(len(X)),
+                "training_source": "feedback_incremental",
+                "base_version": base_version,
+            }
+            fingerprint = compute_fingerprint(X, LABELS_CSV, LotFeatures.feature_names(), hyperparams)
+            meta = {
+                "training_source": "feedback_incremental",
+                "label_counts": self._count_labels(labels),
+                "base_version": base_version,
+            }
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                entry = pool.submit(
+                    continue_and_register,
+                    self.registry.path_for(base_version), X, label_list, fingerprint, meta,
+                    registry_root=self.registry.root,
+                ).result()
+            if entry is not None:
+                self._trained_labels = labels
+            return entry
+
+        return self._track_training("incremental", _train)
+
+    def _load_registry_version(self, entry: dict) -> bool:
+        scorer = RiskScorer()
+        scorer.load(self.registry.path_for(entry["version"]))
+        if not scorer.is_fitted:
+            return False
+        scorer.version = entry["version"]
+        meta = entry.get("meta", {})
+        self._swap_scorer(
+            scorer,
+            training_source=meta.get("training_source", "loaded"),
+            label_counts=meta.get("label_counts", {}),
+        )
+        active = self.registry.active()
+        if not active or active.get("version") != entry["version"]:
+            self.registry.activate(entry["version"], pin=False)
+        return True
+
+    def _swap_scorer(
+        self,
+        scorer: RiskScorer,
+        training_source: str,
+        label_counts: Optional[dict] = None,
+    ) -> None:
+        """Атомарно подменяет модель; ML-оценки в кэше пересчитываются лениво при чтении."""
+        scorer.native_catboost = self.native_catboost
+        with self._analysis_lock:
+            previous, self.scorer = self.scorer, scorer
+            self._ml_training_source = training_source
+            self._ml_label_counts = label_counts or {}
+            self._rebuild_pending()
+        if previous is not scorer:
+            previous.close()
+        logger.info(f"[Analyzer] 🔄 Active scorer: {scorer.version} (source: {training_source})")
+
+    def disable_native_catboost(self) -> None:
+        """Для процессов, созданных через fork: пул потоков CatBoost родителя после fork не используется.
+
+        Прогноз CatBoost — numpy-деревьями при любом размере батча, ShapValues — в отдельном
+        процессе (spawn); то же применяется к моделям, подмененным позже.
+        """
+        self.native_catboost = False
+        self.scorer.native_catboost = False
+
+    def get_training_status(self) -> dict:
+        """Состояние обучения и активной модели."""
+        return {
+            **self._training_status,
+            "model_version": self.scorer.version,
+            "model_ready": self.scorer.is_fitted,
+            "training_source": self._ml_training_source,
+            "label_counts": self._ml_label_counts,
+        }
+
+    def _get_rule_scores(self) -> list[float]:
+        """Rule-скоры всех лотов для псевдо-меток (считаются один раз за сессию)."""
+        if self._rule_scores is not None and len(self._rule_scores) == len(self._lots):
+            return self._rule_scores
+        rule_scores = []
+        for lot in self._lots:
+            features = self._features_cache.get(lot.get("lot_id", ""))
+            if features:
+                history = self.feature_engineer.get_history_for_lot(lot)
+                result = self.rule_engine.analyze(lot, features, history=history)
+                rule_scores.append(result.risk_score)
+            else:
+                rule_scores.append(0.0)
+        self._rule_scores = rule_scores
+        return rule_scores
+
+    @staticmethod
+    def _count_labels(labels: dict[str, int]) -> dict[str, int]:
+        positives = sum(1 for v in labels.values() if v == 1)
+        return {
+            "positive": positives,
+            "negative": len(labels) - positives,
+            "total": len(labels),
+        }
+
+    def _label_list(self, labels: dict[str, int], rule_scores: list[float]) -> list[int]:
+        """Метки из CSV, для неразмеченных лотов — псевдо-метки по правилам."""
+        label_list = [labels.get(lot.get("lot_id", "")) for lot in self._lots]
+        return [
+            v if v in (0, 1) else (1 if score >= 50.0 else 0)
+            for v, score in zip(label_list, rule_scores)
+        ]
+
+    def _prepare_training_data(self, all_features: list[LotFeatures]) -> dict:
+        """Считает rule-скоры и метки для обучения RiskScorer."""
+        rule_scores = self._get_rule_scores()
+
+        labels = self._load_labels_csv()
+        if labels:
+            label_counts = self._count_labels(labels)
+            training_source = "labels_csv"
+            logger.info(
+                "[Analyzer] Training with CSV labels: "
+                f"{label_counts['positive']} positive, "
+                f"{label_counts['negative']} negative"
+            )
+        else:
+            label_counts = {}
+            training_source = "rule_pseudo"
+
+        if EXPORT_TRAIN_DATA:
+            try:
+                with TrainDataWriter(
+                    self.train_data_path, LotFeatures.feature_names(), len(all_features), with_features=True
+                ) as writer:
                     for lot, features, score in zip(self._lots, all_features, rule_scores):
-                        label = 1 if score >= 50.0 else 0
-                        train_records.append({
-                            "lot_id": lot.get("lot_id", ""),
-                            "rule_score": score,
-                            "label": label,
-                            "features": features.to_dict(),
-                            "feature_vector": features.to_feature_vector(),
-                        })
-
-                    export_path = PROCESSED_DIR / "catboost_train.json"
-                    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-                    with open(export_path, "w", encoding="utf-8") as f:
-                        json.dump(
-                            {
-                                "feature_names": all_features[0].feature_names() if all_features else [],
-                                "records": train_records,
-                            },
-                            f,
-                            ensure_ascii=True,
-                        )
-                    logger.info(f"[Analyzer] Exported CatBoost training data to {export_path}")
-
-                    compact_path = PROCESSED_DIR / "catboost_train_vectors.json"
-                    with open(compact_path, "w", encoding="utf-8") as f:
-                        json.dump(
-                            {
-                                "feature_names": all_features[0].feature_names() if all_features else [],
-                                "records": [
-                                    {
-                                        "lot_id": r["lot_id"],
-                                        "label": r["label"],
-                                        "rule_score": r["rule_score"],
-                                        "feature_vector": r["feature_vector"],
-                                    }
-                                    for r in train_records
-                                ],
-                            },
-                            f,
-                            ensure_ascii=True,
+                        writer.write(
+                            lot.get("lot_id", ""),
+                            1 if score >= 50.0 else 0,
+                            score,
+                            features.to_feature_vector(),
+                            features.to_dict(),
                         )
-                    logger.info(f"[Analyzer] Exported CatBoost vectors to {compact_path}")
-
-                    csv_path = PROCESSED_DIR / "catboost_train.csv"
-                    feature_names = all_features[0].feature_names() if all_features else []
-                    with open(csv_path, "w", encoding="utf-8", newline="") as f:
-                        writer = csv.writer(f)
-                        writer.writerow(["lot_id", "label", "rule_score", *feature_names])
-                        for r in train_records:
-                            writer.writerow([
-                                r["lot_id"],
-                                r["label"],
-                                r["rule_score"],
-                                *r["feature_vector"],
-                            ])
-                    logger.info(f"[Analyzer] Exported CatBoost CSV to {csv_path}")
-                except Exception as e:
-                    logger.warning(f"[Analyzer] Failed to export training data: {e}")
-
-            logger.info(f"[Analyzer] 📈 Fitting scorer with {len(all_features)} samples, {len(rule_scores)} scores")
-            if labels:
-                label_list = [labels.get(lot.get("lot_id", "")) for lot in self._lots]
-                label_list = [
-                    v if v in (0, 1) else (1 if score >= 50.0 else 0)
-                    for v, score in zip(label_list, rule_scores)
-                ]
-                logger.info(f"[Analyzer] Using {len(label_list)} labeled samples")
-                self.scorer.fit(all_features, labels=label_list)
-            else:
-                logger.info(f"[Analyzer] Using {len(rule_scores)} rule-based pseudo-labels")
-                self.scorer.fit(all_features, rule_scores=rule_scores)
-            logger.info("[Analyzer] 💾 Saving trained models")
-            self.scorer.save()
+                logger.info(f"[Analyzer] Exported CatBoost training data to {self.train_data_path}.npy")
+            except Exception as e:
+                logger.warning(f"[Analyzer] Failed to export training data: {e}")
+
+        label_list = None
+        if labels:
+            label_list = self._label_list(labels, rule_scores)
+            logger.info(f"[Analyzer] Using {len(label_list)} labeled samples")
         else:
-            self._ml_training_source = "loaded"
-            logger.info("[Analyzer] Scorer loaded from disk — skipping training")
+            logger.info(f"[Analyzer] Using {len(rule_scores)} rule-based pseudo-labels")
 
-        self._initialized = True
-        logger.info(f"[Analyzer] ✅ Initialization complete (source: {self._ml_training_source})")
+        return {
+            "labels": label_list,
+            "labels_csv": labels,
+            "rule_scores": rule_scores,
+            "training_source": training_source,
+            "label_counts": label_counts,
+        }
 
     def _analysis_result_from_cache(self, data: dict) -> AnalysisResult:
         rules = []
@@ -277,10 +830,11 @@ class GoszakupAnalyzer:
             datanomix_codes=data.get("datanomix_codes", []) or [],
         )
 
-    def _analysis_from_cache(self, data: dict) -> FullAnalysis:
+    def _analysis_from_cache(self, data: dict, lot: Optional[dict] = None) -> FullAnalysis:
+        """Восстанавливает FullAnalysis из payload; lot — исходный лот (в хранилище lot_data нет)."""
         analysis = FullAnalysis(
             lot_id=data.get("lot_id", ""),
-            lot_data=data.get("lot_data", {}) or {},
+            lot_data=lot if lot is not None else data.get("lot_data", {}) or {},
             final_score=float(data.get("final_score", 0.0) or 0.0),
             final_level=data.get("final_level", "LOW"),
             explanation=data.get("explanation", []) or [],
@@ -290,122 +844,578 @@ class GoszakupAnalyzer:
             analysis.rule_analysis = self._analysis_result_from_cache(data["rule_analysis"])
 
         analysis.ml_prediction = data.get("ml_prediction", {}) or {}
+        analysis.model_version = data.get("model_version")
+        analysis.ml_contributions = data.get("ml_contributions", {}) or {}
+        if data.get("component_scores"):
+            scores = data["component_scores"]
+            analysis.component_scores = tuple(float(scores.get(name, 0.0)) for name in COMPONENTS)
+
+        # Восстанавливаем входы итогового скоринга, чтобы ML можно было пересчитать без полного анализа
+        if data.get("features"):
+            known = LotFeatures.__dataclass_fields__
+            analysis.features = LotFeatures(
+                **{k: v for k, v in data["features"].items() if k in known}
+            )
+            analysis.vectorizer_result = VectorizerResult(
+                lot_id=analysis.lot_id,
+                max_similarity=analysis.features.max_similarity,
+                is_copypaste=analysis.features.is_copypaste,
+                is_unique=analysis.features.is_unique,
+                similar_lots=[
+                    SimilarLot(
+                        lot_id=item.get("lot_id", ""),
+                        similarity=item.get("similarity", 0.0),
+                        name_ru=item.get("name_ru", ""),
+                    )
+                    for item in data.get("similar_lots", []) or []
+                ],
+            )
+        if data.get("network_flags"):
+            analysis.network_result = NetworkAnalysisResult(
+                bin=analysis.lot_data.get("customer_bin", ""),
+                flags=data["network_flags"],
+            )
 
         return analysis
 
     def _load_analysis_cache(self) -> None:
-        cache_path = self._analysis_cache_path
-        raw_path = RAW_DIR / "real_lots.json"
-        if not cache_path.exists():
-            return
+        """Делит лоты на сохраненные в хранилище и ожидающие анализа.
+
+        Результат лота переиспользуется, если совпали хэш его анализируемых полей
+        и версия конвейера; новые и измененные лоты уходят в анализ, результаты
+        исчезнувших лотов удаляются. Payload здесь не читается: сохраненные результаты
+        подгружаются батчами в фоне (_restore_stored).
+        """
+        stored: dict[str, Optional[str]] = {}
+        try:
+            self._migrate_legacy_cache()
+            stored = self.result_store.fingerprints()
+            current = {lot.get("lot_id", "") for lot in self._lots}
+            removed = self.result_store.lot_ids() - current
+            if removed:
+                self.result_store.delete(removed)
+                logger.info(f"[Analyzer] Removed {len(removed)} results of lots no longer in data")
+        except Exception as exc:
+            logger.warning(f"[Analyzer] Failed to open result store: {exc}")
+
+        category_budget: dict[str, float] = {}
+        for lot in self._lots:
+            code = lot.get("category_code", "")
+            category_budget[code] = category_budget.get(code, 0.0) + float(lot.get("budget") or 0)
+        self._category_budget = category_budget
+
+        # Если хранилище не пусто, лоты без актуального результата — новые или измененные: они идут первыми
+        self._load_score_config()
+
+        tier = PRIORITY_NEW if stored else PRIORITY_DEFAULT
+        to_restore, pending = deque(), LotQueue()
+        lot_state = bytearray(len(self._lots))
+        changed = 0
+        for i, (lot, content_hash) in enumerate(zip(self._lots, self._lot_hashes)):
+            stored_hash = stored.get(lot.get("lot_id", ""))
+            if stored_hash == content_hash:
+                to_restore.append(i)
+                lot_state[i] = LOT_STORED
+            else:
+                pending.push(i, self._priority_key(i, tier))
+                changed += stored_hash is not None
+        with self._analysis_lock:
+            self._to_restore = to_restore
+            self._queue = pending
+            self._lot_state = lot_state
+            self._components = np.full((len(self._lots), len(COMPONENTS)), np.nan)
+        logger.info(
+            f"[Analyzer] Result store: {len(to_restore)} lots up to date, "
+            f"{changed} changed, {len(pending) - changed} new or outdated — to analyze"
+        )
+
+    def _priority_key(self, index: int, tier: int) -> tuple:
+        """Ключ LotQueue: уровень, затем категории с большим суммарным бюджетом, затем порядок файла."""
+        code = self._lots[index].get("category_code", "")
+        return (tier, -self._category_budget.get(code, 0.0), index)
+
+    def prioritize(self, lot_ids: Iterable[str]) -> int:
+        """Поднимает ожидающие анализа лоты в начало фоновой очереди (лоты, запрошенные через API).
+
+        Возвращает число поднятых лотов.
+        """
+        if self.read_only:
+            # Очередью владеет процесс-владелец: запрос передается через хранилище
+            try:
+                self.result_store.add_priority_requests(list(lot_ids))
+            except Exception as exc:
+                logger.warning(f"[Analyzer] Failed to forward priority request: {exc}")
+            return 0
+        raised = 0
+        with self._analysis_lock:
+            for lot_id in lot_ids:
+                i = self.lot_store.index_of(lot_id)
+                if i is not None and i in self._queue:
+                    raised += self._queue.push(i, self._priority_key(i, PRIORITY_REQUESTED))
+        if raised:
+            self._wakeup.set()
+        return raised
+
+    def lot_status(self, lot_id: str) -> str:
+        """Состояние лота в фоновом анализе: queued / stored / analyzed (unknown — нет такого лота)."""
+        i = self.lot_store.index_of(lot_id)
+        lot_state = self._lot_state
+        if i is None or i >= len(lot_state):
+            return "unknown"
+        return _LOT_STATE_NAMES[lot_state[i]]
+
+    def get_analysis_progress(self) -> dict[str, int]:
+        """Сколько лотов проанализировано, ждет подгрузки из хранилища и стоит в очереди."""
+        lot_state = self._lot_state
+        return {
+            "analyzed": lot_state.count(LOT_ANALYZED),
+            "stored": lot_state.count(LOT_STORED),
+            "queued": lot_state.count(LOT_QUEUED),
+        }
+
+    def _migrate_legacy_cache(self) -> None:
+        """Однократный перенос analysis_cache.json (прежний формат кэша) в хранилище результатов.
 
-        if raw_path.exists() and cache_path.stat().st_mtime < raw_path.stat().st_mtime:
-            logger.info("[Analyzer] Cache is older than raw data — invalidating")
+        Хэш считается по lot_data из кэша, поэтому устаревшие записи будут переанализированы.
+        """
+        path = self._legacy_cache_path
+        if not path.exists() or self.result_store.count():
             return
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        records = payload.get("records", []) if isinstance(payload, dict) else payload
+        analyses = []
+        for record in records:
+            analysis = self._analysis_from_cache(record)
+            analysis.content_hash = lot_content_hash(analysis.lot_data)
+            analyses.append(analysis)
+        migrated = self.result_store.upsert_many(analyses)
+        logger.info(f"[Analyzer] Migrated {migrated} results from {path}")
+        path.rename(path.with_name(path.name + ".migrated"))
+
+    def _restore_stored(self, limit: int) -> int:
+        """Подгружает из хранилища до limit сохраненных результатов в кэш."""
+        with self._analysis_lock:
+            indices = [self._to_restore.popleft() for _ in range(min(limit, len(self._to_restore)))]
+        if not indices:
+            return 0
 
+        t = metrics.now()
+        lots = [self._lots[i] for i in indices]
         try:
-            payload = json.loads(cache_path.read_text(encoding="utf-8"))
-            records = payload.get("records", []) if isinstance(payload, dict) else payload
-            
-            # Build map of lot_id -> full lot data from real_lots.json for hydration
-            lots_by_id = {}
-            if raw_path.exists():
-                try:
-                    raw_lots = json.loads(raw_path.read_text(encoding="utf-8"))
-                    lots_by_id = {lot.get("lot_id"): lot for lot in raw_lots}
-                    logger.info(f"[Analyzer] Built lot data map from {raw_path}")
-                except Exception as e:
-                    logger.warning(f"[Analyzer] Failed to load raw lots for hydration: {e}")
-            
-            # Load cache and hydrate lot_data with fresh fields
-            cached = []
-            for r in records:
-                analysis = self._analysis_from_cache(r)
-                # Hydrate lot_data with fresh fields from real_lots.json
-                if analysis.lot_id in lots_by_id:
-                    fresh_lot = lots_by_id[analysis.lot_id].copy()
-                    analysis.lot_data = fresh_lot
-                    logger.debug(f"[Analyzer] Hydrated {analysis.lot_id}: unit_price={fresh_lot.get('unit_price', 0)}")
-                else:
-                    logger.debug(f"[Analyzer] Lot {analysis.lot_id} not found in raw data, keeping cached version")
-                cached.append(analysis)
-            
-            self._analysis_cache = cached
-            self._analysis_progress = len(cached)
-            logger.info(f"[Analyzer] Loaded and hydrated analysis cache: {len(cached)} lots")
+            payloads = self.result_store.get_many([lot.get("lot_id", "") for lot in lots])
         except Exception as exc:
-            logger.warning(f"[Analyzer] Failed to load cache: {exc}")
+            logger.warning(f"[Analyzer] Failed to read result store: {exc}")
+            payloads = {}
+
+        restored, missing = [], []
+        for i, lot in zip(indices, lots):
+            data = payloads.get(lot.get("lot_id", ""))
+            if data is None:
+                missing.append(i)
+                continue
+            analysis = self._stored_analysis(data, i)
+            if analysis.ml_contributions:
+                self._contributions[analysis.lot_id] = analysis.ml_contributions
+            restored.append(analysis)
+
+        with self._analysis_lock:
+            self._append_results(restored)
+            for i in indices:
+                self._lot_state[i] = LOT_ANALYZED
+            self._record_components(restored)
+            for i in missing:
+                self._lot_state[i] = LOT_QUEUED
+                self._queue.push(i, self._priority_key(i, PRIORITY_NEW))
+            self._publish_snapshot()
+        metrics.lap("restore", t)
+        logger.info(f"[Analyzer] Restored {len(restored)} stored results ({len(self._to_restore)} left)")
+        return len(indices)
+
+    def _stored_analysis(self, data: dict, index: int) -> FullAnalysis:
+        """Результат лота self._lots[index] из payload хранилища."""
+        analysis = self._analysis_from_cache(data, lot=self._lots[index])
+        analysis.content_hash = self._lot_hashes[index]
+        # Балл — по текущим весам и порогам (они могли смениться после записи)
+        if analysis.component_scores is not None:
+            analysis.final_score = combine_score(analysis.component_scores, self.score_weights)
+            analysis.final_level = get_risk_level(analysis.final_score, self.risk_thresholds)
+        else:
+            analysis.final_score, analysis.final_level, analysis.explanation = (
+                self._compute_final_score(analysis)
+            )
+        return analysis
+
+    def _persist(self, analyses: list[FullAnalysis]) -> None:
+        """Дописывает результаты в хранилище (вызывать вне _analysis_lock).
+
+        Пишутся только результаты, которые все еще актуальны в кэше: замененный другим потоком
+        результат сохранит тот поток, и более старая копия не перезапишет его строку.
+        """
+        if self.read_only:
+            return
+        with self._persist_lock:
+            with self._analysis_lock:
+                analyses = [a for a in analyses if self._results_by_id.get(a.lot_id) is a]
+            if not analyses:
+                return
+            t = metrics.now()
+            try:
+                self.result_store.upsert_many(analyses)
+                metrics.lap("persist", t)
+            except Exception as exc:
+                logger.warning(f"[Analyzer] Failed to persist {len(analyses)} results: {exc}")
+
+    def _store_results(self, analyses: list[FullAnalysis]) -> None:
+        """Добавляет новые результаты в кэш, публикует снимок и сохраняет их в хранилище."""
+        with self._analysis_lock:
+            self._append_results(analyses)
+            for a in analyses:
+                i = self.lot_store.index_of(a.lot_id)
+                if i is not None and i < len(self._lot_state):
+                    self._lot_state[i] = LOT_ANALYZED
+            self._record_components(analyses)
+            self._publish_snapshot()
+        self._persist(analyses)
+
+    def _reset_results(self) -> None:
+        """Сбрасывает результаты в памяти: все лоты снова ждут анализа (хранилище не меняется)."""
+        with self._analysis_lock:
+            self._clear_results()
+            self._to_restore = deque()
+            self._queue = LotQueue()
+            for i in range(len(self._lots)):
+                self._queue.push(i, self._priority_key(i, PRIORITY_DEFAULT))
+            self._lot_state = bytearray(len(self._lots))
+
+    def _clear_results(self) -> None:
+        """Очищает кэш результатов и производные от него структуры (вызывать под _analysis_lock)."""
+        self._analysis_cache = []
+        self._results_by_id = {}
+        self._cache_pos = {}
+        self._ml_stale = set()
+        self._unexplained = set()
+        self._dashboard = DashboardAggregates()
+        self._publish_snapshot(full=True)
+
+    def _append_results(self, analyses: list[FullAnalysis]) -> None:
+        """Дописывает результаты новых лотов в конец кэша (вызывать под _analysis_lock)."""
+        start = len(self._analysis_cache)
+        self._analysis_cache.extend(analyses)
+        for pos, analysis in enumerate(analyses, start):
+            self._results_by_id[analysis.lot_id] = analysis
+            self._cache_pos[analysis.lot_id] = pos
+            self._track_pending(pos, analysis)
+        self._dashboard.add(analyses)
+
+    def _replace_result(self, pos: int, old: FullAnalysis, updated: FullAnalysis) -> None:
+        """Подменяет результат в позиции pos кэша копией updated (вызывать под _analysis_lock)."""
+        self._analysis_cache[pos] = updated
+        self._results_by_id[updated.lot_id] = updated
+        self._track_pending(pos, updated)
+        if (old.final_score, old.final_level) != (updated.final_score, updated.final_level):
+            self._dashboard.remove([old])
+            self._dashboard.add([updated])
+
+    def _track_pending(self, pos: int, analysis: FullAnalysis) -> None:
+        """Отмечает позицию в _ml_stale / _unexplained по активной модели (вызывать под _analysis_lock)."""
+        version = self.scorer.version
+        if analysis.features is not None and analysis.model_version != version:
+            self._ml_stale.add(pos)
+        else:
+            self._ml_stale.discard(pos)
+        if analysis.features is not None and analysis.ml_contributions.get("model_version") != version:
+            self._unexplained.add(pos)
+        else:
+            self._unexplained.discard(pos)
+
+    def _rebuild_pending(self) -> None:
+        """Заново заполняет _ml_stale и _unexplained после смены модели (вызывать под _analysis_lock)."""
+        self._ml_stale = set()
+        self._unexplained = set()
+        for pos, analysis in enumerate(self._analysis_cache):
+            self._track_pending(pos, analysis)
 
     def save_analysis_cache(self) -> None:
+        """Сбрасывает WAL хранилища в основной файл; сами результаты пишутся после каждого батча."""
         try:
-            self._analysis_cache_path.parent.mkdir(parents=True, exist_ok=True)
-            payload = {
-                "total": len(self._analysis_cache),
-                "records": [r.to_dict() for r in self._analysis_cache],
-            }
-            self._analysis_cache_path.write_text(
-                json.dumps(payload, ensure_ascii=True),
-                encoding="utf-8",
-            )
-            logger.info(f"[Analyzer] Saved analysis cache to {self._analysis_cache_path}")
+            self.result_store.checkpoint()
         except Exception as exc:
-            logger.warning(f"[Analyzer] Failed to save cache: {exc}")
+            logger.warning(f"[Analyzer] Failed to checkpoint result store: {exc}")
 
     def start_background_analysis(self, batch_size: int = 50, sleep_seconds: float = 0.1) -> None:
+        """Фоновый планировщик — единственный владелец работы по анализу.
+
+        По приоритету: запросы «проанализировать сейчас» (submit_priority), подгрузка
+        сохраненных результатов из хранилища, пересчет ML после смены модели, очередной
+        батч необработанных лотов. Обработчики API только читают снимок get_cached_results().
+        Пока initialize() не завершена, выполняются только первые два пункта;
+        в процессе-читателе (read_only) — только первый.
+        """
         if self._analysis_thread and self._analysis_thread.is_alive():
             return
 
         def _worker():
             while True:
-                with self._analysis_lock:
-                    done = self._analysis_progress >= len(self._lots)
-                if done:
-                    break
-                self.analyze_incremental(max_new=batch_size)
-                time.sleep(sleep_seconds)
-
-        self._analysis_thread = threading.Thread(target=_worker, daemon=True)
+                try:
+                    self._run_priority()
+                    if self.read_only:
+                        self._wakeup.wait(timeout=1.0)
+                        self._wakeup.clear()
+                        continue
+                    restored = self._restore_stored(limit=batch_size * 40)
+                    if not self._initialized:
+                        # До готовности моделей и индексов только подгружаем сохраненное
+                        if restored:
+                            time.sleep(sleep_seconds)
+                        else:
+                            self._wakeup.wait(timeout=1.0)
+                            self._wakeup.clear()
+                        continue
+                    rescored = self._refresh_stale_ml(limit=batch_size * 20)
+                    with self._analysis_lock:
+                        backlog = len(self._queue) > 0
+                    if backlog:
+                        self.analyze_incremental(max_new=batch_size)
+                    if backlog or restored or rescored:
+                        time.sleep(sleep_seconds)  # отдаем GIL обработчикам запросов
+                    else:
+                        self._wakeup.wait(timeout=1.0)
+                        self._wakeup.clear()
+                except Exception as exc:
+                    logger.error(f"[Analyzer] Background analysis failed: {exc}", exc_info=True)
+                    time.sleep(1.0)
+
+        self._analysis_thread = threading.Thread(target=_worker, daemon=True, name="analysis-scheduler")
         self._analysis_thread.start()
 
-    def analyze_incremental(self, max_new: int = 50) -> list[FullAnalysis]:
-        if not self._lots:
-            return self._analysis_cache
+    def submit_priority(self, fn: Callable, *args) -> Future:
+        """Ставит задачу в ограниченную приоритетную очередь планировщика.
 
+        Выполняется раньше фонового анализа. При переполнении очереди — AnalysisQueueFull.
+        """
+        future: Future = Future()
+        try:
+            self._priority_queue.put_nowait((future, fn, args))
+        except queue.Full:
+            raise AnalysisQueueFull(self._priority_queue.maxsize) from None
+        self._wakeup.set()
+        return future
+
+    def analyze_lot_now(self, lot_id: str) -> Future:
+        """Приоритетный анализ одного лота в потоке планировщика."""
+        return self.submit_priority(self.analyze_lot, lot_id)
+
+    def _run_priority(self) -> int:
+        done = 0
+        while True:
+            try:
+                future, fn, args = self._priority_queue.get_nowait()
+            except queue.Empty:
+                return done
+            if not future.set_running_or_notify_cancel():
+                continue  # клиент уже не ждет
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+            done += 1
+
+    def backlog_size(self) -> int:
+        """Сколько лотов еще нет в снимке (ждут анализа или подгрузки из хранилища)."""
         with self._analysis_lock:
-            start = self._analysis_progress
-            end = min(self._analysis_progress + max_new, len(self._lots))
-            if start >= end:
-                return self._analysis_cache
+            return len(self._queue) + len(self._to_restore)
 
-        new_results = []
-        for lot in self._lots[start:end]:
-            new_results.append(self._analyze(lot))
+    def get_metrics_gauges(self) -> dict[str, float]:
+        """Мгновенные значения для /api/metrics."""
+        return {
+            "analysis_backlog_lots": self.backlog_size(),
+            "analysis_results": self._snapshot_len,
+            "lots": len(self._lots),
+            "priority_queue_depth": self._priority_queue.qsize(),
+            "text_cache_hits": self._text_results.hits,
+            "text_cache_misses": self._text_results.misses,
+        }
 
-        with self._analysis_lock:
-            self._analysis_cache.extend(new_results)
-            self._analysis_progress = end
-            cache_snapshot = list(self._analysis_cache)
+    def _publish_snapshot(self, changed: Iterable[int] = (), full: bool = False) -> None:
+        """Публикует неизменяемый снимок результатов для читателей (вызывать под _analysis_lock).
+
+        Снимок — кортеж кусков по _SNAPSHOT_CHUNK_SIZE результатов. Пересобираются только куски
+        с позициями changed и хвост, дописанный после прошлой публикации, поэтому публикация после
+        батча не зависит от размера кэша. full=True — кэш собран заново, пересобрать все куски.
+        """
+        cache = self._analysis_cache
+        n_chunks = -(-len(cache) // _SNAPSHOT_CHUNK_SIZE)
+        if full:
+            chunks, dirty = [()] * n_chunks, range(n_chunks)
+        else:
+            chunks = list(self._snapshot[:n_chunks])
+            chunks.extend([()] * (n_chunks - len(chunks)))
+            dirty = {pos // _SNAPSHOT_CHUNK_SIZE for pos in changed}
+            dirty.update(range(self._snapshot_len // _SNAPSHOT_CHUNK_SIZE, n_chunks))
+        for c in dirty:
+            chunks[c] = tuple(cache[c * _SNAPSHOT_CHUNK_SIZE : (c + 1) * _SNAPSHOT_CHUNK_SIZE])
+        self._snapshot = tuple(chunks)
+        self._snapshot_len = len(cache)
 
-        if self._analysis_progress >= len(self._lots):
-            self.save_analysis_cache()
+    def analyze_incremental(self, max_new: int = 50) -> list[FullAnalysis]:
+        if not self._lots:
+            return self.get_cached_results()
 
-        logger.info(f"[Analyzer] Incremental analyzed {end}/{len(self._lots)} lots")
-        return cache_snapshot
+        with self._analysis_lock:
+            items = self._queue.pop(max_new)
+        if not items:
+            return self.get_cached_results()
+
+        started = metrics.now()
+        try:
+            new_results = self._analyze_batch([self._lots[i] for _, i in items])
+        except Exception:
+            with self._analysis_lock:
+                self._queue.push_many(items)
+            raise
+        self._store_results(new_results)
+        if started:
+            metrics.record_throughput(len(new_results), metrics.now() - started)
+
+        logger.info(f"[Analyzer] Incremental analyzed {self._snapshot_len}/{len(self._lots)} lots")
+        return self.get_cached_results()
 
     def get_cached_results(self) -> list[FullAnalysis]:
+        """Снимок готовых результатов; анализ здесь не выполняется."""
+        return list(itertools.chain.from_iterable(self._snapshot))
+
+    def _refresh_stale_ml(self, limit: Optional[int] = None) -> int:
+        """Пересчитывает ML-часть кэша после смены модели (батчем, не больше limit лотов)."""
+        scorer = self.scorer
+        if not scorer.is_fitted:
+            return 0
         with self._analysis_lock:
-            return list(self._analysis_cache)
+            stale = [(i, self._analysis_cache[i]) for i in itertools.islice(self._ml_stale, limit)]
+        if not stale:
+            return 0
+
+        t = metrics.now()
+        predictions = scorer.predict_batch([a.features for _, a in stale])
+        metrics.lap("ml_rescore", t)
+        refreshed = []
+        for (i, analysis), prediction in zip(stale, predictions):
+            updated = replace(analysis, ml_prediction=prediction, model_version=scorer.version)
+            updated.final_score, updated.final_level, updated.explanation = (
+                self._compute_final_score(updated)
+            )
+            refreshed.append((i, analysis, updated))
+
+        with self._analysis_lock:
+            replaced = []
+            for i, analysis, updated in refreshed:
+                if i < len(self._analysis_cache) and self._analysis_cache[i] is analysis:
+                    self._replace_result(i, analysis, updated)
+                    replaced.append((i, updated))
+            self._record_components([updated for _, updated in replaced])
+            self._publish_snapshot(i for i, _ in replaced)
+        self._persist([updated for _, updated in replaced])
+        logger.info(f"[Analyzer] Re-scored {len(stale)} cached lots with model {scorer.version}")
+        return len(stale)
+
+    def explain_pending(self, batch_size: int = 5000) -> int:
+        """Считает вклады признаков батчами для лотов без объяснений от активной модели."""
+        scorer = self.scorer
+        if not scorer.is_fitted:
+            return 0
+        with self._analysis_lock:
+            pending = [(i, self._analysis_cache[i]) for i in sorted(self._unexplained)]
+
+        done = 0
+        for start in range(0, len(pending), batch_size):
+            if self.scorer is not scorer:
+                break  # модель сменилась (ее процесс объяснений остановлен)
+            batch = pending[start : start + batch_size]
+            t = metrics.now()
+            explanations = scorer.explain_batch([a.features for _, a in batch])
+            metrics.lap("explain", t)
+            explained = []
+            with self._analysis_lock:
+                if self.scorer is not scorer:
+                    break  # модель сменилась: объяснения устарели, новые посчитает следующий проход
+                for (i, analysis), explanation in zip(batch, explanations):
+                    # Пока считались объяснения, результат мог быть заменен (пересчет ML, новые веса):
+                    # вклады ставятся в копию текущего результата, сам он не меняется
+                    current = self._analysis_cache[i] if i < len(self._analysis_cache) else None
+                    if (
+                        current is None
+                        or current.lot_id != analysis.lot_id
+                        or current.content_hash != analysis.content_hash
+                    ):
+                        continue
+                    contributions = {**explanation, "model_version": scorer.version} if explanation else {}
+                    updated = replace(current, ml_contributions=contributions)
+                    self._replace_result(i, current, updated)
+                    self._contributions[updated.lot_id] = contributions
+                    explained.append((i, updated))
+                self._publish_snapshot(i for i, _ in explained)
+            self._persist([updated for _, updated in explained])
+            done += len(explained)
+
+        if done:
+            logger.info(f"[Analyzer] Explained {done} lots with model {scorer.version}")
+        return done
+
+    def start_background_explanations(self, poll_seconds: float = 5.0) -> None:
+        """Фоновый расчет объяснений: для новых результатов анализа и после смены модели."""
+        if self._explain_thread and self._explain_thread.is_alive():
+            return
+
+        def _worker():
+            while True:
+                try:
+                    self.explain_pending()
+                except Exception as exc:
+                    logger.error(f"[Analyzer] Explanations failed: {exc}", exc_info=True)
+                time.sleep(poll_seconds)
+
+        self._explain_thread = threading.Thread(target=_worker, daemon=True, name="ml-explanations")
+        self._explain_thread.start()
+
+    def get_cached_analysis(self, lot_id: str) -> Optional[FullAnalysis]:
+        """Готовый результат лота, если он актуален: те же данные лота и та же модель.
+
+        None — результата нет (лот еще не проанализирован) или он устарел.
+        """
+        analysis = self._results_by_id.get(lot_id)
+        if analysis is None:
+            return None
+        i = self.lot_store.index_of(lot_id)
+        if i is None or i >= len(self._lot_hashes) or analysis.content_hash != self._lot_hashes[i]:
+            return None
+        scorer = self.scorer
+        if analysis.model_version != (scorer.version if scorer.is_fitted else None):
+            return None
+        return analysis
 
     def analyze_lot(self, lot_id: str) -> FullAnalysis:
-        """Полный анализ выбранного лота."""
-        lot = self.client.get_lot_by_id(lot_id)
+        """Анализ выбранного лота: из кэша, а для отсутствующих и устаревших — полный анализ."""
+        cached = self.get_cached_analysis(lot_id)
+        if cached is not None:
+            return cached
+
+        lot = self.lot_store.get(lot_id)
         if not lot:
             return FullAnalysis(lot_id=lot_id)
 
-        return self._analyze(lot)
+        analysis = self._analyze(lot)
+        # Объяснения только из кэша: в запросе ShapValues не считаются
+        contributions = self._contributions.get(lot_id, {})
+        if contributions.get("model_version") == analysis.model_version:
+            analysis.ml_contributions = contributions
+        return analysis
 
     def analyze_text(self, text: str, metadata: Optional[dict] = None) -> FullAnalysis:
-        """Анализ произвольного текста ТЗ."""
+        """Анализ произвольного текста ТЗ.
+
+        Результаты кэшируются: повтор того же текста с теми же метаданными отдается из кэша,
+        а при других метаданных переиспользуются текстовые стадии (NER-признаки и похожие лоты),
+        пересчитываются только бюджетные признаки, правила, ML и итоговый балл.
+        """
         lot = {
             "lot_id": "MANUAL",
             "desc_ru": text,
@@ -418,41 +1428,128 @@ class GoszakupAnalyzer:
             "winner_bin": "",
             "customer_bin": "",
         }
-        return self._analyze(lot)
+        text_key = hashlib.blake2b(clean_text(text).encode("utf-8"), digest_size=16).hexdigest()
+        scorer = self.scorer
+        result_key = (
+            text_key,
+            json.dumps(metadata or {}, sort_keys=True, default=str),
+            scorer.version if scorer.is_fitted else None,
+        )
+        cached = self._text_results.get(result_key)
+        if cached is not None:
+            return cached
+
+        stages = self._text_stages.get(text_key)
+        if stages is None:
+            ner_result = self.rule_engine.ner.extract(clean_text(text))
+            stages = (
+                ner_result,
+                self.feature_engineer.extract_text_features(lot, ner_result=ner_result),
+                self.vectorizer.find_similar(lot),
+            )
+            self._text_stages.put(text_key, stages)
+        ner_result, text_features, vec_result = stages
 
-    def _analyze(self, lot: dict) -> FullAnalysis:
-        """Внутренний запуск всех стадий анализа."""
-        lot_id = lot.get("lot_id", "")
-        analysis = FullAnalysis(lot_id=lot_id, lot_data=lot)
+        features = self.feature_engineer.apply_lot_features(replace(text_features), lot)
+        features.max_similarity = vec_result.max_similarity
+        features.is_copypaste = vec_result.is_copypaste
+        features.is_unique = vec_result.is_unique
+        analysis = self._analyze(lot, features=features, vec_result=vec_result, ner_result=ner_result)
+        self._text_results.put(result_key, analysis)
+        return analysis
 
-        if lot_id in self._features_cache:
-            features = self._features_cache[lot_id]
+    def _analyze_batch(self, lots: list[dict]) -> list[FullAnalysis]:
+        """Анализ набора лотов: семантика и ML считаются одним проходом на весь набор."""
+        if not lots:
+            return []
+
+        t = metrics.now()
+        vec_results = self.vectorizer.find_similar_batch(lots)
+        t = metrics.lap("similarity_batch", t)
+        features_list = []
+        for lot, vec_result in zip(lots, vec_results):
+            features = self._get_features(lot)
+            features.max_similarity = vec_result.max_similarity
+            features.is_copypaste = vec_result.is_copypaste
+            features.is_unique = vec_result.is_unique
+            features_list.append(features)
+        t = metrics.lap("features_batch", t)
+
+        scorer = self.scorer
+        if scorer.is_fitted:
+            ml_predictions = scorer.predict_batch(features_list)
+            metrics.lap("ml_batch", t)
         else:
-            features = self.feature_engineer.extract_features(lot)
+            ml_predictions = [{} for _ in lots]
+
+        results = []
+        for lot, features, vec_result, ml_prediction in zip(lots, features_list, vec_results, ml_predictions):
+            analysis = self._analyze(
+                lot, features=features, vec_result=vec_result, ml_prediction=ml_prediction
+            )
+            analysis.model_version = scorer.version if scorer.is_fitted else None
+            results.append(analysis)
+        return results
+
+    def _get_features(self, lot: dict) -> LotFeatures:
+        lot_id = lot.get("lot_id", "")
+        if lot_id in self._features_cache:
+            return self._features_cache[lot_id]
+        return self.feature_engineer.extract_features(lot)
+
+    def _analyze(
+        self,
+        lot: dict,
+        features: Optional[LotFeatures] = None,
+        vec_result: Optional[VectorizerResult] = None,
+        ml_prediction: Optional[dict] = None,
+        ner_result: Optional[NERResult] = None,
+    ) -> FullAnalysis:
+        """Внутренний запуск всех стадий анализа.
+
+        Готовые результаты стадий (из _analyze_batch и кэша analyze_text) используются как есть.
+        """
+        t = metrics.now()
+        lot_id = lot.get("lot_id", "")
+        analysis = FullAnalysis(lot_id=lot_id, lot_data=lot, content_hash=lot_content_hash(lot))
+
+        if features is None:
+            features = self._get_features(lot)
+            t = metrics.lap("features", t)
         analysis.features = features
 
         history = self.feature_engineer.get_history_for_lot(lot)
-        rule_result = self.rule_engine.analyze(lot, features, history=history)
+        rule_result = self.rule_engine.analyze(lot, features, history=history, ner=ner_result)
         analysis.rule_analysis = rule_result
-
-        vec_result = self.vectorizer.find_similar(lot)
+        t = metrics.lap("rules", t)
+
+        if vec_result is None:
+            vec_result = self.vectorizer.find_similar(lot)
+            features.max_similarity = vec_result.max_similarity
+            features.is_copypaste = vec_result.is_copypaste
+            features.is_unique = vec_result.is_unique
+            t = metrics.lap("similarity", t)
         analysis.vectorizer_result = vec_result
 
-        features.max_similarity = vec_result.max_similarity
-        features.is_copypaste = vec_result.is_copypaste
-        features.is_unique = vec_result.is_unique
-
-        if self.scorer.is_fitted:
-            analysis.ml_prediction = self.scorer.predict(features)
+        if ml_prediction is not None:
+            analysis.ml_prediction = ml_prediction
+        else:
+            scorer = self.scorer
+            if scorer.is_fitted:
+                analysis.ml_prediction = scorer.predict(features)
+                analysis.model_version = scorer.version
+                t = metrics.lap("ml", t)
 
         customer_bin = lot.get("customer_bin", "")
         winner_bin = lot.get("winner_bin", "")
         if customer_bin:
             analysis.network_result = self.network.analyze_bin(customer_bin)
+            t = metrics.lap("network", t)
 
         analysis.final_score, analysis.final_level, analysis.explanation = (
             self._compute_final_score(analysis)
         )
+        metrics.lap("final_score", t)
 
         return analysis
 
@@ -491,18 +1588,251 @@ class GoszakupAnalyzer:
             for flag in analysis.network_result.flags[:3]:
                 explanation.append(f"Сеть: {flag}")
 
-        # Balanced weights: Rules still primary but ML now has more influence
-        final = (
-            rule_score * 0.50 +      # 50%: Rule engine core signal
-            ml_score * 0.40 +        # 40%: ML models (increased for better anomaly detection)
-            semantic_score * 0.05 +  # 5%: Copy-paste detection
-            network_score * 0.05     # 5%: Network flags
-        )
-        final = min(100.0, max(0.0, final))
-        level = get_risk_level(final)
+        # Веса и пороги — активные (SCORE_WEIGHTS / RISK_THRESHOLDS или заданные через apply_score_config)
+        analysis.component_scores = (rule_score, ml_score, semantic_score, network_score)
+        final = combine_score(analysis.component_scores, self.score_weights)
+        level = get_risk_level(final, self.risk_thresholds)
 
         return final, level, explanation
 
+    def _record_components(self, analyses: list[FullAnalysis]) -> None:
+        """Записывает компоненты балла в столбцы self._components (вызывать под _analysis_lock)."""
+        components = self._components
+        for a in analyses:
+            i = self.lot_store.index_of(a.lot_id)
+            if a.component_scores is not None and i is not None and i < len(components):
+                components[i] = a.component_scores
+
+    def _load_score_config(self) -> None:
+        """Веса и пороги, примененные через apply_score_config, из хранилища результатов."""
+        weights, thresholds = None, None
+        try:
+            raw = self.result_store.get_meta("score_config")
+            if raw:
+                config = json.loads(raw)
+                weights, thresholds = config.get("weights"), config.get("thresholds")
+        except Exception as exc:
+            logger.warning(f"[Analyzer] Failed to load score config: {exc}")
+        try:
+            self.score_weights = normalize_weights(weights)
+            self.risk_thresholds = normalize_thresholds(thresholds)
+        except ValueError as exc:
+            logger.warning(f"[Analyzer] Stored score config is invalid, using defaults: {exc}")
+            self.score_weights = normalize_weights(None)
+            self.risk_thresholds = normalize_thresholds(None)
+
+    def get_score_config(self) -> dict:
+        """Активные веса компонент и пороги уровней."""
+        return {
+            "weights": dict(self.score_weights),
+            "thresholds": {level: list(bounds) for level, bounds in self.risk_thresholds.items()},
+        }
+
+    def preview_score_config(self, weights: Optional[dict] = None, thresholds: Optional[dict] = None) -> dict:
+        """«Что если»: баллы и уровни всех готовых результатов при других весах/порогах.
+
+        Переданные значения накладываются на активные; результаты и хранилище не меняются.
+        ValueError — неизвестная компонента или уровень, некорректное значение.
+        """
+        new_weights = normalize_weights(weights, self.score_weights)
+        new_thresholds = normalize_thresholds(thresholds, self.risk_thresholds)
+
+        t = metrics.now()
+        with self._analysis_lock:
+            rows = np.flatnonzero(~np.isnan(self._components[:, 0]))
+            components = self._components[rows]
+        current = combine_scores(components, self.score_weights)
+        current_levels = risk_levels(current, self.risk_thresholds)
+        preview = combine_scores(components, new_weights)
+        preview_levels = risk_levels(preview, new_thresholds)
+
+        changed = current_levels != preview_levels
+        transitions: dict[str, int] = {}
+        if changed.any():
+            pairs = np.char.add(np.char.add(current_levels[changed], "->"), preview_levels[changed])
+            names, counts = np.unique(pairs, return_counts=True)
+            transitions = {str(n): int(c) for n, c in zip(names, counts)}
+
+        delta = np.abs(preview - current)
+        top = rows[:0]
+        if len(rows):
+            k = min(10, len(rows))
+            top = np.argpartition(-delta, k - 1)[:k]
+            top = top[np.argsort(-delta[top], kind="stable")]
+        metrics.lap("score_preview", t)
+
+        def _level_counts(levels: np.ndarray) -> dict[str, int]:
+            counts = dict(zip(*np.unique(levels, return_counts=True)))
+            return {level: int(counts.get(level, 0)) for level in new_thresholds}
+
+        return {
+            "weights": new_weights,
+            "thresholds": {level: list(bounds) for level, bounds in new_thresholds.items()},
+            "lots": int(len(rows)),
+            "levels": {"current": _level_counts(current_levels), "preview": _level_counts(preview_levels)},
+            "changed_levels": int(changed.sum()),
+            "transitions": transitions,
+            "mean_score": {
+                "current": round(float(current.mean()), 2) if len(rows) else 0.0,
+                "preview": round(float(preview.mean()), 2) if len(rows) else 0.0,
+            },
+            "top_changes": [
+                {
+                    "lot_id": self._lots[rows[j]].get("lot_id", ""),
+                    "current_score": round(float(current[j]), 1),
+                    "preview_score": round(float(preview[j]), 1),
+                    "current_level": str(current_levels[j]),
+                    "preview_level": str(preview_levels[j]),
+                }
+                for j in top
+            ],
+        }
+
+    def apply_score_config(
+        self,
+        weights: Optional[dict] = None,
+        thresholds: Optional[dict] = None,
+        persist: bool = True,
+    ) -> dict:
+        """Применяет новые веса/пороги ко всем результатам без переанализа.
+
+        Баллы и уровни пересчитываются векторно по столбцам компонент; измененные результаты
+        публикуются в снимке, а в хранилище обновляются столбцы final_score / final_level
+        (payload не переписывается: при подгрузке балл пересчитывается по активным весам).
+        Конфигурация сохраняется в хранилище и действует после перезапуска; процесс-читатель
+        сохраняет только конфигурацию — столбцы обновит владелец (sync_from_store).
+        persist=False — только в памяти.
+        """
+        new_weights = normalize_weights(weights, self.score_weights)
+        new_thresholds = normalize_thresholds(thresholds, self.risk_thresholds)
+        while self._restore_stored(limit=10_000):
+            pass
+
+        t = metrics.now()
+        with self._analysis_lock:
+            scores = combine_scores(self._components, new_weights)
+            levels = risk_levels(scores, new_thresholds)
+            self.score_weights, self.risk_thresholds = new_weights, new_thresholds
+            changed = []
+            positions = []
+            for pos, analysis in enumerate(self._analysis_cache):
+                i = self.lot_store.index_of(analysis.lot_id)
+                if i is None or np.isnan(scores[i]):
+                    continue
+                score, level = float(scores[i]), str(levels[i])
+                if score != analysis.final_score or level != analysis.final_level:
+                    updated = replace(analysis, final_score=score, final_level=level)
+                    self._replace_result(pos, analysis, updated)
+                    changed.append(updated)
+                    positions.append(pos)
+            self._publish_snapshot(positions)
+        self._text_results.clear()
+        metrics.lap("score_apply", t)
+
+        if persist:
+            try:
+                if not self.read_only:
+                    self.result_store.update_scores((a.lot_id, a.final_score, a.final_level) for a in changed)
+                self.result_store.set_meta("score_config", json.dumps(self.get_score_config()))
+            except Exception as exc:
+                logger.warning(f"[Analyzer] Failed to persist score config: {exc}")
+        logger.info(
+            f"[Analyzer] Applied score weights {new_weights}: {len(changed)} results changed"
+        )
+        return {**self.get_score_config(), "changed": len(changed)}
+
+    def prepare_fork(self) -> None:
+        """Готовит построенное состояние к fork процессов API.
+
+        Все сохраненные результаты загружаются в память (до fork — чтобы страницы были общими),
+        соединение с хранилищем закрывается (каждый процесс откроет свое), а объекты переносятся
+        в постоянное поколение сборщика мусора, чтобы GC не копировал страницы при записи.
+        """
+        while self._restore_stored(limit=10_000):
+            pass
+        # Строки с последним updated_at уже в памяти: позиция — после любого lot_id с этим временем
+        self._synced_at = (self.result_store.updated_at() or 0.0, "\uffff")
+        self.result_store.close()
+        gc.collect()
+        gc.freeze()
+
+    def start_store_sync(self, poll_seconds: float = WORKER_SYNC_SECONDS) -> None:
+        """Фоновая синхронизация процесса с хранилищем при нескольких процессах API (см. sync_from_store)."""
+        if self._sync_thread and self._sync_thread.is_alive():
+            return
+
+        def _worker():
+            while True:
+                try:
+                    self.sync_from_store(results=self.read_only)
+                except Exception as exc:
+                    logger.error(f"[Analyzer] Store sync failed: {exc}", exc_info=True)
+                time.sleep(poll_seconds)
+
+        self._sync_thread = threading.Thread(target=_worker, daemon=True, name="store-sync")
+        self._sync_thread.start()
+
+    def sync_from_store(self, results: bool = True) -> int:
+        """Догоняет изменения других процессов.
+
+        Все процессы применяют веса/пороги, сохраненные другим процессом. Владелец поднимает
+        в очереди лоты, запрошенные через читателей; читатель подгружает активную модель реестра.
+        results=True — подгрузить результаты, записанные после fork (читатель — постоянно,
+        владелец — при старте, например после перезапуска процесса).
+        Возвращает число подгруженных результатов.
+        """
+        raw = self.result_store.get_meta("score_config")
+        if raw:
+            config = json.loads(raw)
+            weights = normalize_weights(config.get("weights"))
+            thresholds = normalize_thresholds(config.get("thresholds"))
+            if (weights, thresholds) != (self.score_weights, self.risk_thresholds):
+                self.apply_score_config(weights, thresholds, persist=not self.read_only)
+
+        if not self.read_only:
+            lot_ids = self.result_store.pop_priority_requests()
+            if lot_ids:
+                self.prioritize(lot_ids)
+        else:
+            entry = self.registry.active()
+            if entry is not None and entry.get("version") != self.scorer.version:
+                self._load_registry_version(entry)
+        if not results:
+            return 0
+
+        synced = 0
+        while True:
+            rows = self.result_store.changed_since(*self._synced_at)
+            updates: dict[str, FullAnalysis] = {}
+            for lot_id, updated_at, content_hash, data in rows:
+                self._synced_at = (updated_at, lot_id)
+                i = self.lot_store.index_of(lot_id)
+                if i is None or content_hash != self._lot_hashes[i]:
+                    continue
+                updates[lot_id] = self._stored_analysis(data, i)
+            if updates:
+                with self._analysis_lock:
+                    added, positions = [], []
+                    for lot_id, analysis in updates.items():
+                        pos = self._cache_pos.get(lot_id)
+                        if pos is None:
+                            added.append(analysis)
+                        else:
+                            self._replace_result(pos, self._analysis_cache[pos], analysis)
+                            positions.append(pos)
+                    self._append_results(added)
+                    for lot_id, analysis in updates.items():
+                        i = self.lot_store.index_of(lot_id)
+                        self._lot_state[i] = LOT_ANALYZED
+                        self._queue.discard(i)
+                        if analysis.ml_contributions:
+                            self._contributions[lot_id] = analysis.ml_contributions
+                    self._record_components(list(updates.values()))
+                    self._publish_snapshot(positions)
+                synced += len(updates)
+            if len(rows) < 5000:
+                return synced
+
     def _load_labels_csv(self) -> dict[str, int]:
         """Загружает метки из CSV (столбцы: lot_id,label)."""
         if not LABELS_CSV:
@@ -528,72 +1858,143 @@ class GoszakupAnalyzer:
             logger.warning(f"[Analyzer] Failed to read LABELS_CSV: {exc}")
             return {}
 
-    def analyze_all(self) -> list[FullAnalysis]:
-        """Анализирует все лоты и кэширует результат."""
+    def analyze_all(self, workers: Optional[int] = None) -> list[FullAnalysis]:
+        """Анализирует все лоты и кэширует результат.
+
+        На больших корпусах лоты делятся на шарды и анализируются пулом процессов (см. _analyze_parallel).
+        """
         if not self._lots:
             return []
 
-        while self._analysis_progress < len(self._lots):
-            self.analyze_incremental(max_new=200)
+        while self._restore_stored(limit=10_000):
+            pass
+        remaining = len(self._queue)
+        if remaining > 0:
+            workers = resolve_workers(ANALYSIS_WORKERS if workers is None else workers)
+            can_fork = "fork" in multiprocessing.get_all_start_methods()
+            if workers > 1 and can_fork and remaining >= ANALYSIS_PARALLEL_MIN_LOTS:
+                self._analyze_parallel(workers)
+            else:
+                # Один проход по всем оставшимся лотам: одна матрица признаков, один вызов на модель
+                self.analyze_incremental(max_new=len(self._lots))
 
+        while self._refresh_stale_ml(limit=100_000):
+            pass
         logger.info(f"[Analyzer] Analyzed {len(self._analysis_cache)} lots")
         return self.get_cached_results()
 
+    def _analyze_parallel(self, workers: int, shard_size: int = ANALYSIS_SHARD_SIZE) -> None:
+        """Анализ ожидающих лотов шардами в пуле процессов.
+
+        Процессы создаются через fork и наследуют индексы, граф и модели без копирования
+        и сериализации. Каждый шард проходит стадии батчем (_analyze_batch) и сохраняется
+        в хранилище по мере готовности, в порядке шардов.
+        """
+        global _worker_analyzer
+
+        with self._analysis_lock:
+            items = self._queue.pop(len(self._queue))
+        indices = [i for _, i in items]
+        # Не меньше ~4 шардов на процесс, чтобы выровнять нагрузку; шарды идут в порядке приоритета
+        shard_size = max(50, min(shard_size, -(-len(indices) // (workers * 4))))
+        shards = [indices[i : i + shard_size] for i in range(0, len(indices), shard_size)]
+
+        started = time.perf_counter()
+        shard_started = metrics.now()
+        done = 0
+        _worker_analyzer = self
+        try:
+            ctx = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(shards)),
+                mp_context=ctx,
+                initializer=_init_analysis_worker,
+            ) as pool:
+                for shard, results in zip(shards, pool.map(_analyze_shard, shards)):
+                    for i, analysis in zip(shard, results):
+                        analysis.lot_data = self._lots[i]  # не держим копию лота, пришедшую из процесса
+                        if analysis.features is not None:
+                            self._features_cache[analysis.lot_id] = analysis.features
+                    self._store_results(results)
+                    if shard_started:
+                        now = metrics.now()
+                        metrics.record_throughput(len(results), now - shard_started)
+                        shard_started = now
+                    done += 1
+                    logger.info(f"[Analyzer] Parallel analyzed {self._snapshot_len}/{len(self._lots)} lots")
+        finally:
+            _worker_analyzer = None
+            if done < len(shards):
+                with self._analysis_lock:
+                    self._queue.push_many(items[done * shard_size :])
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"[Analyzer] ⚡ {len(indices)} lots in {elapsed:.1f}s "
+            f"({len(indices) / max(elapsed, 1e-9):.0f} lots/s, {workers} workers)"
+        )
+
     def get_dashboard_stats(self) -> dict:
-        """Возвращает агрегированные метрики для дашборда."""
-        results = self.get_cached_results()
-        if not results and self._lots:
-            results = self.analyze_incremental(max_new=50)
-
-        by_level = {"LOW": 0, "MEDIUM": 0, "HIGH": 0, "CRITICAL": 0}
-        by_category = {}
-        total_budget = 0
-        scores = []
-
-        for r in results:
-            by_level[r.final_level] = by_level.get(r.final_level, 0) + 1
-            scores.append(r.final_score)
-            total_budget += r.lot_data.get("budget", 0)
-
-            cat = r.lot_data.get("category_name", "Другое")
-            cat_code = r.lot_data.get("category_code", "")
-            if cat not in by_category:
-                by_category[cat] = {
-                    "count": 0, 
-                    "high_risk": 0, 
-                    "avg_score": 0, 
-                    "scores": [],
-                    "category_code": cat_code,
-                }
-            by_category[cat]["count"] += 1
-            by_category[cat]["scores"].append(r.final_score)
-            if r.final_level in ("HIGH", "CRITICAL"):
-                by_category[cat]["high_risk"] += 1
-
-        for cat in by_category:
-            s = by_category[cat]["scores"]
-            by_category[cat]["avg_score"] = round(sum(s) / len(s), 1) if s else 0
-            del by_category[cat]["scores"]
-            
+        """Возвращает агрегированные метрики для дашборда.
+
+        Агрегаты обновляются при добавлении и замене результатов (DashboardAggregates),
+        поэтому запрос стоит O(категорий), а не O(лотов).
+        """
+        with self._analysis_lock:
+            dashboard = self._dashboard
+            top_ids = dashboard.top_ids(TOP_RISKS)
+            if top_ids is None:
+                dashboard.rebuild_top(self._analysis_cache)
+                top_ids = dashboard.top_ids(TOP_RISKS)
+            top_risks = [self._results_by_id[lot_id] for lot_id in top_ids]
+            total = dashboard.count
+            by_level = dict(dashboard.by_level)
+            score_sum, total_budget = dashboard.score_sum, dashboard.total_budget
+            by_category = dashboard.categories()
+            synthetic_risk_dist = dict(dashboard.by_type[True])
+            real_risk_dist = dict(dashboard.by_type[False])
+
+        for stats in by_category.values():
             # Add price statistics for category
-            cat_code = by_category[cat].get("category_code", "")
+            cat_code = stats.get("category_code", "")
             if cat_code:
                 price_stats = self.feature_engineer.get_category_price_stats(cat_code)
                 if price_stats:
-                    by_category[cat]["median_budget"] = price_stats.get("median", 0)
-                    by_category[cat]["avg_budget"] = price_stats.get("mean", 0)
-                    by_category[cat]["min_budget"] = price_stats.get("min", 0)
-                    by_category[cat]["max_budget"] = price_stats.get("max", 0)
+                    stats["median_budget"] = price_stats.get("median", 0)
+                    stats["avg_budget"] = price_stats.get("mean", 0)
+                    stats["min_budget"] = price_stats.get("min", 0)
+                    stats["max_budget"] = price_stats.get("max", 0)
 
         return {
-            "total_lots": len(results),
-            "processed_lots": self._analysis_progress,
+            "total_lots": total,
+            "processed_lots": total,
             "all_lots": len(self._lots),
             "by_level": by_level,
-            "avg_score": round(sum(scores) / len(scores), 1) if scores else 0,
+            "avg_score": round(score_sum / total, 1) if total else 0,
             "total_budget": total_budget,
             "by_category": by_category,
-            "top_risks": [
-                r.to_dict() for r in sorted(results, key=lambda x: x.final_score, reverse=True)[:10]
-            ],
-        }
\ No newline at end of file
+            "top_risks": [r.to_dict() for r in top_risks],
+            "data_type_stats": {
+                "total_synthetic": sum(synthetic_risk_dist.values()),
+                "total_real": sum(real_risk_dist.values()),
+                "synthetic_risk_dist": synthetic_risk_dist,
+                "real_risk_dist": real_risk_dist,
+            },
+        }
+
+
+_worker_analyzer: Optional[GoszakupAnalyzer] = None
+
+
+def _init_analysis_worker() -> None:
+    """Инициализатор процесса пула анализа (после fork).
+
+    CatBoost считается numpy-деревьями: пул потоков CatBoost родителя после fork не используем.
+    """
+    _worker_analyzer.disable_native_catboost()
+
+
+def _analyze_shard(indices: list[int]) -> list[FullAnalysis]:
+    """Анализ одного шарда лотов (индексы в _lots) внутри процесса пула."""
+    lots = _worker_analyzer._lots
+    return _worker_analyzer._analyze_batch([lots[i] for i in indices])
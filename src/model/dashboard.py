@@ -0,0 +1,118 @@
+"""Агрегаты дашборда, обновляемые по мере добавления и замены результатов.
+
+Счетчики по уровням и категориям, суммы баллов и бюджетов, распределения синтетических
+и реальных лотов меняются на O(1) при каждом результате; запрос дашборда стоит O(категорий).
+Самые рискованные лоты — в ограниченной куче: в ней лежат лучшие _TOP_CAPACITY лотов,
+все остальные результаты имеют балл не выше минимального в куче.
+"""
+import heapq
+from typing import Iterable, Optional
+
+_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+_HIGH_LEVELS = ("HIGH", "CRITICAL")
+
+# Сколько лотов держать в куче топа (с запасом над TOP_RISKS на удаления и понижения балла)
+_TOP_CAPACITY = 100
+TOP_RISKS = 10
+
+
+class DashboardAggregates:
+    """Агрегаты по множеству результатов FullAnalysis (по одному на лот).
+
+    Замена результата лота — remove(старый) и add(новый).
+    Не потокобезопасна: вызывать под блокировкой владельца.
+    """
+
+    def __init__(self, analyses: Iterable = ()):
+        self.count = 0
+        self.score_sum = 0.0
+        self.total_budget = 0
+        self.by_level = dict.fromkeys(_LEVELS, 0)
+        self.by_type = {True: dict.fromkeys(_LEVELS, 0), False: dict.fromkeys(_LEVELS, 0)}  # is_synthetic ->
+        self._categories: dict[str, list] = {}  # название -> [count, high_risk, score_sum, category_code]
+        self._top: dict[str, float] = {}  # lot_id -> балл
+        self._heap: list[tuple[float, str]] = []  # мин-куча по _top (устаревшие записи пропускаются)
+        self.add(analyses)
+
+    def add(self, analyses: Iterable) -> None:
+        for a in analyses:
+            lot = a.lot_data
+            level, score = a.final_level, a.final_score
+            self.count += 1
+            self.score_sum += score
+            self.total_budget += lot.get("budget", 0) or 0
+            self.by_level[level] = self.by_level.get(level, 0) + 1
+            dist = self.by_type[bool(lot.get("is_synthetic", False))]
+            dist[level] = dist.get(level, 0) + 1
+            name = lot.get("category_name", "Другое")
+            row = self._categories.get(name)
+            if row is None:
+                row = self._categories[name] = [0, 0, 0.0, lot.get("category_code", "")]
+            row[0] += 1
+            row[1] += level in _HIGH_LEVELS
+            row[2] += score
+            self._add_top(a.lot_id, score)
+
+    def remove(self, analyses: Iterable) -> None:
+        for a in analyses:
+            lot = a.lot_data
+            level, score = a.final_level, a.final_score
+            self.count -= 1
+            self.score_sum -= score
+            self.total_budget -= lot.get("budget", 0) or 0
+            self.by_level[level] -= 1
+            self.by_type[bool(lot.get("is_synthetic", False))][level] -= 1
+            name = lot.get("category_name", "Другое")
+            row = self._categories[name]
+            row[0] -= 1
+            row[1] -= level in _HIGH_LEVELS
+            row[2] -= score
+            if row[0] == 0:
+                del self._categories[name]
+            self._top.pop(a.lot_id, None)
+
+    def _add_top(self, lot_id: str, score: float) -> None:
+        # Пока все результаты в куче, берем любой; иначе — только балл выше минимального в куче
+        if self.count - 1 > len(self._top) and not (self._top and score > self._min_top()):
+            return
+        self._top[lot_id] = score
+        heapq.heappush(self._heap, (score, lot_id))
+        if len(self._top) > _TOP_CAPACITY:
+            while True:
+                old_score, old_id = heapq.heappop(self._heap)
+                if self._top.get(old_id) == old_score:
+                    del self._top[old_id]
+                    break
+        if len(self._heap) > 4 * _TOP_CAPACITY:
+            self._heap = [(s, i) for i, s in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def _min_top(self) -> float:
+        while self._top.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+    def top_ids(self, k: int = TOP_RISKS) -> Optional[list[str]]:
+        """lot_id k лотов с наибольшим баллом; None — куча растратилась на удаления, нужен rebuild_top."""
+        if len(self._top) < min(k, self.count):
+            return None
+        ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return [lot_id for lot_id, _ in ranked[:k]]
+
+    def rebuild_top(self, analyses: Iterable) -> None:
+        """Заново заполняет кучу топа по всем результатам (O(n log k))."""
+        best = heapq.nlargest(_TOP_CAPACITY, ((a.final_score, a.lot_id) for a in analyses))
+        self._top = {lot_id: score for score, lot_id in best}
+        self._heap = [(score, lot_id) for score, lot_id in best]
+        heapq.heapify(self._heap)
+
+    def categories(self) -> dict[str, dict]:
+        return {
+            name: {
+                "count": count,
+                "high_risk": high_risk,
+                "avg_score": round(score_sum / count, 1),
+                "category_code": code,
+            }
+            for name, (count, high_risk, score_sum, code) in self._categories.items()
+        }
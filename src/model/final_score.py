@@ -0,0 +1,65 @@
+"""Итоговый балл: взвешенная сумма компонент (правила, ML, семантика, сеть) и уровень риска.
+
+Компоненты лотов хранятся столбцами numpy (матрица n x 4 в порядке COMPONENTS), поэтому
+баллы и уровни всего корпуса при новых весах или порогах пересчитываются одной векторной операцией.
+Скалярная и векторная версии дают одинаковый результат: слагаемые складываются в одном порядке.
+"""
+from typing import Optional
+
+import numpy as np
+
+from src.utils.config import RISK_THRESHOLDS, SCORE_WEIGHTS
+
+COMPONENTS = ("rules", "ml", "semantic", "network")
+
+
+def normalize_weights(weights: Optional[dict], base: Optional[dict] = None) -> dict[str, float]:
+    """Веса по всем компонентам: переданные поверх base (по умолчанию SCORE_WEIGHTS)."""
+    result = {name: float(value) for name, value in (base or SCORE_WEIGHTS).items()}
+    for name, value in (weights or {}).items():
+        if name not in COMPONENTS:
+            raise ValueError(f"Unknown score component: {name} (expected one of {', '.join(COMPONENTS)})")
+        value = float(value)
+        if not np.isfinite(value) or value < 0:
+            raise ValueError(f"Weight of {name} must be a non-negative number")
+        result[name] = value
+    return {name: result.get(name, 0.0) for name in COMPONENTS}
+
+
+def normalize_thresholds(thresholds: Optional[dict], base: Optional[dict] = None) -> dict[str, tuple[float, float]]:
+    """Пороги уровней риска: переданные поверх base (по умолчанию RISK_THRESHOLDS), порядок уровней — из base."""
+    result = {level: (float(lo), float(hi)) for level, (lo, hi) in (base or RISK_THRESHOLDS).items()}
+    for level, bounds in (thresholds or {}).items():
+        if level not in RISK_THRESHOLDS:
+            raise ValueError(f"Unknown risk level: {level} (expected one of {', '.join(RISK_THRESHOLDS)})")
+        lo, hi = (float(b) for b in bounds)
+        if lo > hi:
+            raise ValueError(f"Threshold of {level}: lower bound {lo} is above upper bound {hi}")
+        result[level] = (lo, hi)
+    return result
+
+
+def combine_score(components, weights: dict[str, float]) -> float:
+    """Итоговый балл одного лота, 0..100."""
+    final = 0.0
+    for value, name in zip(components, COMPONENTS):
+        final += value * weights[name]
+    return min(100.0, max(0.0, final))
+
+
+def combine_scores(components: np.ndarray, weights: dict[str, float]) -> np.ndarray:
+    """Итоговые баллы по матрице компонент n x 4 (строки с NaN дают NaN)."""
+    final = np.zeros(len(components), dtype=np.float64)
+    for j, name in enumerate(COMPONENTS):
+        final += components[:, j] * weights[name]
+    return np.clip(final, 0.0, 100.0)
+
+
+def risk_levels(scores: np.ndarray, thresholds: dict) -> np.ndarray:
+    """Векторный get_risk_level: первый диапазон, содержащий балл; вне диапазонов — как в get_risk_level."""
+    levels = list(thresholds)
+    top = max(levels, key=lambda level: thresholds[level][1])
+    below_top = max((hi for level, (_, hi) in thresholds.items() if level != top), default=thresholds[top][0])
+    conditions = [(scores >= lo) & (scores <= hi) for lo, hi in thresholds.values()]
+    conditions.append(scores > below_top)
+    return np.select(conditions, levels + [top], default=levels[0])
@@ -0,0 +1,61 @@
+"""Очередь лотов на фоновый анализ с приоритетами."""
+import heapq
+from typing import Iterable
+
+# Уровни приоритета (меньше — раньше)
+PRIORITY_REQUESTED = 0  # лот запрошен через API
+PRIORITY_NEW = 1  # лот появился или изменился с прошлого запуска
+PRIORITY_DEFAULT = 2
+
+
+class LotQueue:
+    """Куча индексов лотов по ключу приоритета.
+
+    Ключ — кортеж (уровень, -бюджет категории, индекс): внутри уровня раньше идут лоты
+    категорий с большим суммарным бюджетом, затем — в порядке файла.
+    Повторный push с меньшим ключом поднимает лот; устаревшие записи кучи пропускаются при pop.
+    Не потокобезопасна: вызывать под блокировкой владельца.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[tuple, int]] = []
+        self._keys: dict[int, tuple] = {}
+
+    def push(self, index: int, key: tuple) -> bool:
+        """Ставит лот в очередь; если он уже там с ключом не хуже — ничего не меняет."""
+        current = self._keys.get(index)
+        if current is not None and current <= key:
+            return False
+        self._keys[index] = key
+        heapq.heappush(self._heap, (key, index))
+        return True
+
+    def push_many(self, items: Iterable[tuple[tuple, int]]) -> None:
+        for key, index in items:
+            self.push(index, key)
+
+    def pop(self, n: int) -> list[tuple[tuple, int]]:
+        """До n пар (ключ, индекс) в порядке приоритета."""
+        items = []
+        while self._heap and len(items) < n:
+            key, index = heapq.heappop(self._heap)
+            if self._keys.get(index) != key:
+                continue  # лот уже поднят в очереди или снят с нее
+            del self._keys[index]
+            items.append((key, index))
+        if not self._keys:
+            self._heap.clear()
+        return items
+
+    def discard(self, index: int) -> None:
+        """Снимает лот с очереди (запись в куче пропустится при pop)."""
+        self._keys.pop(index, None)
+
+    def key_of(self, index: int):
+        return self._keys.get(index)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
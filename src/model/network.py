@@ -1,4 +1,5 @@
 """Анализ связей заказчик-поставщик на графе NetworkX."""
+import importlib.util
 import logging
 from dataclasses import dataclass, field
 from collections import Counter
@@ -6,11 +7,9 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
-try:
-    import networkx as nx
-    HAS_NETWORKX = True
-except ImportError:
-    HAS_NETWORKX = False
+# networkx импортируется при первом построении графа: наличие проверяется без загрузки пакета
+HAS_NETWORKX = importlib.util.find_spec("networkx") is not None
+if not HAS_NETWORKX:
     logger.warning("[Network] NetworkX not installed. pip install networkx")
 
 
@@ -72,12 +71,29 @@ class NetworkAnalyzer:
         self._edges: dict[tuple, NetworkEdge] = {}
         self._communities: dict[str, int] = {}
 
+    def state(self) -> dict:
+        """Построенный граф для снимка анализатора."""
+        return {
+            "graph": self._graph,
+            "nodes": self._nodes,
+            "edges": self._edges,
+            "communities": self._communities,
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._graph = state["graph"]
+        self._nodes = state["nodes"]
+        self._edges = state["edges"]
+        self._communities = state["communities"]
+
     def build_graph(self, lots: list[dict]):
         """Строит граф по лотам и контрактам."""
         if not HAS_NETWORKX:
             logger.error("[Network] Cannot build graph: NetworkX not installed")
             return
 
+        import networkx as nx
+
         self._graph = nx.Graph()
         self._nodes.clear()
         self._edges.clear()
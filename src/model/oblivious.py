@@ -0,0 +1,176 @@
+"""Вычисление CatBoost (симметричные деревья) на чистом numpy без накладных расходов CatBoost."""
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ограничение промежуточной матрицы номеров листьев (строки x деревья)
+_EVAL_BLOCK_CELLS = 8_000_000
+
+
+class ObliviousTrees:
+    """Плоское представление бинарного CatBoost-классификатора.
+
+    Дерево t глубины d задается d сплитами (признак, порог) и 2**d листьями;
+    номер листа — биты условий x[feature] > border, бит i соответствует сплиту i.
+    Деревья меньшей глубины дополняются сплитами с порогом +inf (бит всегда 0).
+    """
+
+    def __init__(
+        self,
+        split_features: np.ndarray,
+        thresholds: np.ndarray,
+        leaf_values: np.ndarray,
+        bias: float = 0.0,
+        scale: float = 1.0,
+        nan_as_max: np.ndarray | None = None,
+    ):
+        self.split_features = np.asarray(split_features, dtype=np.int32)
+        self.thresholds = np.asarray(thresholds, dtype=np.float32)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)
+        self.bias = float(bias)
+        self.scale = float(scale)
+        n_features = int(self.split_features.max()) + 1 if self.split_features.size else 0
+        self.nan_as_max = (
+            np.asarray(nan_as_max, dtype=bool)
+            if nan_as_max is not None
+            else np.zeros(n_features, dtype=bool)
+        )
+        depth = self.split_features.shape[1] if self.split_features.ndim == 2 else 0
+        self._depth = depth
+        # Уникальные условия (признак, порог): каждое сравнение считается один раз на строку
+        pairs = np.stack(
+            [self.split_features.ravel().astype(np.float64), self.thresholds.ravel().astype(np.float64)],
+            axis=1,
+        ).reshape(-1, 2)
+        unique_pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        self._cond_features = unique_pairs[:, 0].astype(np.int32)
+        self._cond_thresholds = unique_pairs[:, 1].astype(np.float32)
+        self._cond_index = inverse.reshape(self.split_features.shape).T.copy()  # (depth, n_trees)
+        self._flat_leaves = self.leaf_values.ravel()
+        self._leaf_offsets = (np.arange(len(self.split_features), dtype=np.intp) << depth)[:, None]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.split_features)
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @classmethod
+    def from_catboost(cls, model) -> "ObliviousTrees":
+        """Экспорт обученной модели CatBoost (объект или путь к .cbm) через JSON-формат CatBoost."""
+        if isinstance(model, (str, Path)):
+            from catboost import CatBoostClassifier
+
+            path = str(model)
+            model = CatBoostClassifier()
+            model.load_model(path)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = Path(tmp_dir) / "model.json"
+            model.save_model(str(json_path), format="json")
+            data = json.loads(json_path.read_text(encoding="utf-8"))
+        return cls.from_json(data)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ObliviousTrees":
+        """Разбор JSON-дампа CatBoost (только float-признаки, одна размерность ответа)."""
+        if "oblivious_trees" not in data:
+            raise ValueError("Only symmetric (oblivious) CatBoost trees are supported")
+        features_info = data.get("features_info", {})
+        if set(features_info) - {"float_features"}:
+            raise ValueError(f"Unsupported feature types: {sorted(features_info)}")
+
+        trees = data["oblivious_trees"]
+        depth = max((len(t["splits"]) for t in trees), default=0)
+        n_trees = len(trees)
+
+        split_features = np.zeros((n_trees, depth), dtype=np.int32)
+        thresholds = np.full((n_trees, depth), np.inf, dtype=np.float32)
+        leaf_values = np.zeros((n_trees, 1 << depth), dtype=np.float64)
+
+        for t, tree in enumerate(trees):
+            splits = tree["splits"]
+            if len(tree["leaf_values"]) != 1 << len(splits):
+                raise ValueError("Multi-dimensional CatBoost models are not supported")
+            for i, split in enumerate(splits):
+                if split.get("split_type") != "FloatFeature":
+                    raise ValueError(f"Unsupported split type: {split.get('split_type')}")
+                split_features[t, i] = split["float_feature_index"]
+                thresholds[t, i] = split["border"]
+            leaf_values[t, : len(tree["leaf_values"])] = tree["leaf_values"]
+
+        # NaN > border == False, т.е. AsFalse (Min) получается сам; отдельно нужен только AsTrue (Max)
+        float_features = features_info.get("float_features", [])
+        n_features = max(
+            [f["feature_index"] + 1 for f in float_features] + [int(split_features.max(initial=-1)) + 1]
+        )
+        nan_as_max = np.zeros(n_features, dtype=bool)
+        for f in float_features:
+            nan_as_max[f["feature_index"]] = f.get("nan_value_treatment") in {"AsTrue", "Max"}
+
+        scale, biases = data.get("scale_and_bias", [1.0, [0.0]])
+        bias = biases[0] if isinstance(biases, list) else biases
+        return cls(split_features, thresholds, leaf_values, bias=bias, scale=scale, nan_as_max=nan_as_max)
+
+    def predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """Сырые значения (логиты) для матрицы признаков."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        raw = np.full(len(X), self.bias, dtype=np.float64)
+        if not self.n_trees or not len(X):
+            return raw
+
+        if self.nan_as_max.any():
+            nan_mask = np.isnan(X[:, : len(self.nan_as_max)])
+            if nan_mask.any():
+                X = X.copy()
+                X[:, : len(self.nan_as_max)][nan_mask & self.nan_as_max[None, :]] = np.inf
+
+        code_dtype = np.uint8 if self.depth <= 8 else np.uint16
+        block = max(1, _EVAL_BLOCK_CELLS // max(1, self.n_trees))
+        for start in range(0, len(X), block):
+            columns = np.ascontiguousarray(X[start : start + block].T)
+            # (условия x строки): каждое уникальное сравнение — один проход по столбцу
+            conditions = columns[self._cond_features] > self._cond_thresholds[:, None]
+            leaves = np.zeros((self.n_trees, columns.shape[1]), dtype=code_dtype)
+            for level, cond_index in enumerate(self._cond_index):
+                leaves |= conditions[cond_index].astype(code_dtype) << code_dtype(level)
+            values = self._flat_leaves[leaves + self._leaf_offsets]
+            raw[start : start + block] += self.scale * values.sum(axis=0)
+        return raw
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Вероятности классов [P(0), P(1)] — как CatBoostClassifier.predict_proba."""
+        positive = 1.0 / (1.0 + np.exp(-self.predict_raw(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def save(self, path: str | Path) -> None:
+        np.savez(
+            path,
+            split_features=self.split_features,
+            thresholds=self.thresholds,
+            leaf_values=self.leaf_values,
+            bias=np.array(self.bias),
+            scale=np.array(self.scale),
+            nan_as_max=self.nan_as_max,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ObliviousTrees":
+        with np.load(path) as data:
+            return cls(
+                data["split_features"],
+                data["thresholds"],
+                data["leaf_values"],
+                bias=float(data["bias"]),
+                scale=float(data["scale"]),
+                nan_as_max=data["nan_as_max"],
+            )
@@ -0,0 +1,164 @@
+"""Реестр версий ML-моделей с отпечатком обучающих данных."""
+import hashlib
+import json
+import logging
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.utils.config import MODEL_REGISTRY_DIR, MODEL_REGISTRY_KEEP
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST = "manifest.json"
+
+
+def compute_fingerprint(
+    X: np.ndarray,
+    labels_csv: Optional[str | Path],
+    feature_names: list[str],
+    hyperparams: dict,
+) -> str:
+    """Отпечаток обучения: матрица признаков, файл меток, имена признаков, гиперпараметры."""
+    h = hashlib.sha256()
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    h.update(repr(X.shape).encode())
+    h.update(X.tobytes())
+
+    labels_path = Path(labels_csv) if labels_csv else None
+    if labels_path and labels_path.exists():
+        h.update(labels_path.read_bytes())
+    else:
+        h.update(b"<no-labels>")
+
+    h.update(json.dumps(feature_names).encode())
+    h.update(json.dumps(hyperparams, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """Хранит версии моделей в MODEL_REGISTRY_DIR/<version>/ и манифест с активной версией."""
+
+    def __init__(self, root: Optional[Path] = None, keep: int = MODEL_REGISTRY_KEEP):
+        self.root = Path(root or MODEL_REGISTRY_DIR)
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+
+    def _read_manifest(self) -> dict:
+        path = self.root / _MANIFEST
+        if not path.exists():
+            return {"active": None, "versions": []}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"[Registry] Failed to read manifest: {e}")
+            return {"active": None, "versions": []}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / f"{_MANIFEST}.tmp"
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(self.root / _MANIFEST)
+
+    def path_for(self, version: str) -> Path:
+        return self.root / version
+
+    def list_versions(self) -> list[dict]:
+        """Версии от старых к новым."""
+        return self._read_manifest().get("versions", [])
+
+    def active(self) -> Optional[dict]:
+        manifest = self._read_manifest()
+        return self._find_version(manifest, manifest.get("active"))
+
+    def find(self, fingerprint: str) -> Optional[dict]:
+        """Последняя сохраненная версия с таким отпечатком.
+
+        Дообученные по обратной связи версии не считаются результатом полного обучения.
+        """
+        for entry in reversed(self.list_versions()):
+            if entry.get("meta", {}).get("training_source") == "feedback_incremental":
+                continue
+            if entry.get("fingerprint") == fingerprint and self.path_for(entry["version"]).exists():
+                return entry
+        return None
+
+    def register(self, scorer, fingerprint: str, meta: Optional[dict] = None) -> dict:
+        """Сохраняет обученный RiskScorer как новую активную версию."""
+        created = datetime.now(timezone.utc)
+        version = f"{created.strftime('%Y%m%dT%H%M%S')}-{fingerprint[:8]}"
+        path = self.path_for(version)
+        scorer.save(path)
+
+        entry = {
+            "version": version,
+            "fingerprint": fingerprint,
+            "created_at": created.isoformat(),
+            "meta": meta or {},
+        }
+        (path / "meta.json").write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        with self._lock:
+            manifest = self._read_manifest()
+            manifest["versions"] = [
+                v for v in manifest.get("versions", []) if v.get("version") != version
+            ] + [entry]
+            manifest["active"] = version
+            manifest["pinned"] = False
+            self._prune(manifest)
+            self._write_manifest(manifest)
+
+        logger.info(f"[Registry] Registered model version {version}")
+        return entry
+
+    def pinned(self) -> Optional[dict]:
+        """Активная версия, если она закреплена вручную (откат)."""
+        manifest = self._read_manifest()
+        if not manifest.get("pinned"):
+            return None
+        return self._find_version(manifest, manifest.get("active"))
+
+    def activate(self, version: str, pin: bool = True) -> dict:
+        """Делает версию активной.
+
+        pin=True — откат: версия загружается при старте независимо от отпечатка,
+        пока не будет зарегистрирована новая модель.
+        """
+        with self._lock:
+            manifest = self._read_manifest()
+            entry = self._find_version(manifest, version)
+            if entry is None or not self.path_for(version).exists():
+                raise KeyError(f"Unknown model version: {version}")
+            manifest["active"] = version
+            manifest["pinned"] = pin
+            self._write_manifest(manifest)
+        logger.info(f"[Registry] Active model version: {version}")
+        return entry
+
+    def _prune(self, manifest: dict) -> None:
+        """Удаляет старые версии сверх лимита keep (активная не удаляется)."""
+        versions = manifest.get("versions", [])
+        active = manifest.get("active")
+        excess = len(versions) - self.keep
+        kept = []
+        for entry in versions:
+            if excess > 0 and entry.get("version") != active:
+                shutil.rmtree(self.path_for(entry["version"]), ignore_errors=True)
+                logger.info(f"[Registry] Pruned model version {entry['version']}")
+                excess -= 1
+                continue
+            kept.append(entry)
+        manifest["versions"] = kept
+
+    @staticmethod
+    def _find_version(manifest: dict, version: Optional[str]) -> Optional[dict]:
+        if not version:
+            return None
+        for entry in manifest.get("versions", []):
+            if entry.get("version") == version:
+                return entry
+        return None
@@ -0,0 +1,311 @@
+"""Хранилище результатов анализа: SQLite (WAL), одна строка на лот.
+
+Полный результат лежит в сжатом payload (zlib + JSON, без lot_data — он восстанавливается
+из исходных лотов), а итоговый балл, уровень и категория вынесены в индексируемые столбцы.
+Каждая строка помечена хэшем анализируемых полей лота и версией конвейера — по ним
+при перезагрузке данных определяется, какие лоты нужно переанализировать.
+Результаты дописываются после каждого батча, поэтому при падении теряется не больше одного батча.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from src.utils.config import ANALYSIS_PIPELINE_VERSION
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    lot_id TEXT PRIMARY KEY,
+    final_score REAL NOT NULL,
+    final_level TEXT NOT NULL,
+    category_code TEXT,
+    model_version TEXT,
+    content_hash TEXT,
+    pipeline_version INTEGER,
+    updated_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_score ON results(final_score);
+CREATE INDEX IF NOT EXISTS idx_results_level ON results(final_level);
+CREATE INDEX IF NOT EXISTS idx_results_category ON results(category_code);
+CREATE INDEX IF NOT EXISTS idx_results_updated ON results(updated_at);
+CREATE TABLE IF NOT EXISTS priority_requests (
+    lot_id TEXT PRIMARY KEY,
+    requested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Столбцы, добавленные после первой версии схемы
+_ADDED_COLUMNS = (("content_hash", "TEXT"), ("pipeline_version", "INTEGER"))
+
+# Сколько lot_id передавать в один запрос IN (...): лимит переменных SQLite
+_IN_CHUNK = 500
+
+
+def encode_payload(record: dict) -> bytes:
+    return zlib.compress(json.dumps(record, ensure_ascii=True).encode("utf-8"), 3)
+
+
+def decode_payload(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+class ResultStore:
+    """Постоянное хранилище FullAnalysis по lot_id.
+
+    Соединение открывается при первом обращении; доступ из разных потоков сериализуется блокировкой.
+    """
+
+    def __init__(self, path: Path, pipeline_version: int = ANALYSIS_PIPELINE_VERSION):
+        self.path = Path(path)
+        self.pipeline_version = pipeline_version
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+            for name, decl in _ADDED_COLUMNS:
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {name} {decl}")
+            self._conn = conn
+        return self._conn
+
+    def upsert_many(self, analyses: Iterable) -> int:
+        """Записывает результаты (объекты FullAnalysis с content_hash) одной транзакцией."""
+        now = time.time()
+        rows = []
+        for analysis in analyses:
+            record = analysis.to_dict()
+            record.pop("lot_data", None)
+            rows.append((
+                analysis.lot_id,
+                float(analysis.final_score),
+                analysis.final_level,
+                analysis.lot_data.get("category_code", ""),
+                analysis.model_version,
+                analysis.content_hash,
+                self.pipeline_version,
+                now,
+                encode_payload(record),
+            ))
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results "
+                    "(lot_id, final_score, final_level, category_code, model_version, "
+                    "content_hash, pipeline_version, updated_at, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (str(now),)
+                )
+        return len(rows)
+
+    def update_scores(self, rows: Iterable[tuple[str, float, str]]) -> int:
+        """Обновляет final_score / final_level по (lot_id, балл, уровень) без перезаписи payload."""
+        rows = [(float(score), level, lot_id) for lot_id, score, level in rows]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("UPDATE results SET final_score = ?, final_level = ? WHERE lot_id = ?", rows)
+        return len(rows)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get(self, lot_id: str) -> Optional[dict]:
+        """Payload одного лота или None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT payload FROM results WHERE lot_id = ?", (lot_id,)
+            ).fetchone()
+        return decode_payload(row[0]) if row else None
+
+    def get_many(self, lot_ids: list[str]) -> dict[str, dict]:
+        """Payload для набора лотов (отсутствующие пропускаются)."""
+        found = {}
+        for start in range(0, len(lot_ids), _IN_CHUNK):
+            chunk = lot_ids[start : start + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._connect().execute(
+                    f"SELECT lot_id, payload FROM results WHERE lot_id IN ({placeholders})", chunk
+                ).fetchall()
+            for lot_id, blob in rows:
+                try:
+                    found[lot_id] = decode_payload(blob)
+                except (zlib.error, ValueError) as exc:
+                    logger.warning(f"[ResultStore] Corrupted payload for {lot_id}: {exc}")
+        return found
+
+    def iter_payloads(self, batch_size: int = 1000) -> Iterator[dict]:
+        """Все payload в порядке lot_id, порциями (без загрузки таблицы целиком)."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT lot_id, payload FROM results WHERE lot_id > ? ORDER BY lot_id LIMIT ?",
+                    (last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for _, blob in rows:
+                yield decode_payload(blob)
+            last = rows[-1][0]
+
+    def changed_since(
+        self, since: float, after_lot_id: str = "", limit: int = 5000
+    ) -> list[tuple[str, float, Optional[str], dict]]:
+        """(lot_id, updated_at, content_hash, payload) записей после позиции (since, after_lot_id)
+        в порядке (updated_at, lot_id).
+
+        Для процессов-читателей: догоняют результаты, записанные процессом-владельцем.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT lot_id, updated_at, content_hash, payload FROM results "
+                "WHERE (updated_at > ? OR (updated_at = ? AND lot_id > ?)) AND pipeline_version = ? "
+                "ORDER BY updated_at, lot_id LIMIT ?",
+                (since, since, after_lot_id, self.pipeline_version, limit),
+            ).fetchall()
+        return [(lot_id, updated_at, content_hash, decode_payload(blob)) for lot_id, updated_at, content_hash, blob in rows]
+
+    def add_priority_requests(self, lot_ids: Iterable[str]) -> None:
+        """Запросы «проанализировать раньше» от процессов-читателей владельцу очереди."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO priority_requests (lot_id, requested_at) VALUES (?, ?)",
+                    [(lot_id, now) for lot_id in lot_ids],
+                )
+
+    def pop_priority_requests(self, limit: int = 1000) -> list[str]:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                lot_ids = [row[0] for row in conn.execute(
+                    "SELECT lot_id FROM priority_requests ORDER BY requested_at LIMIT ?", (limit,)
+                )]
+                for start in range(0, len(lot_ids), _IN_CHUNK):
+                    chunk = lot_ids[start : start + _IN_CHUNK]
+                    conn.execute(
+                        f"DELETE FROM priority_requests WHERE lot_id IN ({','.join('?' * len(chunk))})", chunk
+                    )
+        return lot_ids
+
+    def fingerprints(self) -> dict[str, Optional[str]]:
+        """lot_id -> content_hash для результатов текущей версии конвейера (payload не читается).
+
+        Результаты другой версии конвейера не возвращаются, т.е. считаются устаревшими.
+        """
+        with self._lock:
+            return dict(self._connect().execute(
+                "SELECT lot_id, content_hash FROM results WHERE pipeline_version = ?",
+                (self.pipeline_version,),
+            ))
+
+    def lot_ids(self) -> set[str]:
+        """lot_id всех сохраненных результатов."""
+        with self._lock:
+            return {row[0] for row in self._connect().execute("SELECT lot_id FROM results")}
+
+    def find(
+        self,
+        level: Optional[str] = None,
+        category_code: Optional[str] = None,
+        min_score: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> list[tuple[str, float]]:
+        """(lot_id, final_score) по индексируемым столбцам, по убыванию балла."""
+        clauses, params = [], []
+        if level is not None:
+            clauses.append("final_level = ?")
+            params.append(level)
+        if category_code is not None:
+            clauses.append("category_code = ?")
+            params.append(category_code)
+        if min_score is not None:
+            clauses.append("final_score >= ?")
+            params.append(float(min_score))
+        sql = "SELECT lot_id, final_score FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY final_score DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def updated_at(self) -> Optional[float]:
+        """Время последней записи (unix time) или None для пустого хранилища."""
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = 'updated_at'").fetchone()
+        return float(row[0]) if row else None
+
+    def delete(self, lot_ids: Iterable[str]) -> int:
+        lot_ids = list(lot_ids)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for start in range(0, len(lot_ids), _IN_CHUNK):
+                    chunk = lot_ids[start : start + _IN_CHUNK]
+                    conn.execute(
+                        f"DELETE FROM results WHERE lot_id IN ({','.join('?' * len(chunk))})", chunk
+                    )
+        return len(lot_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM results")
+                conn.execute("DELETE FROM meta WHERE key = 'updated_at'")
+
+    def checkpoint(self) -> None:
+        """Переносит WAL в основной файл базы (например, перед остановкой)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -94,9 +94,10 @@ class RuleEngine:
     def __init__(self):
         self.ner = NERExtractor()
 
-    def analyze(self, lot, features=None, history=None):
+    def analyze(self, lot, features=None, history=None, ner=None):
         desc = clean_text(lot.get("desc_ru","") + " " + lot.get("extra_desc_ru",""))
-        ner = self.ner.extract(desc)
+        if ner is None:  # готовый NER-результат того же текста можно передать извне
+            ner = self.ner.extract(desc)
         h = history or {}
         M, P, HL = [], [], []
         total = 0
@@ -324,7 +325,7 @@ class RuleEngine:
 
         # R20 -> PP-4: необоснованный единственный источник
         total += 1
-        meth = lot.get("trade_method","")
+        meth = lot.get("trade_method",""); bu = lot.get("budget", 0) or 0
         if meth and "из одного источника" in meth.lower() and bu and bu > 4000*3450:
             add("R20","PP-4","Необоснованная закупка из одного источника","procedure", 0.70, 22, f"Из одного источника при бюджете {bu:,.0f} ₸ (выше порога). PP-4: неконкурентный способ.", f"Метод: {meth}", "danger", "ст. 39")
         else: skip("R20","Конкурентный способ")
@@ -1,25 +1,67 @@
 """ML-скоринг риска: CatBoost + IsolationForest."""
 import logging
+import multiprocessing
 import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
 
-from src.utils.config import MODELS_DIR, CATBOOST_ITERATIONS, CATBOOST_DEPTH, CATBOOST_LR
+from src.utils.config import (
+    MODELS_DIR,
+    CATBOOST_ITERATIONS,
+    CATBOOST_DEPTH,
+    CATBOOST_LR,
+    FEEDBACK_RETRAIN_ITERATIONS,
+)
 from src.preprocessing.feature_engineer import LotFeatures
+from src.model.oblivious import ObliviousTrees
 
 logger = logging.getLogger(__name__)
 
+# До этого размера батча numpy-деревья быстрее нативного CatBoost (см. scripts/bench_oblivious.py);
+# большие батчи выгоднее отдавать многопоточному predict_proba CatBoost.
+_TREES_MAX_BATCH = 8
+
 
 class RiskScorer:
     """Скоринг риска на базе ML моделей."""
 
     def __init__(self):
         self._catboost_model = None
+        self._trees: Optional[ObliviousTrees] = None  # numpy-копия CatBoost для инференса
         self._isolation_forest = None
         self._is_fitted = False
         self._feature_names = LotFeatures.feature_names()
+        self._top_features: dict[str, float] = {}
+        self.trees_max_batch = _TREES_MAX_BATCH  # до какого батча считать деревья на numpy
+        # False — процесс создан через fork и нативный CatBoost (его пул потоков) здесь не вызывается:
+        # прогноз только numpy-деревьями, ShapValues — в отдельном процессе (spawn)
+        self.native_catboost = True
+        self.version: Optional[str] = None  # версия в реестре моделей
+        self._model_path: Optional[Path] = None  # каталог, из которого загружены модели
+        self._explain_pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def training_params(n_samples: int) -> dict:
+        """Гиперпараметры обучения для выборки заданного размера."""
+        return {
+            "catboost": {
+                "iterations": min(CATBOOST_ITERATIONS, max(50, n_samples * 2)),
+                "depth": CATBOOST_DEPTH,
+                "learning_rate": CATBOOST_LR,
+                "loss_function": "Logloss",
+                "eval_metric": "AUC",
+                "random_seed": 42,
+            },
+            "isolation_forest": {
+                "n_estimators": 100,
+                "contamination": 0.15,
+                "random_state": 42,
+            },
+        }
 
     def fit(
         self,
@@ -35,6 +77,7 @@ class RiskScorer:
         logger.info(f"[Scorer] Starting training with {len(features_list)} samples")
         
         X = np.array([f.to_feature_vector() for f in features_list])
+        self._top_features = {}
 
         if labels is None and rule_scores is not None:
             threshold = 50.0
@@ -88,20 +131,13 @@ class RiskScorer:
                 logger.warning("[Scorer] Still one class after balancing. Skipping CatBoost training.")
                 self._catboost_model = None
             else:
+                params = self.training_params(len(X))["catboost"]
                 logger.info(
-                    f"[Scorer] CatBoost config: iterations={min(CATBOOST_ITERATIONS, max(50, len(X) * 2))}, "
-                    f"depth={CATBOOST_DEPTH}, lr={CATBOOST_LR}"
+                    f"[Scorer] CatBoost config: iterations={params['iterations']}, "
+                    f"depth={params['depth']}, lr={params['learning_rate']}"
                 )
 
-                self._catboost_model = CatBoostClassifier(
-                    iterations=min(CATBOOST_ITERATIONS, max(50, len(X) * 2)),
-                    depth=CATBOOST_DEPTH,
-                    learning_rate=CATBOOST_LR,
-                    loss_function="Logloss",
-                    eval_metric="AUC",
-                    verbose=False,
-                    random_seed=42,
-                )
+                self._catboost_model = CatBoostClassifier(**params, verbose=False)
 
                 rng = np.random.default_rng(42)
                 indices = rng.permutation(len(X))
@@ -128,6 +164,8 @@ class RiskScorer:
                             early_stopping_rounds=20,
                         )
                 logger.info(f"[Scorer] ✅ CatBoost trained successfully on {len(X)} samples")
+                self._cache_feature_importance()
+                self._export_trees()
 
         except ImportError as e:
             logger.error(f"[Scorer] ❌ CatBoost import error: {e}")
@@ -141,9 +179,7 @@ class RiskScorer:
 
             logger.info("[Scorer] Training Isolation Forest...")
             self._isolation_forest = IsolationForest(
-                n_estimators=100,
-                contamination=0.15,
-                random_state=42,
+                **self.training_params(len(X))["isolation_forest"]
             )
             self._isolation_forest.fit(X)
             logger.info(f"[Scorer] ✅ Isolation Forest trained successfully on {len(X)} samples")
@@ -155,47 +191,157 @@ class RiskScorer:
 
         self._is_fitted = True
 
+    def fit_incremental(self, X: np.ndarray, labels: list[int], iterations: int = FEEDBACK_RETRAIN_ITERATIONS):
+        """Продолжает обучение CatBoost с текущей модели (init_model) на обновленных метках.
+
+        Isolation Forest не зависит от меток и остается прежним.
+        """
+        if self._catboost_model is None:
+            raise ValueError("No CatBoost model to continue training from")
+
+        from catboost import CatBoostClassifier
+
+        y = np.asarray(labels)
+        if len(set(y.tolist())) < 2:
+            raise ValueError("Incremental training needs both classes in labels")
+
+        params = dict(self.training_params(len(X))["catboost"], iterations=iterations)
+        logger.info(f"[Scorer] Continuing CatBoost training: +{iterations} iterations on {len(X)} samples")
+        model = CatBoostClassifier(**params, verbose=False)
+        model.fit(X, y, init_model=self._catboost_model)
+
+        self._catboost_model = model
+        self._cache_feature_importance()
+        self._export_trees()
+        self._is_fitted = True
+        logger.info(f"[Scorer] ✅ CatBoost continued to {model.tree_count_} trees")
+
+    def _cache_feature_importance(self):
+        """Считает топ-5 глобальной важности признаков CatBoost один раз после fit/load."""
+        self._top_features = {}
+        if self._catboost_model is None:
+            return
+        try:
+            importances = self._catboost_model.get_feature_importance()
+            top_features = sorted(
+                zip(self._feature_names, importances),
+                key=lambda x: x[1], reverse=True
+            )[:5]
+            self._top_features = {
+                name: round(float(imp), 2) for name, imp in top_features
+            }
+        except Exception as e:
+            logger.error(f"[Scorer] CatBoost feature importance failed: {e}")
+
+    def _export_trees(self):
+        """Переносит деревья CatBoost в numpy: без накладных расходов CatBoost на каждый вызов."""
+        self._trees = None
+        if self._catboost_model is None:
+            return
+        try:
+            self._trees = ObliviousTrees.from_catboost(self._catboost_model)
+        except Exception as e:
+            logger.warning(f"[Scorer] CatBoost export to numpy failed, using native predict: {e}")
+
     def predict(self, features: LotFeatures) -> dict:
         """Возвращает ML-оценку риска для одного лота."""
-        result = {
-            "catboost_proba": 0.0,
-            "isolation_anomaly": False,
-            "isolation_score": 0.0,
-            "feature_importance": {},
-        }
+        return self.predict_batch([features])[0]
+
+    def predict_batch(self, features_list: list[LotFeatures]) -> list[dict]:
+        """ML-оценка риска для набора лотов: одна матрица, один вызов на модель."""
+        results = [
+            {
+                "catboost_proba": 0.0,
+                "isolation_anomaly": False,
+                "isolation_score": 0.0,
+                "feature_importance": {},
+            }
+            for _ in features_list
+        ]
+        if not features_list:
+            return results
 
-        X = np.array([features.to_feature_vector()])
+        X = np.array([f.to_feature_vector() for f in features_list])
 
         if self._catboost_model is not None:
             try:
-                proba = self._catboost_model.predict_proba(X)[0]
-                result["catboost_proba"] = float(proba[1]) if len(proba) > 1 else float(proba[0])
-
-                importances = self._catboost_model.get_feature_importance()
-                top_features = sorted(
-                    zip(self._feature_names, importances),
-                    key=lambda x: x[1], reverse=True
-                )[:5]
-                result["feature_importance"] = {
-                    name: round(imp, 2) for name, imp in top_features
-                }
+                use_trees = self._trees is not None and (
+                    len(X) <= self.trees_max_batch or not self.native_catboost
+                )
+                if not use_trees and not self.native_catboost:
+                    raise RuntimeError("no numpy trees and native CatBoost is disabled in this process")
+                model = self._trees if use_trees else self._catboost_model
+                proba = model.predict_proba(X)
+                positive = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+                for result, p in zip(results, positive):
+                    result["catboost_proba"] = float(p)
+                    result["feature_importance"] = dict(self._top_features)
             except Exception as e:
                 logger.error(f"[Scorer] CatBoost predict failed: {e}")
 
         if self._isolation_forest is not None:
             try:
-                anomaly_pred = self._isolation_forest.predict(X)[0]
-                anomaly_score = self._isolation_forest.score_samples(X)[0]
-                result["isolation_anomaly"] = bool(anomaly_pred == -1)
-                result["isolation_score"] = float(anomaly_score)
+                # predict() == -1 ровно там, где score_samples() < offset_,
+                # поэтому хватает одного прохода по деревьям.
+                scores = self._isolation_forest.score_samples(X)
+                anomalies = scores < self._isolation_forest.offset_
+                for result, score, anomaly in zip(results, scores, anomalies):
+                    result["isolation_anomaly"] = bool(anomaly)
+                    result["isolation_score"] = float(score)
             except Exception as e:
                 logger.error(f"[Scorer] Isolation Forest predict failed: {e}")
 
-        return result
+        return results
 
-    def predict_batch(self, features_list: list[LotFeatures]) -> list[dict]:
-        """ML-оценка риска для набора лотов."""
-        return [self.predict(f) for f in features_list]
+    def explain_batch(self, features_list: list[LotFeatures], top_k: int = 5) -> list[dict]:
+        """Вклады признаков в логит CatBoost для каждого лота (ShapValues, один вызов на батч).
+
+        Возвращает base_value и top_k признаков с наибольшим по модулю вкладом.
+        """
+        if self._catboost_model is None or not features_list:
+            return [{} for _ in features_list]
+
+        X = np.array([f.to_feature_vector() for f in features_list])
+        if not self.native_catboost:
+            return self._explain_spawned(X, top_k)
+        return self._explain_matrix(X, top_k)
+
+    def _explain_spawned(self, X: np.ndarray, top_k: int) -> list[dict]:
+        """ShapValues в отдельном процессе (spawn) с той же моделью, загруженной из self._model_path."""
+        if self._model_path is None:
+            logger.warning("[Scorer] Model was not loaded from disk — explanations skipped in this process")
+            return [{} for _ in range(len(X))]
+        if self._explain_pool is None:
+            self._explain_pool = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_explain_worker,
+                initargs=(self._model_path,),
+            )
+        return self._explain_pool.submit(_explain_rows, X, top_k).result()
+
+    def close(self) -> None:
+        """Останавливает процесс объяснений, если он запускался."""
+        if self._explain_pool is not None:
+            self._explain_pool.shutdown(wait=False)
+            self._explain_pool = None
+
+    def _explain_matrix(self, X: np.ndarray, top_k: int) -> list[dict]:
+        from catboost import Pool
+
+        shap = self._catboost_model.get_feature_importance(Pool(X), type="ShapValues")
+        values, base_values = shap[:, :-1], shap[:, -1]
+        top = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :top_k]
+
+        return [
+            {
+                "base_value": round(float(base), 4),
+                "contributions": {
+                    self._feature_names[j]: round(float(row[j]), 4) for j in idx
+                },
+            }
+            for row, idx, base in zip(values, top, base_values)
+        ]
 
     def save(self, path: Optional[Path] = None):
         """Сохраняет модели на диск."""
@@ -209,6 +355,9 @@ class RiskScorer:
             except Exception as e:
                 logger.warning(f"[Scorer] CatBoost not saved: {e}")
 
+        if self._trees is not None:
+            self._trees.save(Path(path) / "risk_scorer_trees.npz")
+
         if self._isolation_forest is not None:
             with open(Path(path) / "isolation_forest.pkl", "wb") as f:
                 pickle.dump(self._isolation_forest, f)
@@ -217,6 +366,7 @@ class RiskScorer:
     def load(self, path: Optional[Path] = None):
         """Загружает модели с диска."""
         path = path or MODELS_DIR
+        self._model_path = Path(path)
 
         catboost_path = Path(path) / "risk_scorer.cbm"
         if catboost_path.exists():
@@ -227,6 +377,19 @@ class RiskScorer:
                 logger.info("[Scorer] CatBoost loaded")
             except Exception as e:
                 logger.error(f"[Scorer] Failed to load CatBoost: {e}")
+                self._catboost_model = None
+        self._cache_feature_importance()
+
+        self._trees = None
+        trees_path = Path(path) / "risk_scorer_trees.npz"
+        if self._catboost_model is not None:
+            if trees_path.exists() and trees_path.stat().st_mtime >= catboost_path.stat().st_mtime:
+                try:
+                    self._trees = ObliviousTrees.load(trees_path)
+                except Exception as e:
+                    logger.warning(f"[Scorer] Failed to load numpy trees: {e}")
+            if self._trees is None:
+                self._export_trees()
 
         iso_path = Path(path) / "isolation_forest.pkl"
         if iso_path.exists():
@@ -241,4 +404,89 @@ class RiskScorer:
 
     @property
     def is_fitted(self) -> bool:
-        return self._is_fitted
\ No newline at end of file
+        return self._is_fitted
+
+
+def _configure_worker_logging():
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s [%(levelname)s] %(message)s",
+            datefmt="%H:%M:%S",
+        )
+
+
+_explain_scorer: Optional[RiskScorer] = None
+
+
+def _init_explain_worker(model_path: Path) -> None:
+    """Инициализатор процесса объяснений: своя копия модели, CatBoost в процессе без fork."""
+    global _explain_scorer
+    _configure_worker_logging()
+    _explain_scorer = RiskScorer()
+    _explain_scorer.load(model_path)
+
+
+def _explain_rows(X: np.ndarray, top_k: int) -> list[dict]:
+    return _explain_scorer._explain_matrix(X, top_k)
+
+
+def fit_and_register(
+    features_list: list[LotFeatures],
+    labels: Optional[list[int]],
+    rule_scores: Optional[list[float]],
+    fingerprint: str,
+    meta: Optional[dict] = None,
+    registry_root: Optional[Path] = None,
+) -> Optional[dict]:
+    """Обучает RiskScorer и регистрирует версию в реестре (registry_root, по умолчанию MODEL_REGISTRY_DIR).
+
+    Используется и в текущем процессе, и как точка входа фонового процесса обучения.
+    Возвращает запись реестра или None, если обучить не удалось.
+    """
+    from src.model.registry import ModelRegistry
+
+    _configure_worker_logging()
+    started = time.perf_counter()
+    scorer = RiskScorer()
+    if labels is not None:
+        scorer.fit(features_list, labels=labels)
+    else:
+        scorer.fit(features_list, rule_scores=rule_scores)
+    if not scorer.is_fitted:
+        return None
+
+    meta = dict(meta or {})
+    meta["samples"] = len(features_list)
+    meta["duration_seconds"] = round(time.perf_counter() - started, 2)
+    return ModelRegistry(registry_root).register(scorer, fingerprint, meta)
+
+
+def continue_and_register(
+    base_path: Path,
+    X: np.ndarray,
+    labels: list[int],
+    fingerprint: str,
+    meta: Optional[dict] = None,
+    iterations: int = FEEDBACK_RETRAIN_ITERATIONS,
+    registry_root: Optional[Path] = None,
+) -> Optional[dict]:
+    """Дообучает сохраненную версию на новых метках и регистрирует результат.
+
+    Точка входа фонового процесса дообучения по обратной связи.
+    """
+    from src.model.registry import ModelRegistry
+
+    _configure_worker_logging()
+    started = time.perf_counter()
+    scorer = RiskScorer()
+    scorer.load(base_path)
+    if scorer._catboost_model is None:
+        logger.warning(f"[Scorer] No CatBoost model in {base_path} — cannot continue training")
+        return None
+    scorer.fit_incremental(X, labels, iterations=iterations)
+
+    meta = dict(meta or {})
+    meta["samples"] = len(X)
+    meta["duration_seconds"] = round(time.perf_counter() - started, 2)
+    return ModelRegistry(registry_root).register(scorer, fingerprint, meta)
@@ -0,0 +1,180 @@
+"""Потоковая выгрузка обучающих данных в колоночный формат.
+
+Набор <base> состоит из трех файлов:
+    <base>.npy        — матрица признаков float64 (строки пишутся по мере расчета через memmap)
+    <base>.index.csv  — lot_id, label, rule_score в порядке строк матрицы
+    <base>.meta.json  — имена признаков и число записанных строк
+и, если при записи переданы полные признаки лота (with_features=True), <base>.features.jsonl —
+LotFeatures.to_dict() по строке на запись (поле "features" в JSON-выгрузке, как раньше).
+
+JSON и CSV строятся из этого набора по запросу, тоже потоково.
+"""
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_EVERY = 10_000
+
+
+def _paths(base: Path) -> dict[str, Path]:
+    base = Path(base)
+    return {
+        "matrix": base.with_name(base.name + ".npy"),
+        "index": base.with_name(base.name + ".index.csv"),
+        "meta": base.with_name(base.name + ".meta.json"),
+        "features": base.with_name(base.name + ".features.jsonl"),
+    }
+
+
+def _tmp(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+class TrainDataWriter:
+    """Пишет строки обучающей выборки по одной, не держа выборку в памяти."""
+
+    def __init__(self, base: Path, feature_names: list[str], n_rows: int, with_features: bool = False):
+        self.paths = _paths(base)
+        self.feature_names = list(feature_names)
+        self.n_rows = n_rows
+        self.rows = 0
+        self.paths["matrix"].parent.mkdir(parents=True, exist_ok=True)
+        self._matrix = np.lib.format.open_memmap(
+            _tmp(self.paths["matrix"]),
+            mode="w+",
+            dtype=np.float64,
+            shape=(n_rows, len(self.feature_names)),
+        )
+        self._index_file = open(_tmp(self.paths["index"]), "w", encoding="utf-8", newline="")
+        self._index = csv.writer(self._index_file)
+        self._index.writerow(["lot_id", "label", "rule_score"])
+        self._features_file = (
+            open(_tmp(self.paths["features"]), "w", encoding="utf-8") if with_features else None
+        )
+
+    def write(
+        self, lot_id: str, label: int, rule_score: float, vector: list[float], features: Optional[dict] = None
+    ) -> None:
+        if self.rows >= self.n_rows:
+            raise ValueError(f"TrainDataWriter sized for {self.n_rows} rows")
+        self._matrix[self.rows] = vector
+        self._index.writerow([lot_id, label, rule_score])
+        if self._features_file is not None:
+            self._features_file.write(json.dumps(features or {}, ensure_ascii=True) + "\n")
+        self.rows += 1
+        if self.rows % _FLUSH_EVERY == 0:
+            self._matrix.flush()
+
+    def close(self) -> None:
+        """Сбрасывает данные и атомарно публикует набор."""
+        self._matrix.flush()
+        del self._matrix
+        self._index_file.close()
+        keys = ["matrix", "index", "meta"]
+        if self._features_file is not None:
+            self._features_file.close()
+            keys.append("features")
+        else:
+            self.paths["features"].unlink(missing_ok=True)  # от прошлой выгрузки — не соответствует строкам
+        meta = {"feature_names": self.feature_names, "rows": self.rows, "dtype": "float64"}
+        _tmp(self.paths["meta"]).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        for key in keys:
+            _tmp(self.paths[key]).replace(self.paths[key])
+
+    def abort(self) -> None:
+        self._index_file.close()
+        if self._features_file is not None:
+            self._features_file.close()
+        del self._matrix
+        for path in self.paths.values():
+            _tmp(path).unlink(missing_ok=True)
+
+    def __enter__(self) -> "TrainDataWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class TrainData:
+    """Чтение набора: матрица открывается через memmap, индекс читается построчно."""
+
+    def __init__(self, base: Path):
+        self.paths = _paths(base)
+        meta = json.loads(self.paths["meta"].read_text(encoding="utf-8"))
+        self.feature_names: list[str] = meta["feature_names"]
+        self.rows: int = meta["rows"]
+        self.matrix = np.load(self.paths["matrix"], mmap_mode="r")[: self.rows]
+
+    @staticmethod
+    def exists(base: Path) -> bool:
+        return all(p.exists() for key, p in _paths(base).items() if key != "features")
+
+    def iter_features(self) -> Iterator[Optional[dict]]:
+        """LotFeatures.to_dict() по строкам; None, если набор записан без них."""
+        if not self.paths["features"].exists():
+            while True:
+                yield None
+        with open(self.paths["features"], "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def iter_rows(self) -> Iterator[tuple[str, int, float, np.ndarray]]:
+        with open(self.paths["index"], "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for i, (lot_id, label, rule_score) in enumerate(reader):
+                if i >= self.rows:
+                    break
+                yield lot_id, int(label), float(rule_score), self.matrix[i]
+
+    def to_csv(self, path: Path) -> Path:
+        """CSV: lot_id, label, rule_score и столбцы признаков."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["lot_id", "label", "rule_score", *self.feature_names])
+            for lot_id, label, rule_score, vector in self.iter_rows():
+                writer.writerow([lot_id, label, rule_score, *vector.tolist()])
+        return path
+
+    def to_json(self, path: Path) -> Path:
+        """JSON вида {"feature_names": [...], "records": [...]}, записи пишутся по одной.
+
+        Записи — как в прежней выгрузке catboost_train.json: lot_id, rule_score, label,
+        features (если набор записан с with_features) и feature_vector.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"feature_names": ')
+            f.write(json.dumps(self.feature_names, ensure_ascii=True))
+            f.write(', "records": [')
+            rows = zip(self.iter_rows(), self.iter_features())
+            for i, ((lot_id, label, rule_score, vector), features) in enumerate(rows):
+                if i:
+                    f.write(", ")
+                record = {"lot_id": lot_id, "rule_score": rule_score, "label": label}
+                if features is not None:
+                    record["features"] = features
+                record["feature_vector"] = vector.tolist()
+                f.write(json.dumps(record, ensure_ascii=True))
+            f.write("]}")
+        return path
+
+
+def export_train_data(base: Path, fmt: str, output: Optional[Path] = None) -> Path:
+    """Строит CSV или JSON из колоночного набора."""
+    data = TrainData(base)
+    base = Path(base)
+    if fmt == "csv":
+        return data.to_csv(output or base.with_suffix(".csv"))
+    if fmt == "json":
+        return data.to_json(output or base.with_suffix(".json"))
+    raise ValueError(f"Unknown export format: {fmt}")
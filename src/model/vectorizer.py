@@ -13,6 +13,9 @@ from src.preprocessing.text_cleaner import clean_text
 
 logger = logging.getLogger(__name__)
 
+# Максимум ячеек матрицы близостей на один блок запросов (~64 МБ float64)
+_SIMILARITY_BLOCK_CELLS = 8_000_000
+
 
 @dataclass
 class SimilarLot:
@@ -45,6 +48,8 @@ class Vectorizer:
         self._use_transformers = use_transformers
         self._index: list[dict] = []
         self._embeddings: Optional[np.ndarray] = None
+        self._normed: Optional[np.ndarray] = None
+        self._positions_by_lot: dict[str, list[int]] = {}
 
         if use_transformers:
             try:
@@ -101,7 +106,6 @@ class Vectorizer:
                 "lot_id": lot.get("lot_id", ""),
                 "name_ru": lot.get("name_ru", ""),
                 "category_code": lot.get("category_code", ""),
-                "text": text,
             })
 
         if not texts:
@@ -112,60 +116,100 @@ class Vectorizer:
             self._tfidf_fitted = False
 
         self._embeddings = self._encode(texts)
+        norms = np.linalg.norm(self._embeddings, axis=1, keepdims=True)
+        self._normed = np.divide(
+            self._embeddings, norms,
+            out=np.zeros_like(self._embeddings, dtype=float), where=norms > 0,
+        )
+        self._positions_by_lot = {}
+        for i, entry in enumerate(self._index):
+            self._positions_by_lot.setdefault(entry["lot_id"], []).append(i)
         logger.info(f"[Vectorizer] Indexed {len(texts)} lots, embedding shape: {self._embeddings.shape}")
 
-    def _cosine_similarity(self, vec_a: np.ndarray, vec_b: np.ndarray) -> float:
-        """Косинусная близость между векторами."""
-        vec_a = vec_a.flatten()
-        vec_b = vec_b.flatten()
-
-        norm_a = np.linalg.norm(vec_a)
-        norm_b = np.linalg.norm(vec_b)
-
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-
-        return float(np.dot(vec_a, vec_b) / (norm_a * norm_b))
+    def state(self) -> dict:
+        """Построенный индекс для снимка анализатора (модель трансформера не сохраняется)."""
+        return {
+            "use_transformers": self._use_transformers,
+            "index": self._index,
+            "normed": self._normed,
+            "positions_by_lot": self._positions_by_lot,
+            "tfidf": None if self._use_transformers else self._tfidf,
+            "tfidf_fitted": getattr(self, "_tfidf_fitted", False),
+        }
+
+    def load_state(self, state: dict) -> bool:
+        """Восстанавливает индекс; False, если снимок построен в другом режиме (TF-IDF / трансформер)."""
+        if state["use_transformers"] != self._use_transformers:
+            return False
+        self._index = state["index"]
+        self._normed = state["normed"]
+        self._embeddings = None  # нужны только при построении индекса
+        self._positions_by_lot = state["positions_by_lot"]
+        if not self._use_transformers:
+            self._tfidf = state["tfidf"]
+            self._tfidf_fitted = state["tfidf_fitted"]
+        return True
 
     def find_similar(self, lot: dict, top_k: int = 5) -> VectorizerResult:
         """Ищет похожие лоты и аномалии."""
-        lot_id = lot.get("lot_id", "")
-        text = clean_text(lot.get("desc_ru", "") + " " + lot.get("extra_desc_ru", ""))
+        return self.find_similar_batch([lot], top_k=top_k)[0]
+
+    def find_similar_batch(self, lots: list[dict], top_k: int = 5) -> list[VectorizerResult]:
+        """Поиск похожих лотов для набора запросов матричным умножением.
 
-        result = VectorizerResult(lot_id=lot_id)
+        Запросы обрабатываются блоками, чтобы матрица близостей
+        (блок × размер индекса) оставалась ограниченной по памяти.
+        """
+        results = [VectorizerResult(lot_id=lot.get("lot_id", "")) for lot in lots]
 
-        if self._embeddings is None or len(self._index) == 0:
-            return result
+        if self._normed is None or len(self._index) == 0 or not lots:
+            return results
 
+        texts = [
+            clean_text(lot.get("desc_ru", "") + " " + lot.get("extra_desc_ru", ""))
+            for lot in lots
+        ]
         if self._use_transformers and self._model is not None:
-            query_emb = self._model.encode([text], normalize_embeddings=True)[0]
+            queries = self._model.encode(texts, normalize_embeddings=True)
         else:
-            query_emb = self._tfidf.transform([text]).toarray()[0]
-
-        similarities = []
-        for i, entry in enumerate(self._index):
-            if entry["lot_id"] == lot_id:
-                continue
-            sim = self._cosine_similarity(query_emb, self._embeddings[i])
-            similarities.append((i, sim))
-
-        similarities.sort(key=lambda x: x[1], reverse=True)
-
-        for i, sim in similarities[:top_k]:
-            entry = self._index[i]
-            result.similar_lots.append(SimilarLot(
-                lot_id=entry["lot_id"],
-                similarity=round(sim, 4),
-                name_ru=entry["name_ru"],
-                category_code=entry["category_code"],
-            ))
-
-        if similarities:
-            result.max_similarity = similarities[0][1]
-            result.is_copypaste = result.max_similarity >= SIMILARITY_COPYPASTE_THRESHOLD
-            result.is_unique = result.max_similarity <= SIMILARITY_UNIQUE_THRESHOLD
-
-        return result
+            queries = self._tfidf.transform(texts).toarray()
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = np.divide(queries, norms, out=np.zeros_like(queries, dtype=float), where=norms > 0)
+
+        n_index = len(self._index)
+        block = max(1, _SIMILARITY_BLOCK_CELLS // n_index)
+        for start in range(0, len(lots), block):
+            sims = queries[start:start + block] @ self._normed.T
+            for row, result in enumerate(results[start:start + block]):
+                scores = sims[row]
+                own = self._positions_by_lot.get(result.lot_id, [])
+                if own:
+                    scores[own] = -np.inf
+                valid = n_index - len(own)
+                if valid <= 0:
+                    continue
+
+                k = min(top_k, valid)
+                if k > 0:
+                    # Все кандидаты не ниже k-го значения, затем порядок как у
+                    # стабильной сортировки: по убыванию близости, при равенстве — по индексу.
+                    kth = np.partition(scores, n_index - k)[n_index - k]
+                    candidates = np.flatnonzero(scores >= kth)
+                    order = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+                    for i in order:
+                        entry = self._index[i]
+                        result.similar_lots.append(SimilarLot(
+                            lot_id=entry["lot_id"],
+                            similarity=round(float(scores[i]), 4),
+                            name_ru=entry["name_ru"],
+                            category_code=entry["category_code"],
+                        ))
+
+                result.max_similarity = float(scores.max())
+                result.is_copypaste = result.max_similarity >= SIMILARITY_COPYPASTE_THRESHOLD
+                result.is_unique = result.max_similarity <= SIMILARITY_UNIQUE_THRESHOLD
+
+        return results
 
     def find_cluster_anomalies(self, lots: list[dict]) -> dict[str, list[str]]:
         """Ищет аномально подробные ТЗ внутри категорий."""
@@ -1,12 +1,20 @@
 """Извлечение признаков из лотов для ML."""
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field, asdict
 from collections import Counter
 from datetime import datetime, timedelta
+from typing import Optional
 
 import numpy as np
 
 from src.preprocessing.text_cleaner import clean_text
 from src.preprocessing.ner_extractor import NERExtractor, NERResult
+from src.utils.config import (
+    FEATURE_WORKERS,
+    FEATURE_CHUNK_SIZE,
+    FEATURE_PARALLEL_MIN_LOTS,
+    resolve_workers,
+)
 
 
 @dataclass
@@ -106,6 +114,7 @@ class FeatureEngineer:
     def __init__(self):
         self.ner = NERExtractor()
         self._category_budgets: dict[str, list[float]] = {}  # stores unit_price with fallback to budget
+        self._price_stats: dict[str, dict | None] = {}  # category_code -> get_category_price_stats
         self._customer_winner_counts: Counter = Counter()  # (customer, winner) pairs - TOTAL count
         self._pair_counts: Counter = Counter()
         self._category_text_stats: dict[str, dict] = {}
@@ -115,6 +124,7 @@ class FeatureEngineer:
     def fit_history(self, lots: list[dict]):
         """Считает исторические статистики для относительных признаков."""
         self._category_budgets.clear()
+        self._price_stats.clear()
         self._customer_winner_counts.clear()
         self._pair_counts.clear()
         self._customer_ktru_history.clear()
@@ -182,6 +192,29 @@ class FeatureEngineer:
                     "std": variance ** 0.5,
                 }
 
+    def history_snapshot(self) -> dict:
+        """Снимок исторических статистик после fit_history (для передачи в процессы)."""
+        return {
+            "category_budgets": self._category_budgets,
+            "customer_winner_counts": self._customer_winner_counts,
+            "pair_counts": self._pair_counts,
+            "category_text_stats": self._category_text_stats,
+            "customer_ktru_history": self._customer_ktru_history,
+            "customer_winner_history": self._customer_winner_history,
+        }
+
+    @classmethod
+    def from_history_snapshot(cls, snapshot: dict) -> "FeatureEngineer":
+        """Создает FeatureEngineer с уже посчитанной историей."""
+        engineer = cls()
+        engineer._category_budgets = snapshot["category_budgets"]
+        engineer._customer_winner_counts = snapshot["customer_winner_counts"]
+        engineer._pair_counts = snapshot["pair_counts"]
+        engineer._category_text_stats = snapshot["category_text_stats"]
+        engineer._customer_ktru_history = snapshot["customer_ktru_history"]
+        engineer._customer_winner_history = snapshot["customer_winner_history"]
+        return engineer
+
     def get_history_for_lot(self, lot: dict) -> dict:
         """Формирует словарь истории для RuleEngine.analyze()."""
         winner = lot.get("winner_bin", "")
@@ -256,7 +289,12 @@ class FeatureEngineer:
         return sorted_b[n // 2]
 
     def get_category_price_stats(self, category_code: str) -> dict | None:
-        """Полная статистика цен за единицу по категории."""
+        """Полная статистика цен за единицу по категории (считается один раз после fit_history)."""
+        if category_code not in self._price_stats:
+            self._price_stats[category_code] = self._compute_price_stats(category_code)
+        return self._price_stats[category_code]
+
+    def _compute_price_stats(self, category_code: str) -> dict | None:
         budgets = self._category_budgets.get(category_code, [])
         if not budgets:
             return None
@@ -292,8 +330,14 @@ class FeatureEngineer:
 
     def extract_features(self, lot: dict) -> LotFeatures:
         """Извлекает полный набор признаков из лота."""
+        features = self.extract_text_features(lot)
+        return self.apply_lot_features(features, lot)
+
+    def extract_text_features(self, lot: dict, ner_result: Optional[NERResult] = None) -> LotFeatures:
+        """Признаки, зависящие только от текста ТЗ (NER, длина, язык)."""
         desc = clean_text(lot.get("desc_ru", "") + " " + lot.get("extra_desc_ru", ""))
-        ner_result = self.ner.extract(desc)
+        if ner_result is None:
+            ner_result = self.ner.extract(desc)
 
         features = LotFeatures(lot_id=lot.get("lot_id", ""))
 
@@ -323,7 +367,10 @@ class FeatureEngineer:
 
         from src.preprocessing.text_cleaner import detect_language
         features.language = detect_language(desc)
+        return features
 
+    def apply_lot_features(self, features: LotFeatures, lot: dict) -> LotFeatures:
+        """Дополняет признаки метаданными лота и историей: участники, сроки, бюджет, повторы."""
         features.participants_count = lot.get("participants_count", 0)
         features.deadline_days = lot.get("deadline_days", 0)
         features.budget = lot.get("budget", 0)
@@ -403,6 +450,48 @@ class FeatureEngineer:
             # Fallback to simple count if date parsing fails
             return len(self._customer_ktru_history.get((customer, category), []))
 
-    def extract_batch(self, lots: list[dict]) -> list[LotFeatures]:
-        """Извлекает признаки для набора лотов."""
-        return [self.extract_features(lot) for lot in lots]
\ No newline at end of file
+    def extract_batch(
+        self,
+        lots: list[dict],
+        workers: Optional[int] = None,
+        chunk_size: int = FEATURE_CHUNK_SIZE,
+        min_lots: Optional[int] = None,
+    ) -> list[LotFeatures]:
+        """Извлекает признаки для набора лотов.
+
+        На больших корпусах (от min_lots, по умолчанию FEATURE_PARALLEL_MIN_LOTS) работа делится
+        на чанки и раздается пулу процессов. Снимок истории передается в каждый процесс один раз
+        (через initializer), результаты возвращаются в исходном порядке лотов.
+        """
+        workers = resolve_workers(FEATURE_WORKERS if workers is None else workers)
+        min_lots = FEATURE_PARALLEL_MIN_LOTS if min_lots is None else min_lots
+        if workers <= 1 or len(lots) < min_lots:
+            return [self.extract_features(lot) for lot in lots]
+
+        chunk_size = max(1, chunk_size)
+        chunks = [lots[i:i + chunk_size] for i in range(0, len(lots), chunk_size)]
+        workers = min(workers, len(chunks))
+
+        features: list[LotFeatures] = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_feature_worker,
+            initargs=(self.history_snapshot(),),
+        ) as pool:
+            for chunk_features in pool.map(_extract_feature_chunk, chunks):
+                features.extend(chunk_features)
+        return features
+
+
+_worker_engineer: Optional[FeatureEngineer] = None
+
+
+def _init_feature_worker(snapshot: dict) -> None:
+    """Инициализатор процесса пула: восстанавливает FeatureEngineer из снимка."""
+    global _worker_engineer
+    _worker_engineer = FeatureEngineer.from_history_snapshot(snapshot)
+
+
+def _extract_feature_chunk(lots: list[dict]) -> list[LotFeatures]:
+    """Извлекает признаки для одного чанка внутри процесса пула."""
+    return [_worker_engineer.extract_features(lot) for lot in lots]
\ No newline at end of file
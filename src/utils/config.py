@@ -1,6 +1,7 @@
 """Конфигурация GoszakupAI."""
 import os
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +18,8 @@ DATA_DIR = BASE_DIR / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
 MODELS_DIR = DATA_DIR / "models"
+# Файл лотов (.json — массив, .jsonl — по лоту в строке, можно .gz) вместо data/raw/lot_details.json / real_lots.json
+LOTS_FILE = os.getenv("LOTS_FILE", "").strip()
 
 # API goszakup
 GOSZAKUP_TOKEN = os.getenv("GOSZAKUP_TOKEN", "")
@@ -30,7 +33,17 @@ CORS_ALLOWED_ORIGINS = ["*"]
 # Обучение
 FORCE_TRAIN = os.getenv("FORCE_TRAIN", "0").strip().lower() in {"1", "true", "yes"}
 EXPORT_TRAIN_DATA = os.getenv("EXPORT_TRAIN_DATA", "0").strip().lower() in {"1", "true", "yes"}
+TRAIN_DATA_PATH = PROCESSED_DIR / "catboost_train"  # .npy + .index.csv + .meta.json
+BACKGROUND_TRAINING = os.getenv("BACKGROUND_TRAINING", "1").strip().lower() in {"1", "true", "yes"}
 LABELS_CSV = os.getenv("LABELS_CSV", str(PROCESSED_DIR / "labels.csv")).strip()
+MODEL_REGISTRY_DIR = MODELS_DIR / "registry"
+MODEL_REGISTRY_KEEP = int(os.getenv("MODEL_REGISTRY_KEEP", "5"))  # сколько версий хранить для отката
+
+# Дообучение по меткам из /api/feedback
+FEEDBACK_RETRAIN = os.getenv("FEEDBACK_RETRAIN", "1").strip().lower() in {"1", "true", "yes"}
+FEEDBACK_RETRAIN_MIN_LABELS = int(os.getenv("FEEDBACK_RETRAIN_MIN_LABELS", "20"))
+FEEDBACK_POLL_SECONDS = float(os.getenv("FEEDBACK_POLL_SECONDS", "30"))
+FEEDBACK_RETRAIN_ITERATIONS = int(os.getenv("FEEDBACK_RETRAIN_ITERATIONS", "100"))
 
 # Пороги риска
 RISK_THRESHOLDS = {
@@ -40,6 +53,14 @@ RISK_THRESHOLDS = {
     "CRITICAL": (76, 100),
 }
 
+# Веса компонент итогового балла (меняются без переанализа: PUT /api/admin/scoring)
+SCORE_WEIGHTS = {
+    "rules": 0.50,     # ядро — движок правил
+    "ml": 0.40,        # CatBoost + IsolationForest
+    "semantic": 0.05,  # copy-paste / уникальное ТЗ
+    "network": 0.05,   # флаги графа заказчик-поставщик
+}
+
 # Веса правил
 RULE_WEIGHTS = {
     "brand_mention": 35,
@@ -64,17 +85,52 @@ CATBOOST_ITERATIONS = 500
 CATBOOST_DEPTH = 6
 CATBOOST_LR = 0.1
 
+# Производительность
+FEATURE_WORKERS = int(os.getenv("FEATURE_WORKERS", "0"))  # 0 — по числу ядер
+FEATURE_CHUNK_SIZE = int(os.getenv("FEATURE_CHUNK_SIZE", "500"))
+FEATURE_PARALLEL_MIN_LOTS = 2000
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "0"))  # 0 — по числу ядер
+ANALYSIS_SHARD_SIZE = int(os.getenv("ANALYSIS_SHARD_SIZE", "1000"))
+ANALYSIS_PARALLEL_MIN_LOTS = 2000
+PRIORITY_QUEUE_SIZE = int(os.getenv("PRIORITY_QUEUE_SIZE", "32"))  # запросы «проанализировать сейчас»
+ON_DEMAND_TIMEOUT_SECONDS = float(os.getenv("ON_DEMAND_TIMEOUT_SECONDS", "10"))
+TEXT_ANALYSIS_CACHE_SIZE = int(os.getenv("TEXT_ANALYSIS_CACHE_SIZE", "256"))  # /api/analyze, 0 — без кэша
+TEXT_ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("TEXT_ANALYSIS_CACHE_TTL_SECONDS", "3600"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").strip().lower() in {"1", "true", "yes"}  # /api/metrics
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # /api/admin/* требуют заголовок X-Admin-Token; не задан — отключены (404)
+RESULTS_DB_PATH = Path(os.getenv("RESULTS_DB_PATH", str(PROCESSED_DIR / "analysis_results.db")))  # SQLite, WAL
+# Увеличивать при изменении правил, признаков или формулы итогового балла: все лоты будут переанализированы
+ANALYSIS_PIPELINE_VERSION = 2
+# Снимок состояния после initialize() (история, признаки, индекс похожих лотов, граф) для быстрого рестарта
+SNAPSHOT_PATH = Path(os.getenv("SNAPSHOT_PATH", str(PROCESSED_DIR / "analyzer_snapshot.bin")))
+WARM_START_SNAPSHOT = os.getenv("WARM_START_SNAPSHOT", "1").strip().lower() in {"1", "true", "yes"}
+
 # API
 API_HOST = "0.0.0.0"
 API_PORT = 8000
+# Процессы API (python main.py serve): состояние строится один раз и наследуется через fork;
+# первый процесс — владелец (фоновый анализ и запись), остальные только читают
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+WORKER_SYNC_SECONDS = float(os.getenv("WORKER_SYNC_SECONDS", "2"))  # как часто процессы догоняют хранилище
 
 
-def get_risk_level(score: float) -> str:
-    """Преобразует числовой балл в уровень риска."""
-    for level, (lo, hi) in RISK_THRESHOLDS.items():
+def get_risk_level(score: float, thresholds: Optional[dict] = None) -> str:
+    """Преобразует числовой балл в уровень риска (по умолчанию — по RISK_THRESHOLDS)."""
+    thresholds = thresholds or RISK_THRESHOLDS
+    for level, (lo, hi) in thresholds.items():
         if lo <= score <= hi:
             return level
-    return "CRITICAL" if score > 75 else "LOW"
+    # Вне диапазонов: выше всех диапазонов, кроме старшего, — старший уровень, иначе — первый
+    top = max(thresholds, key=lambda level: thresholds[level][1])
+    below_top = max((hi for level, (_, hi) in thresholds.items() if level != top), default=thresholds[top][0])
+    return top if score > below_top else next(iter(thresholds))
+
+
+def resolve_workers(workers: int) -> int:
+    """Число процессов пула: 0 или меньше — по числу доступных ядер."""
+    if workers and workers > 0:
+        return workers
+    return os.cpu_count() or 1
 
 
 def _update_env_file(key: str, value: str, env_path: Path) -> None:
@@ -0,0 +1,126 @@
+"""Метрики конвейера анализа: время стадий (счетчики и гистограммы) в формате Prometheus.
+
+Замер стадии — два вызова perf_counter_ns и одна запись под блокировкой:
+
+    t = metrics.now()
+    ...  # стадия
+    t = metrics.lap("rules", t)
+
+При METRICS_ENABLED=0 now()/lap() сразу возвращают 0 и ничего не пишут.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Optional
+
+from src.utils.config import METRICS_ENABLED
+
+# Границы гистограммы, секунды
+_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+_BUCKETS_NS = tuple(int(b * 1e9) for b in _BUCKETS)
+
+# Сглаживание скорости фонового анализа (EWMA по батчам)
+_RATE_ALPHA = 0.3
+
+
+class StageMetrics:
+    """Агрегаты по стадиям: число вызовов, суммарное время и гистограмма длительностей."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages: dict[str, list] = {}  # стадия -> [count, total_ns, buckets...]
+        self._counters: dict[str, float] = {}
+        self._lots_per_second: Optional[float] = None
+
+    def now(self) -> int:
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def lap(self, stage: str, started_ns: int) -> int:
+        """Записывает время стадии с момента started_ns и возвращает текущий момент."""
+        if not self.enabled:
+            return 0
+        now = time.perf_counter_ns()
+        self.observe(stage, now - started_ns)
+        return now
+
+    def observe(self, stage: str, elapsed_ns: int) -> None:
+        if not self.enabled:
+            return
+        bucket = bisect_left(_BUCKETS_NS, elapsed_ns)
+        with self._lock:
+            row = self._stages.get(stage)
+            if row is None:
+                row = self._stages[stage] = [0, 0] + [0] * (len(_BUCKETS_NS) + 1)
+            row[0] += 1
+            row[1] += elapsed_ns
+            row[2 + bucket] += 1
+
+    def inc(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def record_throughput(self, lots: int, elapsed_ns: int) -> None:
+        """Учитывает батч фонового анализа: счетчик лотов и сглаженная скорость (лотов/с)."""
+        if not self.enabled or elapsed_ns <= 0:
+            return
+        rate = lots / (elapsed_ns / 1e9)
+        with self._lock:
+            self._counters["analyzed_lots"] = self._counters.get("analyzed_lots", 0) + lots
+            previous = self._lots_per_second
+            self._lots_per_second = rate if previous is None else previous + _RATE_ALPHA * (rate - previous)
+
+    def snapshot(self) -> dict:
+        """Текущие агрегаты (для JSON и тестов производительности)."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": row[0],
+                    "total_seconds": row[1] / 1e9,
+                    "avg_ms": row[1] / row[0] / 1e6 if row[0] else 0.0,
+                }
+                for stage, row in self._stages.items()
+            }
+            return {
+                "stages": stages,
+                "counters": dict(self._counters),
+                "lots_per_second": self._lots_per_second,
+            }
+
+    def render_prometheus(self, gauges: Optional[dict[str, float]] = None) -> str:
+        """Текстовый формат Prometheus 0.0.4; gauges — дополнительные мгновенные значения."""
+        with self._lock:
+            stages = {stage: list(row) for stage, row in self._stages.items()}
+            counters = dict(self._counters)
+            lots_per_second = self._lots_per_second
+
+        lines = [
+            "# HELP goszakup_stage_duration_seconds Analysis pipeline stage duration.",
+            "# TYPE goszakup_stage_duration_seconds histogram",
+        ]
+        for stage in sorted(stages):
+            row = stages[stage]
+            cumulative = 0
+            for le, count in zip(_BUCKETS, row[2:]):
+                cumulative += count
+                lines.append(f'goszakup_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'goszakup_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {row[0]}')
+            lines.append(f'goszakup_stage_duration_seconds_sum{{stage="{stage}"}} {row[1] / 1e9:.9f}')
+            lines.append(f'goszakup_stage_duration_seconds_count{{stage="{stage}"}} {row[0]}')
+
+        for name in sorted(counters):
+            lines.append(f"# TYPE goszakup_{name}_total counter")
+            lines.append(f"goszakup_{name}_total {counters[name]:g}")
+
+        all_gauges = dict(gauges or {})
+        if lots_per_second is not None:
+            all_gauges["analysis_lots_per_second"] = lots_per_second
+        for name in sorted(all_gauges):
+            lines.append(f"# TYPE goszakup_{name} gauge")
+            lines.append(f"goszakup_{name} {all_gauges[name]:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = StageMetrics(enabled=METRICS_ENABLED)
@@ -0,0 +1,52 @@
+import random
+from types import SimpleNamespace
+
+from src.model.dashboard import DashboardAggregates
+
+_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+def _result(lot_id: str, rng: random.Random) -> SimpleNamespace:
+    score = round(rng.uniform(0, 100), 1)
+    return SimpleNamespace(
+        lot_id=lot_id,
+        final_score=score,
+        final_level=_LEVELS[min(3, int(score // 25))],
+        lot_data={
+            "budget": rng.randint(0, 10_000),
+            "category_name": rng.choice(["A", "B", "C"]),
+            "is_synthetic": rng.random() < 0.3,
+        },
+    )
+
+
+def test_matches_full_recount():
+    rng = random.Random(0)
+    current = {str(i): _result(str(i), rng) for i in range(500)}
+    dashboard = DashboardAggregates(current.values())
+    for step in range(3000):
+        lot_id = str(rng.randrange(600))
+        old = current.get(lot_id)
+        if old is not None:
+            dashboard.remove([old])
+        if old is None or rng.random() < 0.8:
+            current[lot_id] = _result(lot_id, rng)
+            dashboard.add([current[lot_id]])
+        else:
+            del current[lot_id]
+
+    results = list(current.values())
+    assert dashboard.count == len(results)
+    assert dashboard.total_budget == sum(r.lot_data["budget"] for r in results)
+    assert abs(dashboard.score_sum - sum(r.final_score for r in results)) < 1e-6
+    assert dashboard.by_level == {level: sum(r.final_level == level for r in results) for level in _LEVELS}
+    assert {name: row["count"] for name, row in dashboard.categories().items()} == {
+        name: sum(r.lot_data["category_name"] == name for r in results) for name in {"A", "B", "C"}
+    }
+
+    top_ids = dashboard.top_ids(10)
+    if top_ids is None:
+        dashboard.rebuild_top(results)
+        top_ids = dashboard.top_ids(10)
+    expected = sorted((r.final_score for r in results), reverse=True)[:10]
+    assert [current[lot_id].final_score for lot_id in top_ids] == expected
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.model.final_score import (
+    COMPONENTS,
+    combine_score,
+    combine_scores,
+    normalize_thresholds,
+    normalize_weights,
+    risk_levels,
+)
+from src.utils.config import RISK_THRESHOLDS, SCORE_WEIGHTS, get_risk_level
+
+
+def test_normalize_weights():
+    weights = normalize_weights({"ml": 0.7})
+    assert list(weights) == list(COMPONENTS)
+    assert weights["ml"] == 0.7 and weights["rules"] == SCORE_WEIGHTS["rules"]
+    with pytest.raises(ValueError):
+        normalize_weights({"unknown": 1.0})
+    with pytest.raises(ValueError):
+        normalize_weights({"ml": -0.1})
+    with pytest.raises(ValueError):
+        normalize_weights({"ml": float("nan")})
+
+
+def test_normalize_thresholds():
+    thresholds = normalize_thresholds({"LOW": [0, 20]})
+    assert thresholds["LOW"] == (0.0, 20.0)
+    assert list(thresholds) == list(RISK_THRESHOLDS)
+    with pytest.raises(ValueError):
+        normalize_thresholds({"EXTREME": [0, 1]})
+    with pytest.raises(ValueError):
+        normalize_thresholds({"LOW": [30, 20]})
+
+
+def test_vector_matches_scalar():
+    rng = np.random.default_rng(0)
+    components = rng.uniform(0, 120, size=(2000, len(COMPONENTS)))
+    components[::7] = np.round(components[::7])  # баллы на границах диапазонов
+    weights = normalize_weights({"ml": 0.3, "network": 0.25})
+    thresholds = normalize_thresholds({"LOW": [0, 20], "MEDIUM": [21, 45]})
+
+    scores = combine_scores(components, weights)
+    assert scores.tolist() == [combine_score(row, weights) for row in components]
+    levels = risk_levels(scores, thresholds)
+    assert levels.tolist() == [get_risk_level(score, thresholds) for score in scores]
+    # Баллы между диапазонами (25.5) и выше всех диапазонов
+    gaps = np.array([25.5, 50.5, 75.5, 100.0, -1.0])
+    assert risk_levels(gaps, RISK_THRESHOLDS).tolist() == [get_risk_level(s) for s in gaps]
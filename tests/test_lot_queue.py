@@ -0,0 +1,23 @@
+from src.model.lot_queue import PRIORITY_DEFAULT, PRIORITY_NEW, PRIORITY_REQUESTED, LotQueue
+
+
+def test_pop_order_and_raise():
+    queue = LotQueue()
+    for i in range(5):
+        queue.push(i, (PRIORITY_DEFAULT, 0.0, i))
+    queue.push(3, (PRIORITY_NEW, 0.0, 3))
+    assert not queue.push(3, (PRIORITY_DEFAULT, 0.0, 3))  # понижать приоритет нельзя
+    queue.push(4, (PRIORITY_REQUESTED, 0.0, 4))
+
+    assert [i for _, i in queue.pop(2)] == [4, 3]
+    assert len(queue) == 3
+    assert [i for _, i in queue.pop(10)] == [0, 1, 2]
+    assert len(queue) == 0 and queue.pop(1) == []
+
+
+def test_discard_and_push_many():
+    queue = LotQueue()
+    queue.push_many(((PRIORITY_DEFAULT, -float(i), i), i) for i in range(4))
+    queue.discard(3)
+    assert 3 not in queue and queue.key_of(3) is None
+    assert [i for _, i in queue.pop(10)] == [2, 1, 0]
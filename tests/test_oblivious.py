@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.model.oblivious import ObliviousTrees
+
+catboost = pytest.importorskip("catboost")
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 6))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    y = ((np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 1]) * X[:, 2].clip(0)) > 0.3).astype(int)
+    model = catboost.CatBoostClassifier(
+        iterations=60, depth=5, random_seed=0, verbose=False, allow_writing_files=False
+    )
+    model.fit(X, y)
+    return model
+
+
+def _sample(n: int) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(n, 6))
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X
+
+
+def test_matches_catboost(model):
+    trees = ObliviousTrees.from_catboost(model)
+    X = _sample(300)
+    np.testing.assert_allclose(trees.predict_proba(X), model.predict_proba(X), rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(trees.predict_proba(X[0]), model.predict_proba(X[:1]), rtol=1e-6, atol=1e-9)
+
+
+def test_save_load(model, tmp_path):
+    trees = ObliviousTrees.from_catboost(model)
+    path = tmp_path / "trees.npz"
+    trees.save(path)
+    X = _sample(50)
+    np.testing.assert_array_equal(ObliviousTrees.load(path).predict_raw(X), trees.predict_raw(X))
+
+
+def test_from_cbm_path(model, tmp_path):
+    path = tmp_path / "model.cbm"
+    model.save_model(str(path))
+    X = _sample(20)
+    np.testing.assert_allclose(
+        ObliviousTrees.from_catboost(path).predict_proba(X), model.predict_proba(X), rtol=1e-6, atol=1e-9
+    )
@@ -0,0 +1,106 @@
+from src.ingestion.lot_store import LotStore
+from src.model.analyzer import LOT_QUEUED, LOT_STORED, FullAnalysis, GoszakupAnalyzer, lot_content_hash
+from src.model.result_store import ResultStore
+
+
+def _lot(lot_id: str, **fields) -> dict:
+    return {"lot_id": lot_id, "name_ru": f"Лот {lot_id}", "budget": 1000, "category_code": "C1", **fields}
+
+
+def _analysis(lot: dict, score: float = 10.0, level: str = "LOW") -> FullAnalysis:
+    return FullAnalysis(
+        lot_id=lot["lot_id"],
+        lot_data=lot,
+        final_score=score,
+        final_level=level,
+        model_version="v1",
+        content_hash=lot_content_hash(lot),
+        component_scores=(10.0, 20.0, 0.0, 5.0),
+    )
+
+
+def test_round_trip(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    lots = [_lot("1"), _lot("2", category_code="C2")]
+    assert store.upsert_many([_analysis(lots[0], 12.34), _analysis(lots[1], 80.0, "CRITICAL")]) == 2
+
+    payload = store.get("1")
+    assert "lot_data" not in payload
+    assert payload["final_score"] == 12.3
+    assert payload["model_version"] == "v1"
+    assert payload["component_scores"] == {"rules": 10.0, "ml": 20.0, "semantic": 0.0, "network": 5.0}
+    assert set(store.get_many(["1", "2", "missing"])) == {"1", "2"}
+    assert store.find(category_code="C2") == [("2", 80.0)]
+    assert store.count() == 2
+
+    # Повторная запись заменяет строку; столбцы баллов обновляются без payload
+    store.upsert_many([_analysis(lots[0], 55.0, "HIGH")])
+    store.update_scores([("2", 30.0, "MEDIUM")])
+    assert store.count() == 2
+    assert store.find(level="HIGH") == [("1", 55.0)]
+    assert store.find(level="MEDIUM") == [("2", 30.0)]
+    store.close()
+
+    reopened = ResultStore(tmp_path / "results.db")
+    assert reopened.get("1")["final_score"] == 55.0
+    assert reopened.delete(["1"]) == 1
+    assert reopened.lot_ids() == {"2"}
+
+
+def test_changed_since_cursor(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    store.upsert_many([_analysis(_lot(str(i))) for i in range(5)])
+
+    first = store.changed_since(0.0, "", limit=3)
+    assert [row[0] for row in first] == ["0", "1", "2"]
+    updated_at, lot_id = first[-1][1], first[-1][0]
+    rest = store.changed_since(updated_at, lot_id, limit=3)
+    assert [row[0] for row in rest] == ["3", "4"]
+    assert store.changed_since(rest[-1][1], rest[-1][0]) == []
+
+
+def test_priority_requests(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    store.add_priority_requests(["a", "b"])
+    store.add_priority_requests(["a"])
+    assert sorted(store.pop_priority_requests()) == ["a", "b"]
+    assert store.pop_priority_requests() == []
+
+
+def test_pipeline_version_invalidates(tmp_path):
+    path = tmp_path / "results.db"
+    ResultStore(path, pipeline_version=1).upsert_many([_analysis(_lot("1"))])
+
+    assert set(ResultStore(path, pipeline_version=1).fingerprints()) == {"1"}
+    newer = ResultStore(path, pipeline_version=2)
+    assert newer.fingerprints() == {}
+    assert newer.changed_since(0.0) == []
+
+
+def test_content_hash():
+    lot = _lot("1")
+    assert lot_content_hash(lot) == lot_content_hash(dict(lot))
+    assert lot_content_hash({**lot, "budget": 2000}) != lot_content_hash(lot)
+    # Поля, не влияющие на анализ, хэш не меняют
+    assert lot_content_hash({**lot, "is_synthetic": True}) == lot_content_hash(lot)
+
+
+def test_changed_lots_are_reanalyzed(tmp_path):
+    lots = [_lot("1"), _lot("2"), _lot("3")]
+    store = ResultStore(tmp_path / "results.db")
+    store.upsert_many([_analysis(lot) for lot in lots])
+
+    current = [lots[0], _lot("2", budget=5000), _lot("4")]
+    analyzer = GoszakupAnalyzer()
+    analyzer.result_store = store
+    analyzer._legacy_cache_path = tmp_path / "analysis_cache.json"
+    analyzer.lot_store = LotStore(current)
+    analyzer._lots = analyzer.lot_store.lots
+    analyzer._lot_hashes = [lot_content_hash(lot) for lot in current]
+    analyzer._load_analysis_cache()
+
+    assert list(analyzer._to_restore) == [0]
+    assert [i for _, i in analyzer._queue.pop(10)] == [1, 2]
+    assert list(analyzer._lot_state) == [LOT_STORED, LOT_QUEUED, LOT_QUEUED]
+    # Результат исчезнувшего лота удален
+    assert store.lot_ids() == {"1", "2"}
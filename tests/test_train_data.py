@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+
+from src.model.train_data import TrainData, TrainDataWriter, export_train_data
+
+
+def test_round_trip(tmp_path):
+    base = tmp_path / "train"
+    with TrainDataWriter(base, ["a", "b"], 3, with_features=True) as writer:
+        writer.write("1", 1, 80.0, [1.0, 2.0], {"a": 1.0})
+        writer.write("2", 0, 10.0, [3.0, 4.0], {"a": 3.0})
+
+    data = TrainData(base)
+    assert data.rows == 2  # записано меньше строк, чем зарезервировано
+    np.testing.assert_array_equal(data.matrix, [[1.0, 2.0], [3.0, 4.0]])
+    assert [(lot_id, label, score) for lot_id, label, score, _ in data.iter_rows()] == [("1", 1, 80.0), ("2", 0, 10.0)]
+
+    records = json.loads(export_train_data(base, "json").read_text(encoding="utf-8"))["records"]
+    assert [r["features"] for r in records] == [{"a": 1.0}, {"a": 3.0}]
+    assert records[1]["feature_vector"] == [3.0, 4.0]
+
+
+def test_zero_rows(tmp_path):
+    base = tmp_path / "train"
+    with TrainDataWriter(base, ["a", "b"], 0):
+        pass
+
+    data = TrainData(base)
+    assert data.rows == 0 and data.matrix.shape == (0, 2)
+    assert list(data.iter_rows()) == []
+    assert export_train_data(base, "csv").read_text(encoding="utf-8").count("\n") == 1
+
+
+def test_abort_keeps_previous(tmp_path):
+    base = tmp_path / "train"
+    with TrainDataWriter(base, ["a"], 1) as writer:
+        writer.write("1", 1, 50.0, [1.0])
+    try:
+        with TrainDataWriter(base, ["a"], 1) as writer:
+            writer.write("2", 0, 0.0, [2.0])
+            raise RuntimeError("interrupted")
+    except RuntimeError:
+        pass
+    assert [row[0] for row in TrainData(base).iter_rows()] == ["1"]
+    assert not list(tmp_path.glob("*.tmp"))